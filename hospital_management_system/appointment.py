@@ -3,10 +3,12 @@ Appointment Class for Hospital Management System
 Represents an appointment between a patient and doctor with scheduling and status management.
 """
 
-import uuid
+import sys
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List
 from enum import Enum
+from ids import new_id
+from time_utils import parse_date, parse_time_slot
 
 
 class AppointmentStatus(Enum):
@@ -35,32 +37,114 @@ class Appointment:
             notes: Additional notes about the appointment
             status: Current status of the appointment
         """
-        self.appointment_id = str(uuid.uuid4())[:8]
+        self.appointment_id = new_id()
+        self.observer: Optional[Callable[['Appointment', str], None]] = None  # Notified on changes
         self.patient_id = patient_id
         self.doctor_id = doctor_id
         self.date = date
         self.time_slot = time_slot
         self.appointment_type = appointment_type
-        self.notes = notes
+        self.notes = notes  # Later entries are appended to _note_entries and joined on read
         self.status = status
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
         self.diagnosis: Optional[str] = None
         self.prescription: Optional[str] = None
         self.follow_up_date: Optional[str] = None
-        self.cost: float = 0.0
+        self.cost = 0.0
+    
+    @property
+    def date(self) -> str:
+        """Appointment date (YYYY-MM-DD)"""
+        return self._date
+    
+    @date.setter
+    def date(self, value: str):
+        # Parse once here so comparisons elsewhere are plain integer checks
+        self._apply("date", {'day': parse_date(value), '_date': sys.intern(value)})
+    
+    @property
+    def time_slot(self) -> str:
+        """Time slot (HH:MM-HH:MM or HH:MM)"""
+        return self._time_slot
+    
+    @time_slot.setter
+    def time_slot(self, value: str):
+        start_minute, end_minute = parse_time_slot(value)
+        self._apply("time_slot", {'start_minute': start_minute, 'end_minute': end_minute,
+                                  '_time_slot': sys.intern(value)})
+    
+    @property
+    def notes(self) -> str:
+        """Appointment notes, joined from the appended entries when read"""
+        if len(self._note_entries) > 1:
+            self._note_entries = ["".join(self._note_entries)]
+        return self._note_entries[0]
+    
+    @notes.setter
+    def notes(self, value: str):
+        self._note_entries = [value]
+    
+    def _append_note(self, text: str):
+        """Add a timestamped line to the notes in O(1)"""
+        self._note_entries.append(f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: {text}")
+    
+    @property
+    def status(self) -> AppointmentStatus:
+        """Current status of the appointment"""
+        return self._status
+    
+    @status.setter
+    def status(self, value: AppointmentStatus):
+        self._apply("status", {'_status': value})
+    
+    @property
+    def cost(self) -> float:
+        """Amount charged for the appointment"""
+        return self._cost
+    
+    @cost.setter
+    def cost(self, value: float):
+        self._apply("cost", {'_cost': value})
+    
+    @property
+    def time(self) -> str:
+        """Alias of time_slot for GUI compatibility"""
+        return self._time_slot
+    
+    def _apply(self, field: str, values: Dict[str, object]):
+        """
+        Set attributes, then tell the observer (usually the owning Hospital) that a field changed
         
-        # Add time property for GUI compatibility
-        self.time = time_slot
+        If the observer rejects the change (e.g. the new time is already booked),
+        the old values are put back and its exception is re-raised.
+        """
+        old_values = {name: getattr(self, name, None) for name in values}
+        for name, value in values.items():
+            setattr(self, name, value)
+        try:
+            self._changed(field)
+        except Exception:
+            for name, value in old_values.items():
+                setattr(self, name, value)
+            raise
+    
+    def _changed(self, field: str):
+        """Tell the observer (usually the owning Hospital) that a field changed"""
+        if getattr(self, 'observer', None) is not None:
+            self.observer(self, field)
         
     def update_status(self, new_status: AppointmentStatus, notes: str = "") -> str:
         """Update appointment status"""
         old_status = self.status
-        self.status = new_status
+        try:
+            self.status = new_status
+        except Exception as e:
+            return f"Cannot change status: {e}"
         self.updated_at = datetime.now()
         
         if notes:
-            self.notes += f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: {notes}"
+            self._append_note(notes)
         
         return f"Appointment status updated from {old_status.value} to {new_status.value}"
     
@@ -101,11 +185,21 @@ class Appointment:
         if self.status in [AppointmentStatus.CANCELLED, AppointmentStatus.COMPLETED]:
             return "Cannot reschedule cancelled or completed appointments"
         
+        try:
+            day = parse_date(new_date)
+            start_minute, end_minute = parse_time_slot(new_time_slot)
+        except ValueError as e:
+            return str(e)
+        
         old_date = self.date
         old_time = self.time_slot
         
-        self.date = new_date
-        self.time_slot = new_time_slot
+        # Date and time change together, so the observer only ever sees the complete new time
+        try:
+            self._apply("date", {'day': day, '_date': sys.intern(new_date), 'start_minute': start_minute,
+                                 'end_minute': end_minute, '_time_slot': sys.intern(new_time_slot)})
+        except Exception as e:
+            return str(e)
         self.updated_at = datetime.now()
         
         return f"Appointment rescheduled from {old_date} {old_time} to {new_date} {new_time_slot}"
@@ -119,7 +213,7 @@ class Appointment:
         self.updated_at = datetime.now()
         
         if reason:
-            self.notes += f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}: Cancelled - {reason}"
+            self._append_note(f"Cancelled - {reason}")
         
         return "Appointment cancelled successfully"
     
@@ -0,0 +1,364 @@
+"""
+Appointment Assignment for Hospital Management System
+Assigns a batch of pending patient requests (walk-ins, referrals) to doctors and schedule slots at once.
+"""
+
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple
+from time_utils import MINUTES_PER_DAY, format_date, format_time, parse_date, parse_time_slot
+
+
+class AssignmentRequest:
+    def __init__(self, patient_id: str, specialization: str = "", department: str = "",
+                 earliest_date: Optional[str] = None, latest_date: Optional[str] = None,
+                 preferred_doctor_id: Optional[str] = None, preferred_time: Optional[str] = None,
+                 priority: int = 0):
+        """
+        Initialize a pending appointment request
+
+        Args:
+            patient_id: ID of the patient to book
+            specialization: Required doctor specialization (empty for any)
+            department: Required department (empty for any)
+            earliest_date: First acceptable date (YYYY-MM-DD), defaults to the solver start
+            latest_date: Last acceptable date (YYYY-MM-DD), defaults to the solver horizon
+            preferred_doctor_id: Doctor the patient would like to see
+            preferred_time: Preferred time window (HH:MM-HH:MM)
+            priority: Higher priority requests are placed first among equal dates
+        """
+        self.patient_id = patient_id
+        self.specialization = specialization
+        self.department = department
+        self.earliest_date = earliest_date
+        self.latest_date = latest_date
+        self.preferred_doctor_id = preferred_doctor_id
+        self.preferred_window = parse_time_slot(preferred_time) if preferred_time else None
+        self.priority = priority
+
+    def __repr__(self) -> str:
+        return (f"AssignmentRequest(patient_id='{self.patient_id}', "
+                f"specialization='{self.specialization}', department='{self.department}')")
+
+
+class Assignment:
+    def __init__(self, request: AssignmentRequest, doctor_id: str, tick: int, cost: int,
+                 request_start: int, request_end: int, preference_met: bool):
+        """
+        A request placed at a doctor's seat
+
+        Ticks are day * MINUTES_PER_DAY + minute; request_start and
+        request_end are the request's acceptable window in ticks.
+        """
+        self.request = request
+        self.doctor_id = doctor_id
+        self.tick = tick
+        self.cost = cost
+        self.request_start = request_start
+        self.request_end = request_end
+        self.preference_met = preference_met
+
+    @property
+    def date(self) -> str:
+        return format_date(self.tick // MINUTES_PER_DAY)
+
+    @property
+    def time(self) -> str:
+        return format_time(self.tick % MINUTES_PER_DAY)
+
+    def __repr__(self) -> str:
+        return f"Assignment(patient_id='{self.request.patient_id}', doctor_id='{self.doctor_id}', {self.date} {self.time})"
+
+
+class AssignmentResult:
+    def __init__(self, assignments: List[Assignment], unassigned: List[AssignmentRequest],
+                 elapsed: float, greedy_cost: int, swaps: int):
+        self.assignments = assignments
+        self.unassigned = unassigned
+        self.elapsed = elapsed
+        self.greedy_cost = greedy_cost
+        self.swaps = swaps
+
+    def report(self) -> Dict:
+        """Quality metrics for the assignment"""
+        waits = sorted(a.tick - a.request_start for a in self.assignments) if self.assignments else []
+        with_preferences = [a for a in self.assignments
+                            if a.request.preferred_doctor_id or a.request.preferred_window]
+        preferences_met = [a for a in with_preferences if a.preference_met]
+        total = len(self.assignments) + len(self.unassigned)
+        return {
+            'requests': total,
+            'assigned': len(self.assignments),
+            'unassigned': len(self.unassigned),
+            'average_wait_minutes': sum(waits) / len(waits) if waits else 0.0,
+            'median_wait_minutes': waits[len(waits) // 2] if waits else 0,
+            'max_wait_minutes': waits[-1] if waits else 0,
+            'preferences_met': len(preferences_met),
+            'preferences_requested': len(with_preferences),
+            'greedy_cost': self.greedy_cost,
+            'final_cost': sum(a.cost for a in self.assignments),
+            'local_search_swaps': self.swaps,
+            'seconds': round(self.elapsed, 3)
+        }
+
+
+class AssignmentSolver:
+    def __init__(self, hospital, start_date: str, horizon_days: int = 14,
+                 candidate_doctors: int = 8, preference_penalty: int = 120):
+        """
+        Initialize the solver over a hospital's doctors and schedules
+
+        Args:
+            hospital: Hospital providing doctors, schedules and existing bookings
+            start_date: First date that can be assigned (YYYY-MM-DD)
+            horizon_days: Number of days from start_date to consider
+            candidate_doctors: Doctors with the earliest free seats compared per request
+            preference_penalty: Cost in minutes of wait for each unmet preference
+        """
+        self.hospital = hospital
+        self.first_day = parse_date(start_date)
+        self.last_day = self.first_day + horizon_days - 1
+        self.candidate_doctors = candidate_doctors
+        self.preference_penalty = preference_penalty
+
+    def solve(self, requests: List[AssignmentRequest], local_search: bool = True) -> AssignmentResult:
+        """
+        Assign requests to doctor seats, minimizing wait plus preference penalties
+
+        A greedy pass places requests in order of earliest date, each at the
+        cheapest of the first few free seats in its specialization/department
+        group. A local search pass then swaps seats between requests in the
+        same group when that lowers their combined cost.
+        """
+        started = time.perf_counter()
+        self._seats = self._build_seats()
+        self._used: Dict[str, bytearray] = {d: bytearray(len(s)) for d, s in self._seats.items()}
+        self._next: Dict[str, int] = {d: 0 for d in self._seats}
+        self._heaps: Dict[Tuple[str, str], list] = {}
+
+        ordered = sorted(requests, key=lambda r: (self._window(r)[0], -r.priority))
+        assignments: List[Assignment] = []
+        unassigned: List[AssignmentRequest] = []
+        for request in ordered:
+            assignment = self._assign(request)
+            if assignment is None:
+                unassigned.append(request)
+            else:
+                assignments.append(assignment)
+
+        greedy_cost = sum(a.cost for a in assignments)
+        swaps = self._improve(assignments) if local_search else 0
+        return AssignmentResult(assignments, unassigned, time.perf_counter() - started, greedy_cost, swaps)
+
+    def apply(self, result: AssignmentResult) -> Tuple[List[str], List[Tuple[Assignment, str]]]:
+        """
+        Book the assignments through the hospital
+
+        Returns:
+            (appointment IDs, [(assignment, error message)] for bookings that failed)
+        """
+        booked, failed = [], []
+        for assignment in result.assignments:
+            try:
+                booked.append(self.hospital.book_appointment(assignment.request.patient_id,
+                                                             assignment.doctor_id,
+                                                             assignment.date, assignment.time))
+            except Exception as e:
+                failed.append((assignment, str(e)))
+        return booked, failed
+
+    def _build_seats(self) -> Dict[str, List[int]]:
+        """
+        Free seats per doctor as sorted ticks (see BookingEngine.free_seats)
+        """
+        seats: Dict[str, List[int]] = {}
+        for doctor in list(self.hospital.doctors.values()):
+            if not doctor.is_active:
+                continue
+            ticks = []
+            for day in range(self.first_day, self.last_day + 1):
+                ticks.extend(day * MINUTES_PER_DAY + minute
+                             for minute in self.hospital.booking.free_seats(doctor, format_date(day)))
+            if ticks:
+                seats[doctor.doctor_id] = ticks
+        return seats
+
+    def _window(self, request: AssignmentRequest) -> Tuple[int, int]:
+        """Earliest and latest acceptable ticks for a request"""
+        first = max(self.first_day, parse_date(request.earliest_date)) if request.earliest_date else self.first_day
+        last = min(self.last_day, parse_date(request.latest_date)) if request.latest_date else self.last_day
+        return first * MINUTES_PER_DAY, (last + 1) * MINUTES_PER_DAY - 1
+
+    def _group_heap(self, request: AssignmentRequest) -> list:
+        """Heap of (next free tick, doctor_id) for doctors matching a request"""
+        key = (request.specialization.lower(), request.department.lower())
+        heap = self._heaps.get(key)
+        if heap is None:
+            heap = []
+            for doctor_id, ticks in self._seats.items():
+                doctor = self.hospital.doctors[doctor_id]
+                if key[0] and doctor.specialization.lower() != key[0]:
+                    continue
+                if key[1] and doctor.department.lower() != key[1]:
+                    continue
+                heap.append((ticks[0], doctor_id))
+            heapq.heapify(heap)
+            self._heaps[key] = heap
+        return heap
+
+    def _next_free(self, doctor_id: str, earliest: int) -> Optional[int]:
+        """
+        Index of a doctor's first free seat at or after earliest
+
+        Requests are placed in order of earliest tick, so seats skipped here
+        can never be used by a later request and the pointer only moves forward.
+        """
+        ticks, used = self._seats[doctor_id], self._used[doctor_id]
+        index = self._next[doctor_id]
+        while index < len(ticks) and (used[index] or ticks[index] < earliest):
+            index += 1
+        self._next[doctor_id] = index
+        return index if index < len(ticks) else None
+
+    def _cost(self, request: AssignmentRequest, doctor_id: str, tick: int, earliest: int) -> int:
+        cost = tick - earliest
+        if request.preferred_doctor_id and request.preferred_doctor_id != doctor_id:
+            cost += self.preference_penalty
+        if request.preferred_window:
+            minute = tick % MINUTES_PER_DAY
+            if not request.preferred_window[0] <= minute < request.preferred_window[1]:
+                cost += self.preference_penalty
+        return cost
+
+    def _candidates(self, request: AssignmentRequest, doctor_id: str, start: int, earliest: int, latest: int):
+        """Yield (cost, doctor_id, seat index) options for one doctor"""
+        ticks, used = self._seats[doctor_id], self._used[doctor_id]
+        yield self._cost(request, doctor_id, ticks[start], earliest), doctor_id, start
+        if request.preferred_window:
+            # Look a little further ahead for a seat inside the preferred window
+            for index in range(start + 1, min(len(ticks), start + 32)):
+                if ticks[index] > latest:
+                    break
+                minute = ticks[index] % MINUTES_PER_DAY
+                if not used[index] and request.preferred_window[0] <= minute < request.preferred_window[1]:
+                    yield self._cost(request, doctor_id, ticks[index], earliest), doctor_id, index
+                    break
+
+    def _assign(self, request: AssignmentRequest) -> Optional[Assignment]:
+        earliest, latest = self._window(request)
+        heap = self._group_heap(request)
+        options = []
+        popped = []
+
+        while heap and len(popped) < self.candidate_doctors:
+            tick, doctor_id = heapq.heappop(heap)
+            index = self._next_free(doctor_id, earliest)
+            if index is None:
+                continue  # Doctor fully booked for the horizon
+            if self._seats[doctor_id][index] != tick:
+                heapq.heappush(heap, (self._seats[doctor_id][index], doctor_id))  # Stale entry
+                continue
+            popped.append((tick, doctor_id))
+            if tick <= latest:
+                options.extend(self._candidates(request, doctor_id, index, earliest, latest))
+
+        preferred = request.preferred_doctor_id
+        if preferred in self._seats and all(doctor_id != preferred for _, doctor_id in popped):
+            doctor = self.hospital.doctors[preferred]
+            if ((not request.specialization or doctor.specialization.lower() == request.specialization.lower())
+                    and (not request.department or doctor.department.lower() == request.department.lower())):
+                index = self._next_free(preferred, earliest)
+                if index is not None and self._seats[preferred][index] <= latest:
+                    options.extend(self._candidates(request, preferred, index, earliest, latest))
+
+        best = min(options) if options else None
+        if best is not None:
+            cost, doctor_id, index = best
+            self._used[doctor_id][index] = 1
+
+        for _, doctor_id in popped:
+            index = self._next_free(doctor_id, earliest)
+            if index is not None:
+                heapq.heappush(heap, (self._seats[doctor_id][index], doctor_id))
+
+        if best is None:
+            return None
+        tick = self._seats[doctor_id][index]
+        return Assignment(request, doctor_id, tick, cost, earliest, latest,
+                          self._preference_met(request, doctor_id, tick))
+
+    def _preference_met(self, request: AssignmentRequest, doctor_id: str, tick: int) -> bool:
+        if request.preferred_doctor_id and request.preferred_doctor_id != doctor_id:
+            return False
+        if request.preferred_window:
+            minute = tick % MINUTES_PER_DAY
+            return request.preferred_window[0] <= minute < request.preferred_window[1]
+        return True
+
+    def _improve(self, assignments: List[Assignment], neighbours: int = 25) -> int:
+        """Swap seats between nearby assignments in the same group when it lowers total cost"""
+        groups: Dict[Tuple[str, str], List[Assignment]] = {}
+        for assignment in assignments:
+            key = (assignment.request.specialization.lower(), assignment.request.department.lower())
+            groups.setdefault(key, []).append(assignment)
+
+        swaps = 0
+        for members in groups.values():
+            members.sort(key=lambda a: a.tick)
+            for position, a in enumerate(members):
+                if a.preference_met:
+                    continue
+                for b in members[max(0, position - neighbours):position + neighbours + 1]:
+                    if b is a:
+                        continue
+                    if not (a.request_start <= b.tick <= a.request_end and b.request_start <= a.tick <= b.request_end):
+                        continue
+                    a_cost = self._cost(a.request, b.doctor_id, b.tick, a.request_start)
+                    b_cost = self._cost(b.request, a.doctor_id, a.tick, b.request_start)
+                    if a_cost + b_cost < a.cost + b.cost:
+                        a.doctor_id, b.doctor_id = b.doctor_id, a.doctor_id
+                        a.tick, b.tick = b.tick, a.tick
+                        a.cost, b.cost = a_cost, b_cost
+                        a.preference_met = self._preference_met(a.request, a.doctor_id, a.tick)
+                        b.preference_met = self._preference_met(b.request, b.doctor_id, b.tick)
+                        swaps += 1
+                        if a.preference_met:
+                            break
+        return swaps
+
+
+def benchmark(requests: int = 10000, doctors: int = 500) -> None:
+    """Assign many requests across many doctors and print the quality report"""
+    import random
+    from hospital import Hospital
+    from schedule_template import ScheduleTemplate
+
+    rng = random.Random(42)
+    hospital = Hospital()
+    specializations = ["Cardiology", "Neurology", "Orthopedics", "Pediatrics", "General Medicine"]
+    doctor_ids = []
+    for i in range(doctors):
+        specialization = specializations[i % len(specializations)]
+        doctor_id = hospital.add_doctor(f"Doctor {i}", specialization, f"555-{i:04d}", specialization)
+        hospital.doctors[doctor_id].add_schedule_template(ScheduleTemplate("Mon-Fri", "09:00", "17:00", 20, 1))
+        doctor_ids.append(doctor_id)
+
+    start = parse_date("2030-01-07")
+    pending = []
+    for i in range(requests):
+        pending.append(AssignmentRequest(
+            f"P{i:05d}",
+            specialization=rng.choice(specializations),
+            earliest_date=format_date(start + rng.randint(0, 6)),
+            preferred_doctor_id=rng.choice(doctor_ids) if rng.random() < 0.2 else None,
+            preferred_time=rng.choice(["09:00-12:00", "13:00-17:00"]) if rng.random() < 0.4 else None
+        ))
+
+    solver = AssignmentSolver(hospital, "2030-01-07", horizon_days=14)
+    result = solver.solve(pending)
+    for name, value in result.report().items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    benchmark()
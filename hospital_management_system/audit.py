@@ -0,0 +1,304 @@
+"""
+Audit Log for Hospital Management System
+Records who changed which patient, doctor or appointment and when, written to a rotating append-only file by a background thread.
+"""
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+# Methods that change state, per class; only the outermost call of a chain is recorded
+MUTATORS: Dict[str, Tuple[str, ...]] = {
+    "Hospital": ("add_patient", "add_doctor", "book_appointment", "update_medical_history", "load_data",
+                 "remove_patient", "remove_doctor", "remove_appointment", "update_appointment_status",
+                 "reschedule_appointment", "cancel_appointment"),
+    "Patient": ("add_appointment", "remove_appointment", "add_prescription", "update_medical_history",
+                "deactivate_patient", "activate_patient"),
+    "Doctor": ("add_patient", "remove_patient", "set_consultation_fee", "add_schedule_template",
+               "materialize_templates", "add_schedule_slot", "remove_schedule_slot", "book_appointment",
+               "cancel_appointment"),
+    "Appointment": ("update_status", "add_diagnosis", "add_prescription", "set_follow_up_date", "set_cost",
+                    "reschedule", "cancel_appointment", "start_appointment", "complete_appointment",
+                    "_changed"),
+}
+
+# Attribute holding the ID of each audited class
+ID_ATTRIBUTES = {"Hospital": "hospital_id", "Patient": "patient_id", "Doctor": "doctor_id",
+                 "Appointment": "appointment_id"}
+
+# Longest argument or result text kept in a record
+MAX_VALUE_LENGTH = 200
+
+_context = threading.local()  # actor and call depth per thread
+
+
+def set_actor(actor: str) -> None:
+    """Set who is making changes on the current thread"""
+    _context.actor = actor
+
+
+def get_actor() -> str:
+    """Who is making changes on the current thread ("system" if not set)"""
+    return getattr(_context, "actor", "system")
+
+
+@contextmanager
+def acting_as(actor: str) -> Iterator[None]:
+    """Attribute the changes made inside the block to an actor"""
+    previous = get_actor()
+    set_actor(actor)
+    try:
+        yield
+    finally:
+        set_actor(previous)
+
+
+def _compact(value) -> str:
+    if type(value) is not str:
+        value = value.value if hasattr(value, "value") and not isinstance(value, (int, float)) else value
+        value = value if isinstance(value, str) else repr(value)
+    return value if len(value) <= MAX_VALUE_LENGTH else value[:MAX_VALUE_LENGTH - 3] + "..."
+
+
+class AuditLog:
+    def __init__(self, path: str = "audit.log", max_bytes: int = 10 * 1024 * 1024, backup_count: int = 10,
+                 max_queue: int = 100000, flush_interval: float = 0.5, block_when_full: bool = True):
+        """
+        Initialize the audit log and start its writer thread
+
+        Args:
+            path: Current log file; full files are renamed to path.1, path.2, ...
+            max_bytes: Size at which the log is rotated
+            backup_count: Number of rotated files kept
+            max_queue: Records waiting for the writer before back-pressure applies
+            flush_interval: Seconds between writes when the queue is not full
+            block_when_full: Wait for the writer when the queue is full; if False,
+                             records are dropped and the drop count is logged
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.block_when_full = block_when_full
+        self.dropped = 0
+        self.written = 0
+
+        # deque.append is atomic, so recording takes no lock unless the queue is full
+        self._queue: Deque[tuple] = collections.deque()
+        self._wake = threading.Event()
+        self._drained = threading.Condition()
+        self._stopping = False
+        self._installed: List[Tuple[type, str, object]] = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, entity: str, entity_id: str, action: str, args: tuple = (), result=None) -> None:
+        """
+        Queue one audit record; formatting and I/O happen on the writer thread
+
+        Args:
+            entity: "hospital", "patient", "doctor" or "appointment"
+            entity_id: ID of the changed record
+            action: Method or field that changed it
+            args: Arguments of the change
+            result: Returned message, or the exception raised
+        """
+        if len(self._queue) >= self.max_queue:
+            if not self.block_when_full:
+                self.dropped += 1
+                return
+            self._wake.set()
+            with self._drained:
+                while len(self._queue) >= self.max_queue and not self._stopping:
+                    self._drained.wait(0.1)
+        self._queue.append((time.time(), get_actor(), entity, entity_id, action, args, result))
+        if len(self._queue) >= self.max_queue // 2:
+            self._wake.set()
+
+    def install(self, *classes: type) -> None:
+        """
+        Wrap the mutating methods (see MUTATORS) of the given classes so every change is recorded
+
+        Direct field assignments on appointments (status, date, time slot,
+        cost) are recorded through Appointment._changed, but only for
+        appointments that belong to a hospital.
+        """
+        for cls in classes:
+            entity = cls.__name__.lower()
+            id_attribute = ID_ATTRIBUTES[cls.__name__]
+            for name in MUTATORS[cls.__name__]:
+                original = cls.__dict__[name]
+                setattr(cls, name, self._wrap(original, entity, id_attribute, name))
+                self._installed.append((cls, name, original))
+
+    def uninstall(self) -> None:
+        """Restore the original methods"""
+        for cls, name, original in reversed(self._installed):
+            setattr(cls, name, original)
+        self._installed = []
+
+    def _wrap(self, method, entity: str, id_attribute: str, name: str):
+        record = self.record
+        field_change = name == "_changed"
+
+        @functools.wraps(method)
+        def audited(obj, *args, **kwargs):
+            depth = getattr(_context, "depth", 0)
+            if depth or (field_change and getattr(obj, "observer", None) is None):
+                return method(obj, *args, **kwargs)
+            _context.depth = 1
+            try:
+                result = method(obj, *args, **kwargs)
+            except Exception as e:
+                record(entity, getattr(obj, id_attribute, ""), name, args + tuple(kwargs.items()), e)
+                raise
+            finally:
+                _context.depth = 0
+            if field_change:
+                # Record the new value of the field rather than the field name alone
+                field = args[0] if args else kwargs.get("field", "")
+                record(entity, getattr(obj, id_attribute, ""), f"set_{field}", (getattr(obj, field, None),))
+            else:
+                record(entity, getattr(obj, id_attribute, ""), name, args + tuple(kwargs.items()), result)
+            return result
+        return audited
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until every queued record has been written"""
+        deadline = time.monotonic() + timeout
+        self._wake.set()
+        with self._drained:
+            while self._queue and time.monotonic() < deadline:
+                self._drained.wait(0.05)
+
+    def close(self) -> None:
+        """Uninstall the hooks, write the remaining records and stop the writer"""
+        self.uninstall()
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            stopping = self._stopping
+            self._write_pending()
+            if stopping:
+                self._write_pending()
+                return
+
+    def _write_pending(self) -> None:
+        """Drain the queue into the file in one write per batch"""
+        lines = []
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        second, prefix = None, ""
+        try:
+            while True:
+                timestamp, actor, entity, entity_id, action, args, result = self._queue.popleft()
+                if int(timestamp) != second:
+                    second = int(timestamp)
+                    prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(second))
+                entry = {"ts": f"{prefix}.{int(timestamp % 1 * 1000000):06d}",
+                         "actor": actor, "entity": entity, "id": entity_id, "action": action}
+                if args:
+                    entry["args"] = [_compact(arg) for arg in args]
+                if isinstance(result, Exception):
+                    entry["error"] = _compact(f"{type(result).__name__}: {result}")
+                elif result is not None:
+                    entry["result"] = _compact(result)
+                lines.append(encode(entry))
+        except IndexError:
+            pass
+
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            lines.append(encode({"ts": time.strftime('%Y-%m-%dT%H:%M:%S'), "actor": "audit",
+                                 "entity": "audit", "id": "", "action": "dropped", "args": [str(dropped)]}))
+        with self._drained:
+            self._drained.notify_all()
+        if not lines:
+            return
+
+        data = "\n".join(lines) + "\n"
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data.encode('utf-8'))
+        self.written += len(lines)
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        """Rename audit.log -> audit.log.1 -> audit.log.2 ..., dropping the oldest"""
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = 0
+
+
+def install_default(path: str = "audit.log", actor: Optional[str] = None) -> AuditLog:
+    """Create an AuditLog and hook Hospital, Patient, Doctor and Appointment"""
+    from appointment import Appointment
+    from doctor import Doctor
+    from hospital import Hospital
+    from patient import Patient
+
+    audit = AuditLog(path)
+    audit.install(Hospital, Patient, Doctor, Appointment)
+    if actor:
+        set_actor(actor)
+    return audit
+
+
+def benchmark(mutations: int = 200000) -> None:
+    """Measure the latency added to each mutation and the writer's throughput"""
+    import tempfile
+    from patient import Patient
+
+    patient = Patient("Audit Benchmark", 40, "Female", "555-0000")
+    started = time.perf_counter()
+    for i in range(mutations):
+        patient.update_medical_history(f"Condition {i}")
+    plain = (time.perf_counter() - started) / mutations
+
+    directory = tempfile.mkdtemp(prefix="audit_")
+    audit = AuditLog(os.path.join(directory, "audit.log"), max_bytes=5 * 1024 * 1024)
+    audit.install(Patient)
+    patient = Patient("Audit Benchmark", 40, "Female", "555-0000")
+    with acting_as("benchmark"):
+        started = time.perf_counter()
+        for i in range(mutations):
+            patient.update_medical_history(f"Condition {i}")
+        audited = (time.perf_counter() - started) / mutations
+    started = time.perf_counter()
+    audit.close()
+    drain = time.perf_counter() - started
+
+    print(f"Per mutation: {plain * 1e6:.2f}us plain, {audited * 1e6:.2f}us audited "
+          f"(+{(audited - plain) * 1e6:.2f}us)")
+    print(f"Wrote {audit.written} records ({audit.dropped} dropped), final drain {drain:.2f}s, "
+          f"files: {sorted(os.listdir(directory))}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,91 @@
+"""
+Background Worker for Hospital Management System
+Runs disk I/O and expensive queries on a worker thread and hands results back to the caller's thread.
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class BackgroundWorker:
+    def __init__(self, error_callback: Callable[[Exception], None], name: str = "hospital-worker"):
+        """
+        Initialize and start a background worker thread
+
+        Args:
+            error_callback: Called (on the thread that calls poll()) with the exception
+                            of any task submitted without its own error_callback
+            name: Thread name, shown in debuggers and tracebacks
+        """
+        self._error_callback = error_callback
+        self._tasks: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._results: "queue.Queue[Tuple[Optional[Callable], Any]]" = queue.Queue()
+        self._pending: Dict[str, Tuple[Callable, tuple, Optional[Callable], Optional[Callable]]] = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable, *args, callback: Optional[Callable[[Any], None]] = None,
+               error_callback: Optional[Callable[[Exception], None]] = None,
+               key: Optional[str] = None) -> None:
+        """
+        Queue func(*args) to run on the worker thread
+
+        Args:
+            func: Function to run in the background
+            callback: Called with the result on the thread that calls poll()
+            error_callback: Called with the exception if func raises
+                            (the worker's error_callback if not given)
+            key: Coalescing key; a task still waiting under the same key is
+                 replaced, so a burst of submissions runs only the latest one
+        """
+        with self._lock:
+            if key is None:
+                self._counter += 1
+                key = f"task-{self._counter}"
+            already_queued = key in self._pending
+            self._pending[key] = (func, args, callback, error_callback)
+        if not already_queued:
+            self._tasks.put(key)
+
+    def poll(self) -> int:
+        """
+        Deliver finished results to their callbacks
+
+        Call this from the thread that owns the UI (e.g. via root.after).
+
+        Returns:
+            Number of results delivered
+        """
+        delivered = 0
+        while True:
+            try:
+                callback, value = self._results.get_nowait()
+            except queue.Empty:
+                return delivered
+            if callback is not None:
+                callback(value)
+            delivered += 1
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Finish the queued tasks and stop the worker thread"""
+        self._tasks.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            key = self._tasks.get()
+            if key is None:
+                return
+
+            with self._lock:
+                func, args, callback, error_callback = self._pending.pop(key)
+
+            try:
+                result = func(*args)
+            except Exception as e:
+                self._results.put((error_callback or self._error_callback, e))
+            else:
+                self._results.put((callback, result))
@@ -0,0 +1,178 @@
+"""
+Billing for Hospital Management System
+Closes a billing period by invoicing every completed appointment in it and streaming the invoices to disk.
+"""
+
+import csv
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+from appointment import AppointmentStatus
+from time_utils import format_date, parse_date
+
+INVOICE_FIELDS = ("invoice_id", "appointment_id", "patient_id", "doctor_id", "date", "time_slot",
+                  "consultation_fee", "appointment_cost", "amount")
+
+FORMATS = ("csv", "jsonl")
+
+
+class BillingEngine:
+    def __init__(self, hospital, output_dir: str = "invoices", batch_size: int = 10000):
+        """
+        Initialize billing for a hospital
+
+        Args:
+            hospital: Hospital whose appointments are billed
+            output_dir: Directory invoice files are written to
+            batch_size: Invoices buffered before each write
+        """
+        self.hospital = hospital
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+
+    def invoice_rows(self, start_date: str, end_date: str) -> Iterator[Tuple]:
+        """
+        Invoice rows (in INVOICE_FIELDS order) for completed appointments in a period
+
+        Doctor fees are looked up once per run and joined in the same pass
+        over the hospital's date-range query, so no appointment outside the
+        period is touched. An appointment's own cost is billed when set, otherwise
+        the doctor's consultation fee.
+
+        Args:
+            start_date: First date of the period (YYYY-MM-DD), inclusive
+            end_date: Last date of the period (YYYY-MM-DD), inclusive
+        """
+        fees = {doctor_id: doctor.consultation_fee for doctor_id, doctor in list(self.hospital.doctors.items())}
+        completed = AppointmentStatus.COMPLETED
+
+        for appointment in self.hospital.get_appointments_between(start_date, end_date):
+            if appointment.status is not completed:
+                continue
+            appointment_id = appointment.appointment_id
+            fee = fees.get(appointment.doctor_id, 0.0)
+            cost = appointment.cost
+            yield ("INV-" + appointment_id, appointment_id, appointment.patient_id, appointment.doctor_id,
+                   appointment.date, appointment.time_slot, fee, cost, round(cost if cost > 0 else fee, 2))
+
+    def invoices(self, start_date: str, end_date: str) -> Iterator[Dict]:
+        """Invoices for a period as dictionaries"""
+        for row in self.invoice_rows(start_date, end_date):
+            yield dict(zip(INVOICE_FIELDS, row))
+
+    def period_path(self, start_date: str, end_date: str, fmt: str = "csv") -> str:
+        """File a period's invoices are written to"""
+        return os.path.join(self.output_dir, f"invoices_{start_date}_{end_date}.{fmt}")
+
+    def close_period(self, start_date: str, end_date: str, fmt: str = "csv") -> Dict:
+        """
+        Write the invoices for a billing period
+
+        Invoice IDs are derived from the appointment alone (one appointment
+        keeps its invoice ID even in overlapping periods), and the file
+        is written to a temporary name and then swapped into place, so
+        re-running a period replaces its invoices instead of duplicating them
+        and an interrupted run never leaves a partial file behind.
+
+        Args:
+            start_date: First date of the period (YYYY-MM-DD), inclusive
+            end_date: Last date of the period (YYYY-MM-DD), inclusive
+            fmt: "csv" or "jsonl"
+
+        Returns:
+            Summary with the file path, invoice count and total amount
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported invoice format: {fmt}")
+        if parse_date(end_date) < parse_date(start_date):
+            raise ValueError("End date must not be before start date")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = self.period_path(start_date, end_date, fmt)
+        temp_path = path + ".tmp"
+        count, total = 0, 0.0
+
+        try:
+            with open(temp_path, 'w', newline='') as f:
+                if fmt == "csv":
+                    writer = csv.writer(f)
+                    writer.writerow(INVOICE_FIELDS)
+                    write_batch = writer.writerows
+                else:
+                    encode = json.JSONEncoder().encode
+                    def write_batch(rows):
+                        f.write("".join(encode(dict(zip(INVOICE_FIELDS, row))) + "\n" for row in rows))
+
+                batch: List[Tuple] = []
+                for row in self.invoice_rows(start_date, end_date):
+                    batch.append(row)
+                    total += row[-1]
+                    if len(batch) >= self.batch_size:
+                        write_batch(batch)
+                        count += len(batch)
+                        batch = []
+                write_batch(batch)
+                count += len(batch)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return {'path': path, 'invoices': count, 'total': round(total, 2),
+                'start_date': start_date, 'end_date': end_date}
+
+    def close_month(self, year: int, month: int, fmt: str = "csv") -> Dict:
+        """Close the billing period covering one calendar month"""
+        first = parse_date(f"{year:04d}-{month:02d}-01")
+        following = parse_date(f"{year + month // 12:04d}-{month % 12 + 1:02d}-01")
+        return self.close_period(format_date(first), format_date(following - 1), fmt)
+
+
+def benchmark(appointments: int = 1000000, output_dir: Optional[str] = None) -> None:
+    """Time closing one period of a million appointments in both formats"""
+    import random
+    import tempfile
+    import time
+    from appointment import Appointment
+    from hospital import Hospital
+
+    hospital = Hospital()
+    rng = random.Random(11)
+    doctor_ids = []
+    for i in range(100):
+        doctor_id = hospital.add_doctor(f"Doctor {i}", "General", f"555-{i:04d}", "General Medicine")
+        hospital.doctors[doctor_id].set_consultation_fee(float(50 + i))
+        doctor_ids.append(doctor_id)
+
+    first = parse_date("2030-01-01")
+    statuses = [AppointmentStatus.COMPLETED] * 8 + [AppointmentStatus.CANCELLED, AppointmentStatus.NO_SHOW]
+    started = time.perf_counter()
+    per_day = appointments // 28
+    for i in range(appointments):
+        # Generated in date order so tracking appends to the end of the schedule index
+        appointment = Appointment(f"P{i % 20000}", rng.choice(doctor_ids),
+                                  format_date(first + min(i // per_day, 27)), "09:00-09:20",
+                                  status=rng.choice(statuses))
+        if i % 3 == 0:
+            appointment.cost = 120.0
+        hospital.appointments[appointment.appointment_id] = appointment
+        hospital._track_appointment(appointment)
+    print(f"Generated {appointments} appointments: {time.perf_counter() - started:.1f}s")
+
+    output_dir = output_dir or tempfile.mkdtemp(prefix="invoices_")
+    billing = BillingEngine(hospital, output_dir)
+    for fmt in FORMATS:
+        started = time.perf_counter()
+        summary = billing.close_month(2030, 1, fmt)
+        elapsed = time.perf_counter() - started
+        print(f"{fmt}: {summary['invoices']} invoices, ${summary['total']:,.2f} in {elapsed:.2f}s "
+              f"({appointments / elapsed * 60:,.0f} appointments/minute) -> {summary['path']}")
+
+    again = billing.close_month(2030, 1, "csv")
+    assert again['invoices'] == summary['invoices'] and again['total'] == summary['total']
+    print("Re-running the period produced the same invoices")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,224 @@
+"""
+Booking Engine for Hospital Management System
+Books appointments against a (doctor, date, time) occupancy index and the doctor's schedule in one step.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+from appointment import Appointment, AppointmentStatus
+from time_utils import parse_date, parse_time_slot
+
+# Statuses that no longer hold on to their time slot
+RELEASED_STATUSES = (AppointmentStatus.CANCELLED,)
+
+
+class BookingEngine:
+    def __init__(self, hospital):
+        """
+        Initialize the booking engine for a hospital
+
+        Args:
+            hospital: Hospital whose patients, doctors and appointments are booked
+        """
+        self.hospital = hospital
+        self._lock = threading.RLock()
+        self._occupancy: Dict[Tuple[str, int, int], str] = {}  # (doctor_id, day, minute) -> appointment_id
+        self._keys: Dict[str, Tuple[str, int, int]] = {}  # appointment_id -> occupancy key
+        self._slots: Dict[str, Tuple[str, str]] = {}  # appointment_id -> (date, schedule slot id)
+
+    def book(self, patient_id: str, doctor_id: str, date: str, time_slot: str) -> Appointment:
+        """
+        Create an appointment if the doctor is free and has capacity
+
+        The occupancy index, the doctor's schedule slot and the hospital's
+        appointment table are all updated under one lock, so concurrent
+        bookings can never overbook a time or a slot.
+
+        Returns:
+            The new Appointment
+        """
+        with self._lock:
+            patient = self.hospital.patients.get(patient_id)
+            if patient is None:
+                raise Exception("Patient not found")
+            doctor = self.hospital.doctors.get(doctor_id)
+            if doctor is None:
+                raise Exception("Doctor not found")
+
+            appointment = Appointment(patient_id, doctor_id, date, time_slot)
+            self._place(appointment)
+
+            doctor.add_patient(patient_id)
+            patient.add_appointment(appointment.appointment_id)
+            self.hospital.appointments[appointment.appointment_id] = appointment
+            self.hospital._track_appointment(appointment)
+
+        return appointment
+
+    def is_available(self, doctor_id: str, date: str, time_slot: str) -> bool:
+        """Check whether a doctor has no appointment starting at a date and time"""
+        key = (doctor_id, parse_date(date), parse_time_slot(time_slot)[0])
+        return key not in self._occupancy
+
+    def free_seats(self, doctor, date: str) -> List[int]:
+        """
+        Free start minutes in a doctor's schedule slots on a date, in slot order
+
+        A slot with capacity n and length L offers n seats spaced L // n
+        minutes apart, so each booking gets its own start time; a seat is
+        free if no appointment starts there yet.
+        """
+        day = parse_date(date)
+        minutes = []
+        for slot in doctor.get_schedule(date):
+            free = slot['max_patients'] - slot['current_patients']
+            step = max(1, (slot['end_minute'] - slot['start_minute']) // max(1, slot['max_patients']))
+            minute = slot['start_minute']
+            while free > 0 and minute < slot['end_minute']:
+                if (doctor.doctor_id, day, minute) not in self._occupancy:
+                    minutes.append(minute)
+                    free -= 1
+                minute += step
+        return minutes
+
+    def register(self, appointment: Appointment) -> bool:
+        """
+        Add an existing appointment (e.g. loaded from disk) to the occupancy index
+
+        Returns:
+            False if its time is already taken by another appointment or its slot is full
+        """
+        if appointment.status in RELEASED_STATUSES:
+            return True
+        with self._lock:
+            try:
+                self._place(appointment)
+            except Exception:
+                return False
+            return True
+
+    def release(self, appointment: Appointment) -> None:
+        """Free the time and schedule slot held by an appointment"""
+        with self._lock:
+            key = self._keys.pop(appointment.appointment_id, None)
+            if key is not None and self._occupancy.get(key) == appointment.appointment_id:
+                del self._occupancy[key]
+
+            booked_slot = self._slots.pop(appointment.appointment_id, None)
+            doctor = self.hospital.doctors.get(appointment.doctor_id)
+            if booked_slot is not None and doctor is not None:
+                date, slot_id = booked_slot
+                doctor.cancel_appointment(date, slot_id, appointment.patient_id)
+
+    def remove(self, appointment_id: str) -> Optional[Appointment]:
+        """
+        Release an appointment and drop it from the hospital
+
+        Runs under the booking lock because book() inserts into the same
+        schedule index and appointment table.
+
+        Returns:
+            The removed Appointment, or None if there was none with that ID
+        """
+        with self._lock:
+            appointment = self.hospital.appointments.get(appointment_id)
+            if appointment is None:
+                return None
+            self.release(appointment)
+            self.hospital._untrack_appointment(appointment_id)
+            del self.hospital.appointments[appointment_id]
+            return appointment
+
+    def reschedule(self, appointment: Appointment, new_date: str, new_time_slot: str) -> str:
+        """Move an appointment only if the new time is free and its schedule slot has room"""
+        with self._lock:
+            # The appointment reports the move to sync, which rejects it (and the move is undone) if it does not fit
+            return appointment.reschedule(new_date, new_time_slot)
+
+    def sync(self, appointment: Appointment) -> None:
+        """
+        Bring the index in line after an appointment's date, time or status changed
+
+        Raises an exception, leaving the index as it was, if the appointment's
+        new time is taken or its schedule slot is full. The hospital's schedule
+        index is moved under the same lock, since book() inserts into it too.
+        """
+        with self._lock:
+            if self.hospital.appointments.get(appointment.appointment_id) is not appointment:
+                return  # Removed while the change was waiting for the lock
+            if appointment.status in RELEASED_STATUSES:
+                self.release(appointment)
+            else:
+                key = (appointment.doctor_id, appointment.day, appointment.start_minute)
+                if self._keys.get(appointment.appointment_id) != key:
+                    self._place(appointment)
+            entry = (appointment.day, appointment.start_minute, appointment.appointment_id)
+            if self.hospital._schedule_keys.get(appointment.appointment_id) != entry:
+                self.hospital._untrack_appointment(appointment.appointment_id)
+                self.hospital._track_appointment(appointment)
+
+    def _check(self, appointment: Appointment) -> Tuple[Tuple[str, int, int], Optional[Dict]]:
+        """
+        Occupancy key and schedule slot for an appointment's current date and time
+
+        Raises an exception if another appointment has that time, or if the
+        doctor is scheduled that day but has no room for it.
+        """
+        key = (appointment.doctor_id, appointment.day, appointment.start_minute)
+        holder = self._occupancy.get(key)
+        if holder is not None and holder != appointment.appointment_id:
+            raise Exception(f"Doctor already has an appointment on {appointment.date} at {appointment.time_slot}")
+
+        doctor = self.hospital.doctors.get(appointment.doctor_id)
+        if doctor is None or not doctor.get_schedule(appointment.date):
+            return key, None
+        slot = self._find_slot(doctor, appointment.date, appointment.start_minute)
+        if slot is None:
+            raise Exception(f"Doctor is not scheduled on {appointment.date} at {appointment.time_slot}")
+        # Moving within the slot it already holds needs no extra room
+        if self._slots.get(appointment.appointment_id) != (appointment.date, slot['id']):
+            if slot['current_patients'] >= slot['max_patients']:
+                raise Exception("This time slot is fully booked")
+            if appointment.patient_id in slot['booked_patients']:
+                raise Exception("Patient already has an appointment in this slot")
+        return key, slot
+
+    def _place(self, appointment: Appointment) -> None:
+        """
+        Hold the time and schedule slot of an appointment's current date and time,
+        giving up the ones it held before
+
+        Everything that can fail happens before anything is changed: the new
+        slot is booked first, and only then is the old one cancelled and the
+        occupancy key moved. If the new slot cannot be booked nothing changes.
+        """
+        appointment_id = appointment.appointment_id
+        key, slot = self._check(appointment)
+        new_slot = (appointment.date, slot['id']) if slot is not None else None
+        old_slot = self._slots.get(appointment_id)
+        doctor = self.hospital.doctors.get(appointment.doctor_id)
+
+        if new_slot != old_slot:
+            if new_slot is not None:
+                result = doctor.book_appointment(new_slot[0], new_slot[1], appointment.patient_id)
+                if not result.startswith("Appointment booked"):
+                    raise Exception(result)
+            if old_slot is not None and doctor is not None:
+                doctor.cancel_appointment(old_slot[0], old_slot[1], appointment.patient_id)
+            if new_slot is not None:
+                self._slots[appointment_id] = new_slot
+            else:
+                self._slots.pop(appointment_id, None)
+
+        old_key = self._keys.get(appointment_id)
+        if old_key is not None and self._occupancy.get(old_key) == appointment_id:
+            del self._occupancy[old_key]
+        self._occupancy[key] = appointment_id
+        self._keys[appointment_id] = key
+
+    def _find_slot(self, doctor, date: str, minute: int) -> Optional[Dict]:
+        """Schedule slot of a doctor covering a time on a date"""
+        for slot in doctor.get_schedule(date):
+            if slot['start_minute'] <= minute < slot['end_minute']:
+                return slot
+        return None
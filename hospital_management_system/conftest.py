@@ -0,0 +1,6 @@
+"""Make the modules importable by name in tests, as they import each other that way"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -3,9 +3,12 @@ Doctor Class for Hospital Management System
 Represents a doctor with specialization, schedule, and patient management.
 """
 
-import uuid
+import gc
 from datetime import datetime, time
 from typing import List, Dict, Optional, Set
+from ids import new_id
+from time_utils import format_date, parse_date, parse_time
+from schedule_template import ScheduleTemplate
 
 
 class Doctor:
@@ -24,7 +27,7 @@ class Doctor:
             qualification: Medical qualifications
             department: Hospital department
         """
-        self.doctor_id = str(uuid.uuid4())[:8]
+        self.doctor_id = new_id()
         self.name = name
         self.specialization = specialization
         self.phone = phone
@@ -36,6 +39,8 @@ class Doctor:
         self.is_active = True
         self.patients: Set[str] = set()  # Set of patient IDs
         self.schedule: Dict[str, List[Dict]] = {}  # Schedule by date
+        self.templates: List[ScheduleTemplate] = []  # Recurring schedules, expanded on demand
+        self._expanded_dates: Set[str] = set()  # Dates the templates were already applied to
         self.consultation_fee = 0.0
         
         # Add contact property for GUI compatibility
@@ -62,6 +67,71 @@ class Doctor:
             return f"Consultation fee set to ${fee:.2f}"
         return "Consultation fee cannot be negative"
     
+    def add_schedule_template(self, template: ScheduleTemplate) -> str:
+        """Add a recurring schedule that expands into slots when a date is first used"""
+        self.templates.append(template)
+        return f"Schedule template added: {template}"
+    
+    def get_schedule(self, date: str) -> List[Dict]:
+        """Get the schedule slots for a date, expanding templates on first access"""
+        if self.templates and date not in self._expanded_dates:
+            self._expand_templates(date)
+        return self.schedule.get(date, [])
+    
+    def materialize_templates(self, start_date: str, end_date: str) -> int:
+        """
+        Expand templates for every date in a range in one sorted pass
+        
+        Returns:
+            Number of slots created
+        """
+        # Slot dicts are acyclic, so pausing the cyclic GC avoids needless collections
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            created = 0
+            for day in range(parse_date(start_date), parse_date(end_date) + 1):
+                date = format_date(day)
+                if date not in self._expanded_dates:
+                    created += self._expand_templates(date, day)
+            return created
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    
+    def _expand_templates(self, date: str, day: Optional[int] = None) -> int:
+        """Merge template slots for a date into the schedule, skipping overlaps"""
+        self._expanded_dates.add(date)
+        day = parse_date(date) if day is None else day
+        new_slots = [slot for template in self.templates for slot in template.expand(day)]
+        if not new_slots:
+            return 0
+        
+        slots = self.schedule.get(date)
+        if not slots and len(self.templates) == 1:
+            # Common case: one template, nothing scheduled by hand
+            self.schedule[date] = new_slots
+            return len(new_slots)
+        
+        slots = slots or []
+        new_slots.sort(key=lambda x: x['start_minute'])
+        merged = []
+        existing = 0
+        for slot in new_slots:
+            # Existing slots win over template slots that overlap them
+            while existing < len(slots) and slots[existing]['end_minute'] <= slot['start_minute']:
+                merged.append(slots[existing])
+                existing += 1
+            if existing < len(slots) and slots[existing]['start_minute'] < slot['end_minute']:
+                continue
+            if merged and merged[-1]['end_minute'] > slot['start_minute']:
+                continue
+            merged.append(slot)
+        merged.extend(slots[existing:])
+        
+        self.schedule[date] = merged
+        return len(merged) - len(slots)
+    
     def add_schedule_slot(self, date: str, start_time: str, end_time: str, 
                           max_patients: int = 10) -> str:
         """
@@ -73,30 +143,48 @@ class Doctor:
             end_time: End time in HH:MM format
             max_patients: Maximum number of patients for this slot
         """
-        if date not in self.schedule:
-            self.schedule[date] = []
+        try:
+            parse_date(date)
+            start_minute = parse_time(start_time)
+            end_minute = parse_time(end_time)
+        except ValueError as e:
+            return str(e)
         
-        # Check for overlapping slots
-        for slot in self.schedule[date]:
-            if (start_time < slot['end_time'] and end_time > slot['start_time']):
-                return f"Time slot conflicts with existing schedule: {slot['start_time']}-{slot['end_time']}"
+        if end_minute <= start_minute:
+            return "End time must be after start time"
+        
+        slots = self.get_schedule(date)
+        
+        # Slots are kept sorted, so binary search for the insert position
+        # and only the neighbours on either side can overlap
+        position, high = 0, len(slots)
+        while position < high:
+            middle = (position + high) // 2
+            if slots[middle]['start_minute'] < start_minute:
+                position = middle + 1
+            else:
+                high = middle
+        for neighbour in slots[max(0, position - 1):position + 1]:
+            if start_minute < neighbour['end_minute'] and end_minute > neighbour['start_minute']:
+                return f"Time slot conflicts with existing schedule: {neighbour['start_time']}-{neighbour['end_time']}"
         
         slot = {
-            'id': str(uuid.uuid4())[:8],
+            'id': new_id(),
             'start_time': start_time,
             'end_time': end_time,
+            'start_minute': start_minute,
+            'end_minute': end_minute,
             'max_patients': max_patients,
             'current_patients': 0,
             'booked_patients': []
         }
         
-        self.schedule[date].append(slot)
-        self.schedule[date].sort(key=lambda x: x['start_time'])
+        self.schedule.setdefault(date, slots).insert(position, slot)
         return f"Schedule slot added: {date} {start_time}-{end_time}"
     
     def remove_schedule_slot(self, date: str, slot_id: str) -> str:
         """Remove a schedule slot"""
-        if date in self.schedule:
+        if self.get_schedule(date):
             for i, slot in enumerate(self.schedule[date]):
                 if slot['id'] == slot_id:
                     if slot['current_patients'] > 0:
@@ -109,7 +197,7 @@ class Doctor:
     
     def book_appointment(self, date: str, slot_id: str, patient_id: str) -> str:
         """Book an appointment in a schedule slot"""
-        if date not in self.schedule:
+        if not self.get_schedule(date):
             return f"No schedule available for {date}"
         
         for slot in self.schedule[date]:
@@ -129,7 +217,7 @@ class Doctor:
     
     def cancel_appointment(self, date: str, slot_id: str, patient_id: str) -> str:
         """Cancel an appointment"""
-        if date not in self.schedule:
+        if not self.get_schedule(date):
             return f"No schedule available for {date}"
         
         for slot in self.schedule[date]:
@@ -144,11 +232,8 @@ class Doctor:
     
     def get_available_slots(self, date: str) -> List[Dict]:
         """Get available schedule slots for a specific date"""
-        if date not in self.schedule:
-            return []
-        
         available_slots = []
-        for slot in self.schedule[date]:
+        for slot in self.get_schedule(date):
             if slot['current_patients'] < slot['max_patients']:
                 available_slots.append({
                     'slot_id': slot['id'],
@@ -0,0 +1,182 @@
+"""
+Hospital Federation for Hospital Management System
+Runs several hospital sites side by side, each with its own data directory, and answers network-wide queries.
+"""
+
+import heapq
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+from hospital import Hospital
+from patient import Patient
+
+T = TypeVar("T")
+
+
+class HospitalFederation:
+    def __init__(self, data_root: str = "sites", max_workers: int = 8):
+        """
+        Initialize an empty federation
+
+        Args:
+            data_root: Directory under which each site gets its own data directory
+            max_workers: Number of threads used to query sites in parallel
+        """
+        self.data_root = data_root
+        self.sites: Dict[str, Hospital] = {}
+        self.last_errors: Dict[str, Exception] = {}  # Sites that failed during the last fan-out
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="federation")
+
+    def add_site(self, hospital_id: str, name: str, address: str = "", phone: str = "",
+                 email: str = "") -> Hospital:
+        """
+        Create a hospital site with its own storage partition
+
+        Returns:
+            The new Hospital, storing its data in data_root/hospital_id
+        """
+        if hospital_id in self.sites:
+            raise Exception(f"Site {hospital_id} already exists")
+        hospital = Hospital(name, address, phone, email, hospital_id=hospital_id,
+                            data_dir=os.path.join(self.data_root, hospital_id))
+        self.sites[hospital_id] = hospital
+        return hospital
+
+    def remove_site(self, hospital_id: str) -> str:
+        """Stop including a site in network queries (its data files are kept)"""
+        if self.sites.pop(hospital_id, None) is None:
+            return "Site not found"
+        return f"Site {hospital_id} removed from federation"
+
+    def get_site(self, hospital_id: str) -> Optional[Hospital]:
+        """Get a site by hospital ID"""
+        return self.sites.get(hospital_id)
+
+    def _fan_out(self, query: Callable[[Hospital], T]) -> Dict[str, T]:
+        """
+        Run a query against every site in parallel
+
+        A site that raises is left out of the results and recorded in
+        last_errors, so one failing site does not block the network.
+        """
+        futures = {hospital_id: self._executor.submit(query, hospital)
+                   for hospital_id, hospital in list(self.sites.items())}
+        results: Dict[str, T] = {}
+        self.last_errors = {}
+        for hospital_id, future in futures.items():
+            try:
+                results[hospital_id] = future.result()
+            except Exception as e:
+                self.last_errors[hospital_id] = e
+        return results
+
+    def load_all(self) -> None:
+        """Load every site's data from its own directory; sites that fail are listed in last_errors"""
+        self._fan_out(lambda hospital: hospital.load_data(raise_errors=True))
+
+    def save_all(self) -> None:
+        """Save every site's data to its own directory; sites that fail are listed in last_errors"""
+        self._fan_out(lambda hospital: hospital.save_data(raise_errors=True))
+
+    def find_patient(self, query: str, limit: int = 10) -> List[Tuple[str, Patient]]:
+        """
+        Search patients on every site
+
+        Each site returns its best matches already ranked, and the ranked
+        lists are k-way merged so only the overall top results are kept.
+
+        Returns:
+            (hospital_id, Patient) pairs, best match first
+        """
+        ranked = self._fan_out(lambda hospital: hospital.search_scored(query, "patient", limit))
+        streams = [[(score, hospital_id, patient) for score, patient in results]
+                   for hospital_id, results in ranked.items()]
+        merged = heapq.merge(*streams, key=lambda item: -item[0])
+        return [(hospital_id, patient) for _, hospital_id, patient in itertools.islice(merged, limit)]
+
+    def find_patient_by_id(self, patient_id: str) -> List[Tuple[str, Patient]]:
+        """Sites holding a patient ID, with the matching record"""
+        found = self._fan_out(lambda hospital: hospital.get_patient(patient_id))
+        return [(hospital_id, patient) for hospital_id, patient in found.items() if patient is not None]
+
+    def earliest_availability(self, start_date: str, days: int = 14, specialization: str = "",
+                              department: str = "", limit: int = 10) -> List[Dict]:
+        """
+        Earliest free appointment times across the network
+
+        Args:
+            start_date: First date to search (YYYY-MM-DD)
+            days: Number of days to search
+            specialization: Only doctors with this specialization
+            department: Only doctors in this department
+            limit: Maximum number of times returned
+
+        Returns:
+            Dicts as from Hospital.get_available_slots plus hospital_id, earliest first
+        """
+        available = self._fan_out(lambda hospital: hospital.get_available_slots(
+            start_date, days, specialization, department, limit))
+        streams = [[dict(slot, hospital_id=hospital_id) for slot in slots]
+                   for hospital_id, slots in available.items()]
+        merged = heapq.merge(*streams, key=lambda slot: (slot['date'], slot['time']))
+        return list(itertools.islice(merged, limit))
+
+    def get_network_statistics(self) -> Dict:
+        """Per-site and total counts of patients, doctors and appointments"""
+        per_site = self._fan_out(lambda hospital: {'name': hospital.name,
+                                                   'total_patients': len(hospital.patients),
+                                                   'total_doctors': len(hospital.doctors),
+                                                   'total_appointments': len(hospital.appointments)})
+        totals = {key: sum(stats[key] for stats in per_site.values())
+                  for key in ('total_patients', 'total_doctors', 'total_appointments')}
+        return {'sites': per_site, **totals}
+
+    def close(self) -> None:
+        """Shut down the query threads"""
+        self._executor.shutdown(wait=True)
+
+    def __len__(self) -> int:
+        return len(self.sites)
+
+    def __str__(self) -> str:
+        return f"Hospital Federation - {len(self.sites)} sites"
+
+
+def benchmark(sites: int = 8, doctors: int = 100, patients: int = 5000) -> None:
+    """Time network-wide patient search and availability queries"""
+    import tempfile
+    import time
+    from schedule_template import ScheduleTemplate
+
+    federation = HospitalFederation(tempfile.mkdtemp(prefix="federation_"))
+    for site in range(sites):
+        hospital = federation.add_site(f"HMS{site + 1:03d}", f"Hospital {site + 1}")
+        for i in range(doctors):
+            doctor_id = hospital.add_doctor(f"Doctor {site}-{i}", "General", f"555-{site}{i:04d}",
+                                            hospital.departments[i % len(hospital.departments)])
+            hospital.doctors[doctor_id].add_schedule_template(
+                ScheduleTemplate("Mon-Fri", f"{8 + (i + site) % 6:02d}:00", "17:00", 20, 1))
+        for i in range(patients):
+            hospital.add_patient(f"Patient {site}-{i}", 20 + i % 60, "Female", f"555-{site}{i:05d}")
+
+    started = time.perf_counter()
+    for _ in range(20):
+        matches = federation.find_patient("patient 3-12", limit=10)
+    print(f"Patient search over {sites} sites: {(time.perf_counter() - started) / 20 * 1000:.1f}ms "
+          f"(best match {matches[0][0]}: {matches[0][1].name})")
+
+    started = time.perf_counter()
+    slots = federation.earliest_availability("2030-01-07", days=5, department="Cardiology", limit=5)
+    print(f"Earliest availability over {sites} sites: {(time.perf_counter() - started) * 1000:.1f}ms")
+    for slot in slots:
+        print(f"  {slot['hospital_id']} {slot['date']} {slot['time']} Dr. {slot['doctor_name']}")
+
+    started = time.perf_counter()
+    federation.save_all()
+    print(f"Saved {sites} partitions under {federation.data_root}: {time.perf_counter() - started:.2f}s")
+    federation.close()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -3,17 +3,23 @@ Hospital Class for Hospital Management System
 Main class that manages all hospital operations including patients, doctors, and appointments.
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from patient import Patient
 from doctor import Doctor
 from appointment import Appointment, AppointmentStatus
+from search_index import SearchIndex
+from booking import BookingEngine
+from time_utils import MINUTES_PER_DAY, format_date, format_time, parse_date, parse_time, today, week_bounds
+import bisect
+import heapq
 import json
 import os
 
 
 class Hospital:
-    def __init__(self, name: str = "General Hospital", address: str = "", phone: str = "", email: str = ""):
+    def __init__(self, name: str = "General Hospital", address: str = "", phone: str = "", email: str = "",
+                 hospital_id: str = "HMS001", data_dir: str = ""):
         """
         Initialize a new hospital
         
@@ -22,8 +28,11 @@ class Hospital:
             address: Hospital address
             phone: Contact phone number
             email: Contact email
+            hospital_id: Site ID, unique within a federation
+            data_dir: Directory holding this hospital's JSON files (current directory by default)
         """
-        self.hospital_id = "HMS001"  # Simple ID for demo
+        self.hospital_id = hospital_id
+        self.data_dir = data_dir
         self.name = name
         self.address = address
         self.phone = phone
@@ -38,6 +47,41 @@ class Hospital:
             "Cardiology", "Neurology", "Orthopedics", "Pediatrics", 
             "General Medicine", "Surgery", "Emergency", "Radiology"
         ]
+        
+        # Change-notification feed (entity, action, entity_id)
+        self._listeners: List[Callable[[str, str, str], None]] = []
+        
+        # Full-text search indexes
+        self._patient_index = SearchIndex()
+        self._doctor_index = SearchIndex()
+        
+        # Appointments sorted by (day number, start minute, appointment_id) for range queries
+        self._schedule_index: List[Tuple[int, int, str]] = []
+        self._schedule_keys: Dict[str, Tuple[int, int, str]] = {}
+        
+        # Conflict-checked booking shared by every booking path
+        self.booking = BookingEngine(self)
+    
+    def subscribe(self, listener: Callable[[str, str, str], None]) -> None:
+        """
+        Register a callback for data changes
+        
+        The callback receives (entity, action, entity_id) where entity is
+        "patient", "doctor" or "appointment" and action is "added",
+        "updated" or "removed".
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+    
+    def unsubscribe(self, listener: Callable[[str, str, str], None]) -> None:
+        """Remove a previously registered change callback"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, entity: str, action: str, entity_id: str) -> None:
+        """Send a change notification to all subscribers"""
+        for listener in list(self._listeners):
+            listener(entity, action, entity_id)
     
     def add_patient(self, name: str, age: int, gender: str, contact: str) -> str:
         """
@@ -49,9 +93,12 @@ class Hospital:
         try:
             patient = Patient(name, age, gender, contact)
             self.patients[patient.patient_id] = patient
-            return patient.patient_id
+            self._index_patient(patient)
         except Exception as e:
             raise Exception(f"Error adding patient: {str(e)}")
+        
+        self._notify("patient", "added", patient.patient_id)
+        return patient.patient_id
     
     def add_doctor(self, name: str, specialization: str, contact: str, department: str) -> str:
         """
@@ -61,11 +108,14 @@ class Hospital:
             doctor_id
         """
         try:
-            doctor = Doctor(name, specialization, contact, department)
+            doctor = Doctor(name, specialization, contact, department=department)
             self.doctors[doctor.doctor_id] = doctor
-            return doctor.doctor_id
+            self._index_doctor(doctor)
         except Exception as e:
             raise Exception(f"Error adding doctor: {str(e)}")
+        
+        self._notify("doctor", "added", doctor.doctor_id)
+        return doctor.doctor_id
     
     def book_appointment(self, patient_id: str, doctor_id: str, date: str, time: str) -> str:
         """
@@ -74,18 +124,168 @@ class Hospital:
         Returns:
             appointment_id
         """
-        # Validate patient and doctor exist
-        if patient_id not in self.patients:
-            raise Exception("Patient not found")
-        if doctor_id not in self.doctors:
-            raise Exception("Doctor not found")
-        
         try:
-            appointment = Appointment(patient_id, doctor_id, date, time)
-            self.appointments[appointment.appointment_id] = appointment
-            return appointment.appointment_id
-        except Exception as e:
+            appointment = self.booking.book(patient_id, doctor_id, date, time)
+        except ValueError as e:
             raise Exception(f"Error booking appointment: {str(e)}")
+        
+        self._notify("appointment", "added", appointment.appointment_id)
+        return appointment.appointment_id
+    
+    def update_medical_history(self, patient_id: str, new_condition: str) -> str:
+        """Append to a patient's medical history and keep it searchable"""
+        patient = self.patients.get(patient_id)
+        if patient is None:
+            return "Patient not found"
+        
+        result = patient.update_medical_history(new_condition)
+        self._patient_index.extend(patient_id, [(new_condition, 1.0)])
+        self._notify("patient", "updated", patient_id)
+        return result
+    
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 10) -> List:
+        """
+        Search patients and doctors by name, contact, specialization or medical history
+        
+        Matches whole words, word prefixes and single-character typos.
+        
+        Args:
+            query: Free-text query, e.g. "jon smi" or "555-01"
+            kind: "patient" or "doctor" to restrict results, None for both
+            limit: Maximum number of results
+        
+        Returns:
+            Matching Patient and Doctor objects, best match first
+        """
+        return [record for _, record in self.search_scored(query, kind, limit)]
+    
+    def search_scored(self, query: str, kind: Optional[str] = None, limit: int = 10) -> List[Tuple[float, object]]:
+        """Same as search, but returns (score, record) pairs so results from several sites can be merged"""
+        # Runs on a worker thread, so a record may be removed between the index search and the lookup
+        results = []
+        if kind in (None, "patient"):
+            for key, score in self._patient_index.search(query, limit):
+                patient = self.patients.get(key)
+                if patient is not None:
+                    results.append((score, patient))
+        if kind in (None, "doctor"):
+            for key, score in self._doctor_index.search(query, limit):
+                doctor = self.doctors.get(key)
+                if doctor is not None:
+                    results.append((score, doctor))
+        return heapq.nlargest(limit, results, key=lambda item: item[0])
+    
+    def _index_patient(self, patient: Patient):
+        """Add or refresh a patient in the search index"""
+        self._patient_index.add(patient.patient_id, [
+            (patient.name, 3.0),
+            (patient.contact, 2.0),
+            ("".join(ch for ch in patient.contact if ch.isdigit()), 2.0),
+            (patient.medical_history, 1.0)
+        ])
+    
+    def _index_doctor(self, doctor: Doctor):
+        """Add or refresh a doctor in the search index"""
+        self._doctor_index.add(doctor.doctor_id, [
+            (doctor.name, 3.0),
+            (doctor.contact, 2.0),
+            ("".join(ch for ch in doctor.contact if ch.isdigit()), 2.0),
+            (doctor.specialization, 2.0),
+            (doctor.department, 1.0)
+        ])
+    
+    def get_appointments_between(self, start_date: str, end_date: str, 
+                                 start_time: Optional[str] = None, 
+                                 end_time: Optional[str] = None) -> List[Appointment]:
+        """
+        Get appointments in a date range, optionally within a time-of-day window
+        
+        Args:
+            start_date: First date (YYYY-MM-DD), inclusive
+            end_date: Last date (YYYY-MM-DD), inclusive
+            start_time: Earliest start time (HH:MM), inclusive
+            end_time: Latest start time (HH:MM), exclusive
+        
+        Returns:
+            Appointments ordered by date and start time
+        """
+        first_minute = parse_time(start_time) if start_time else 0
+        last_minute = parse_time(end_time) if end_time else MINUTES_PER_DAY + 1
+        return [self.appointments[appointment_id] 
+                for _, minute, appointment_id in self._schedule_range(parse_date(start_date), parse_date(end_date))
+                if first_minute <= minute < last_minute]
+    
+    def get_available_slots(self, start_date: str, days: int = 14, specialization: str = "",
+                            department: str = "", limit: int = 10) -> List[Dict]:
+        """
+        Earliest free appointment times across all active doctors
+        
+        Free times come from BookingEngine.free_seats, the same seats the
+        assignment solver fills.
+        
+        Args:
+            start_date: First date to search (YYYY-MM-DD)
+            days: Number of days to search
+            specialization: Only doctors with this specialization
+            department: Only doctors in this department
+            limit: Maximum number of times returned
+        
+        Returns:
+            Dicts with date, time, doctor_id, doctor_name and department, earliest first
+        """
+        doctors = [doctor for doctor in list(self.doctors.values())
+                   if doctor.is_active
+                   and (not specialization or doctor.specialization.lower() == specialization.lower())
+                   and (not department or doctor.department.lower() == department.lower())]
+        
+        found = []
+        first_day = parse_date(start_date)
+        for day in range(first_day, first_day + days):
+            date = format_date(day)
+            seats = []
+            for doctor in doctors:
+                seats.extend((minute, doctor.doctor_id) for minute in self.booking.free_seats(doctor, date))
+            for minute, doctor_id in sorted(seats):
+                doctor = self.doctors[doctor_id]
+                found.append({'date': date, 'time': format_time(minute), 'doctor_id': doctor_id,
+                              'doctor_name': doctor.name, 'department': doctor.department})
+                if len(found) >= limit:
+                    return found
+        return found
+    
+    def get_appointments_this_week(self) -> List[Appointment]:
+        """Get appointments from Monday to Sunday of the current week"""
+        first_day, last_day = week_bounds(today())
+        return [self.appointments[appointment_id] 
+                for _, _, appointment_id in self._schedule_range(first_day, last_day)]
+    
+    def _schedule_range(self, first_day: int, last_day: int) -> List[Tuple[int, int, str]]:
+        """Schedule index entries between two day numbers, inclusive"""
+        start = bisect.bisect_left(self._schedule_index, (first_day,))
+        end = bisect.bisect_left(self._schedule_index, (last_day + 1,))
+        return self._schedule_index[start:end]
+    
+    def _track_appointment(self, appointment: Appointment):
+        """Add an appointment to the schedule index and watch it for reschedules"""
+        entry = (appointment.day, appointment.start_minute, appointment.appointment_id)
+        bisect.insort(self._schedule_index, entry)
+        self._schedule_keys[appointment.appointment_id] = entry
+        appointment.observer = self._on_appointment_changed
+    
+    def _untrack_appointment(self, appointment_id: str):
+        """Remove an appointment from the schedule index"""
+        entry = self._schedule_keys.pop(appointment_id, None)
+        if entry is not None:
+            del self._schedule_index[bisect.bisect_left(self._schedule_index, entry)]
+        appointment = self.appointments.get(appointment_id)
+        if appointment is not None:
+            appointment.observer = None
+    
+    def _on_appointment_changed(self, appointment: Appointment, field: str):
+        """Keep indexes in step with changes made directly on an Appointment"""
+        # Booking moves the schedule index too; it raises if the change does not fit, and the appointment then undoes it
+        self.booking.sync(appointment)
+        self._notify("appointment", "updated", appointment.appointment_id)
     
     def get_patient(self, patient_id: str) -> Optional[Patient]:
         """Get patient by ID (alias for get_patient_by_id)"""
@@ -110,84 +310,122 @@ class Hospital:
     def get_department_statistics(self) -> Dict[str, int]:
         """Get doctor count by department"""
         dept_stats = {}
-        for doctor in self.doctors.values():
+        for doctor in list(self.doctors.values()):
             dept = doctor.department
             dept_stats[dept] = dept_stats.get(dept, 0) + 1
         return dept_stats
     
-    def load_data(self):
-        """Load data from JSON files"""
+    def _data_path(self, file_name: str) -> str:
+        """Path of one of this hospital's data files"""
+        return os.path.join(self.data_dir, file_name)
+    
+    def load_data(self, raise_errors: bool = False):
+        """
+        Load data from JSON files
+        
+        Args:
+            raise_errors: Re-raise a failure instead of printing it (e.g. so a federation can record it)
+        """
         try:
             # Load patients
-            if os.path.exists('patients.json'):
-                with open('patients.json', 'r') as f:
+            if os.path.exists(self._data_path('patients.json')):
+                with open(self._data_path('patients.json'), 'r') as f:
                     patients_data = json.load(f)
                     for patient_id, data in patients_data.items():
                         patient = Patient(data['name'], data['age'], data['gender'], data['contact'])
                         patient.patient_id = patient_id
                         self.patients[patient_id] = patient
+                        self._index_patient(patient)
             
             # Load doctors
-            if os.path.exists('doctors.json'):
-                with open('doctors.json', 'r') as f:
+            if os.path.exists(self._data_path('doctors.json')):
+                with open(self._data_path('doctors.json'), 'r') as f:
                     doctors_data = json.load(f)
                     for doctor_id, data in doctors_data.items():
-                        doctor = Doctor(data['name'], data['specialization'], data['contact'], data['department'])
+                        doctor = Doctor(data['name'], data['specialization'], data['contact'], department=data['department'])
                         doctor.doctor_id = doctor_id
                         self.doctors[doctor_id] = doctor
+                        self._index_doctor(doctor)
             
             # Load appointments
-            if os.path.exists('appointments.json'):
-                with open('appointments.json', 'r') as f:
+            if os.path.exists(self._data_path('appointments.json')):
+                with open(self._data_path('appointments.json'), 'r') as f:
                     appointments_data = json.load(f)
                     for appointment_id, data in appointments_data.items():
                         appointment = Appointment(data['patient_id'], data['doctor_id'], data['date'], data['time'])
                         appointment.appointment_id = appointment_id
                         appointment.status = AppointmentStatus[data['status']]
                         self.appointments[appointment_id] = appointment
+                        self._track_appointment(appointment)
+                        self.booking.register(appointment)
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error loading data: {e}")
     
-    def save_data(self):
-        """Save data to JSON files"""
+    def export_data(self) -> Dict[str, Dict]:
+        """
+        Build a plain-dict snapshot of all records, keyed by data file path
+        
+        The snapshot shares no mutable state with the hospital, so it can be
+        written to disk from a background thread.
+        """
+        patients_data = {}
+        for patient_id, patient in list(self.patients.items()):
+            patients_data[patient_id] = {
+                'name': patient.name,
+                'age': patient.age,
+                'gender': patient.gender,
+                'contact': patient.contact
+            }
+        
+        doctors_data = {}
+        for doctor_id, doctor in list(self.doctors.items()):
+            doctors_data[doctor_id] = {
+                'name': doctor.name,
+                'specialization': doctor.specialization,
+                'contact': doctor.contact,
+                'department': doctor.department
+            }
+        
+        appointments_data = {}
+        for appointment_id, appointment in list(self.appointments.items()):
+            appointments_data[appointment_id] = {
+                'patient_id': appointment.patient_id,
+                'doctor_id': appointment.doctor_id,
+                'date': appointment.date,
+                'time': appointment.time,
+                'status': appointment.status.name
+            }
+        
+        return {
+            self._data_path('patients.json'): patients_data,
+            self._data_path('doctors.json'): doctors_data,
+            self._data_path('appointments.json'): appointments_data
+        }
+    
+    @staticmethod
+    def write_data(snapshot: Dict[str, Dict]):
+        """Write a snapshot from export_data to JSON files"""
+        for file_name, records in snapshot.items():
+            directory = os.path.dirname(file_name)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(file_name, 'w') as f:
+                json.dump(records, f, indent=2)
+    
+    def save_data(self, raise_errors: bool = False):
+        """
+        Save data to JSON files
+        
+        Args:
+            raise_errors: Re-raise a failure instead of printing it (e.g. so a federation can record it)
+        """
         try:
-            # Save patients
-            patients_data = {}
-            for patient_id, patient in self.patients.items():
-                patients_data[patient_id] = {
-                    'name': patient.name,
-                    'age': patient.age,
-                    'gender': patient.gender,
-                    'contact': patient.contact
-                }
-            with open('patients.json', 'w') as f:
-                json.dump(patients_data, f, indent=2)
-            
-            # Save doctors
-            doctors_data = {}
-            for doctor_id, doctor in self.doctors.items():
-                doctors_data[doctor_id] = {
-                    'name': doctor.name,
-                    'specialization': doctor.specialization,
-                    'contact': doctor.contact,
-                    'department': doctor.department
-                }
-            with open('doctors.json', 'w') as f:
-                json.dump(doctors_data, f, indent=2)
-            
-            # Save appointments
-            appointments_data = {}
-            for appointment_id, appointment in self.appointments.items():
-                appointments_data[appointment_id] = {
-                    'patient_id': appointment.patient_id,
-                    'doctor_id': appointment.doctor_id,
-                    'date': appointment.date,
-                    'time': appointment.time,
-                    'status': appointment.status.name
-                }
-            with open('appointments.json', 'w') as f:
-                json.dump(appointments_data, f, indent=2)
+            self.write_data(self.export_data())
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error saving data: {e}")
     
     def remove_patient(self, patient_id: str) -> str:
@@ -202,6 +440,8 @@ class Hospital:
         
         patient_name = self.patients[patient_id].name
         del self.patients[patient_id]
+        self._patient_index.remove(patient_id)
+        self._notify("patient", "removed", patient_id)
         return f"Patient {patient_name} removed successfully"
     
     def remove_doctor(self, doctor_id: str) -> str:
@@ -216,14 +456,16 @@ class Hospital:
         
         doctor_name = self.doctors[doctor_id].name
         del self.doctors[doctor_id]
+        self._doctor_index.remove(doctor_id)
+        self._notify("doctor", "removed", doctor_id)
         return f"Doctor {doctor_name} removed successfully"
     
     def remove_appointment(self, appointment_id: str) -> str:
         """Remove an appointment"""
-        if appointment_id not in self.appointments:
+        if self.booking.remove(appointment_id) is None:
             return "Appointment not found"
         
-        del self.appointments[appointment_id]
+        self._notify("appointment", "removed", appointment_id)
         return "Appointment removed successfully"
     
     def update_appointment_status(self, appointment_id: str, new_status: AppointmentStatus) -> str:
@@ -231,9 +473,22 @@ class Hospital:
         if appointment_id not in self.appointments:
             return "Appointment not found"
         
-        self.appointments[appointment_id].status = new_status
+        try:
+            self.appointments[appointment_id].status = new_status
+        except Exception as e:
+            return f"Cannot change status: {e}"
         return f"Appointment status updated to {new_status.value}"
     
+    def reschedule_appointment(self, appointment_id: str, new_date: str, new_time: str) -> str:
+        """Reschedule an appointment if the doctor is free at the new time"""
+        if appointment_id not in self.appointments:
+            return "Appointment not found"
+        
+        try:
+            return self.booking.reschedule(self.appointments[appointment_id], new_date, new_time)
+        except ValueError as e:
+            return str(e)
+    
     def cancel_appointment(self, appointment_id: str, reason: str = "") -> str:
         """Cancel an appointment"""
         if appointment_id not in self.appointments:
@@ -243,22 +498,26 @@ class Hospital:
     
     def get_hospital_statistics(self) -> Dict:
         """Get comprehensive hospital statistics"""
-        total_patients = len(self.patients)
-        active_patients = len([p for p in self.patients.values() if p.is_active])
+        # Work on list snapshots so the statistics can be built off the GUI thread
+        patients = list(self.patients.values())
+        doctors = list(self.doctors.values())
+        appointments = list(self.appointments.values())
+        
+        total_patients = len(patients)
+        active_patients = len([p for p in patients if p.is_active])
         
-        total_doctors = len(self.doctors)
-        active_doctors = len([d for d in self.doctors.values() if d.is_active])
+        total_doctors = len(doctors)
+        active_doctors = len([d for d in doctors if d.is_active])
         
-        total_appointments = len(self.appointments)
-        today_appointments = len([apt for apt in self.appointments.values() 
-                                if apt.date == datetime.now().strftime("%Y-%m-%d")])
+        total_appointments = len(appointments)
+        today_appointments = len(self._schedule_range(today(), today()))
         
         # Count appointments by status
         status_counts = {}
         active_appointments = 0
         completed_appointments = 0
         
-        for apt in self.appointments.values():
+        for apt in appointments:
             status = apt.status.value
             status_counts[status] = status_counts.get(status, 0) + 1
             
@@ -273,7 +532,7 @@ class Hospital:
         # Department statistics
         dept_stats = {}
         for dept in self.departments:
-            dept_doctors = [d for d in self.doctors.values() if d.department == dept]
+            dept_doctors = [d for d in doctors if d.department == dept]
             dept_stats[dept] = {
                 'doctors': len(dept_doctors),
                 'active_doctors': len([d for d in dept_doctors if d.is_active])
@@ -0,0 +1,346 @@
+"""
+Integrity Checker for Hospital Management System
+Scans patient, doctor and appointment records for broken references and invalid values, optionally repairing them.
+
+Usage:
+    python integrity.py [data_dir] [--repair] [--workers N] [--generate N]
+"""
+
+import argparse
+import functools
+import gc
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from appointment import AppointmentStatus
+from time_utils import format_date, format_time, parse_date, parse_time_slot
+
+DATA_FILES = ("patients.json", "doctors.json", "appointments.json")
+
+VALID_STATUSES = frozenset(status.name for status in AppointmentStatus)
+
+# Problems that make a record unusable; repair removes these records
+DANGLING_PATIENT = "dangling_patient"
+DANGLING_DOCTOR = "dangling_doctor"
+INVALID_STATUS = "invalid_status"
+INVALID_DATE = "invalid_date"
+INVALID_TIME = "invalid_time"
+MISSING_FIELD = "missing_field"
+INVALID_AGE = "invalid_age"
+DUPLICATE_ID = "duplicate_id"
+DOUBLE_BOOKING = "double_booking"
+
+REQUIRED_FIELDS = {
+    "patients.json": ("name", "age", "gender", "contact"),
+    "doctors.json": ("name", "specialization", "contact", "department"),
+    "appointments.json": ("patient_id", "doctor_id", "date", "time", "status"),
+}
+
+# (file name, record ID, problem, detail)
+Issue = Tuple[str, str, str, str]
+
+# Known IDs, set once per worker process so chunks do not carry them
+_patient_ids: FrozenSet[str] = frozenset()
+_doctor_ids: FrozenSet[str] = frozenset()
+
+
+def _init_worker(patient_ids: FrozenSet[str], doctor_ids: FrozenSet[str]) -> None:
+    global _patient_ids, _doctor_ids
+    _patient_ids, _doctor_ids = patient_ids, doctor_ids
+
+
+def check_chunk(file_name: str, records: List[Tuple[str, Dict]]) -> List[Issue]:
+    """
+    Check one chunk of records from a data file
+
+    Runs in a worker process; references are checked against the ID sets
+    passed to the worker initializer.
+    """
+    issues: List[Issue] = []
+    required = REQUIRED_FIELDS[file_name]
+    is_appointment = file_name == "appointments.json"
+
+    for record_id, record in records:
+        if not isinstance(record, dict):
+            issues.append((file_name, record_id, MISSING_FIELD, "record is not an object"))
+            continue
+        missing = [field for field in required if field not in record]
+        if missing:
+            issues.append((file_name, record_id, MISSING_FIELD, ", ".join(missing)))
+            continue
+
+        if file_name == "patients.json":
+            age = record['age']
+            if not isinstance(age, int) or isinstance(age, bool) or not 0 <= age <= 150:
+                issues.append((file_name, record_id, INVALID_AGE, repr(age)))
+        elif is_appointment:
+            # Lists or objects in these fields cannot be looked up in the ID sets or the parse cache
+            if not isinstance(record['patient_id'], str) or record['patient_id'] not in _patient_ids:
+                issues.append((file_name, record_id, DANGLING_PATIENT, str(record['patient_id'])))
+            if not isinstance(record['doctor_id'], str) or record['doctor_id'] not in _doctor_ids:
+                issues.append((file_name, record_id, DANGLING_DOCTOR, str(record['doctor_id'])))
+            if not isinstance(record['status'], str) or record['status'] not in VALID_STATUSES:
+                issues.append((file_name, record_id, INVALID_STATUS, str(record['status'])))
+            try:
+                if not isinstance(record['date'], str):
+                    raise ValueError("date is not a string")
+                parse_date(record['date'])
+            except ValueError:
+                issues.append((file_name, record_id, INVALID_DATE, str(record['date'])))
+            try:
+                parse_time_slot(record['time'])
+            except (AttributeError, TypeError, ValueError):
+                issues.append((file_name, record_id, INVALID_TIME, str(record['time'])))
+    return issues
+
+
+class IntegrityReport:
+    def __init__(self, issues: List[Issue], record_counts: Dict[str, int], elapsed: float):
+        """
+        Result of an integrity scan
+
+        Args:
+            issues: (file name, record ID, problem, detail) tuples
+            record_counts: Number of records scanned per data file
+            elapsed: Scan time in seconds
+        """
+        self.issues = issues
+        self.record_counts = record_counts
+        self.elapsed = elapsed
+        self.repaired: Dict[str, int] = {}  # Records removed per data file
+
+    def counts(self) -> Dict[str, int]:
+        """Number of issues per problem type"""
+        counts: Dict[str, int] = {}
+        for _, _, problem, _ in self.issues:
+            counts[problem] = counts.get(problem, 0) + 1
+        return counts
+
+    def is_clean(self) -> bool:
+        return not self.issues
+
+    def summary(self, max_details: int = 20) -> str:
+        """Human-readable report listing the first few issues"""
+        scanned = ", ".join(f"{count} {name[:-5]}" for name, count in self.record_counts.items())
+        lines = [f"Scanned {scanned} in {self.elapsed:.2f}s"]
+        if self.is_clean():
+            lines.append("No problems found")
+        for problem, count in sorted(self.counts().items()):
+            lines.append(f"  {problem}: {count}")
+        for file_name, record_id, problem, detail in self.issues[:max_details]:
+            lines.append(f"  {file_name} {record_id}: {problem} ({detail})")
+        if len(self.issues) > max_details:
+            lines.append(f"  ... {len(self.issues) - max_details} more")
+        for file_name, removed in self.repaired.items():
+            if removed:
+                lines.append(f"Repaired {file_name}: removed {removed} records")
+        return "\n".join(lines)
+
+
+def _load_records(path: str) -> Tuple[Dict[str, Dict], List[str]]:
+    """Load a data file, also returning record IDs that appear more than once"""
+    duplicates: List[str] = []
+
+    def collect(pairs):
+        record = dict(pairs)
+        if len(record) != len(pairs):
+            seen = set()
+            for key, value in pairs:
+                if key in seen and isinstance(value, dict):
+                    duplicates.append(key)
+                seen.add(key)
+        return record
+
+    if not os.path.exists(path):
+        return {}, duplicates
+    with open(path, 'r') as f:
+        return json.load(f, object_pairs_hook=collect), duplicates
+
+
+def _without_gc(func):
+    """Run func with the cyclic GC paused; millions of acyclic record dicts would trigger needless collections"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    return wrapper
+
+
+@_without_gc
+def scan(data: Dict[str, Dict[str, Dict]], duplicates: Optional[Dict[str, List[str]]] = None,
+         workers: Optional[int] = None, chunk_size: int = 50000) -> IntegrityReport:
+    """
+    Check records for dangling references, duplicate IDs and invalid values
+
+    Record checks run in chunks across a process pool; small data sets are
+    checked in this process because starting workers would cost more.
+
+    Args:
+        data: Records per data file name, as loaded from (or exported to) JSON
+        duplicates: Record IDs seen more than once per data file
+        workers: Worker processes (defaults to the CPU count)
+        chunk_size: Records per chunk sent to a worker
+
+    Returns:
+        IntegrityReport
+    """
+    started = time.perf_counter()
+    patient_ids = frozenset(data.get("patients.json", {}))
+    doctor_ids = frozenset(data.get("doctors.json", {}))
+
+    issues: List[Issue] = []
+    for file_name, record_ids in (duplicates or {}).items():
+        issues.extend((file_name, record_id, DUPLICATE_ID, "ID appears more than once") for record_id in record_ids)
+
+    chunks = []
+    for file_name in DATA_FILES:
+        items = list(data.get(file_name, {}).items())
+        chunks.extend((file_name, items[i:i + chunk_size]) for i in range(0, len(items), chunk_size))
+
+    workers = workers or os.cpu_count() or 1
+    if len(chunks) <= 1 or workers == 1:
+        _init_worker(patient_ids, doctor_ids)
+        for file_name, records in chunks:
+            issues.extend(check_chunk(file_name, records))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(patient_ids, doctor_ids)) as pool:
+            for chunk_issues in pool.map(check_chunk, *zip(*chunks)):
+                issues.extend(chunk_issues)
+
+    # Two live appointments for one doctor at one time can only be seen across chunks
+    flagged = {record_id for file_name, record_id, _, _ in issues if file_name == "appointments.json"}
+    booked: Dict[Tuple, str] = {}
+    for appointment_id, record in data.get("appointments.json", {}).items():
+        if appointment_id in flagged or not isinstance(record, dict) or record.get('status') == "CANCELLED":
+            continue
+        key = (record.get('doctor_id'), record.get('date'), record.get('time'))
+        if not all(isinstance(part, str) for part in key):
+            continue  # Reported above; an unhashable part cannot be a dictionary key
+        holder = booked.setdefault(key, appointment_id)
+        if holder != appointment_id:
+            issues.append(("appointments.json", appointment_id, DOUBLE_BOOKING, f"same time as {holder}"))
+
+    counts = {file_name: len(data.get(file_name, {})) for file_name in DATA_FILES}
+    return IntegrityReport(issues, counts, time.perf_counter() - started)
+
+
+def repair(data: Dict[str, Dict[str, Dict]], report: IntegrityReport) -> Dict[str, Dict[str, Dict]]:
+    """
+    Drop every record with a problem, returning the cleaned data
+
+    Patients with an invalid age are kept with the age cleared to 0, since
+    removing them would leave their appointments dangling. Of duplicate IDs
+    the last record (the one json.load kept) survives.
+    """
+    remove: Dict[str, set] = {file_name: set() for file_name in DATA_FILES}
+    fix_age = set()
+    for file_name, record_id, problem, _ in report.issues:
+        if problem == INVALID_AGE:
+            fix_age.add(record_id)
+        elif problem != DUPLICATE_ID:
+            remove[file_name].add(record_id)
+
+    cleaned = {}
+    for file_name in DATA_FILES:
+        records = data.get(file_name, {})
+        cleaned[file_name] = {record_id: record for record_id, record in records.items()
+                              if record_id not in remove[file_name]}
+        report.repaired[file_name] = len(records) - len(cleaned[file_name])
+    for patient_id in fix_age:
+        if patient_id in cleaned["patients.json"]:
+            cleaned["patients.json"][patient_id] = dict(cleaned["patients.json"][patient_id], age=0)
+
+    # Removing patients or doctors can strand appointments that were fine before
+    patients, doctors = cleaned["patients.json"], cleaned["doctors.json"]
+    appointments = cleaned["appointments.json"]
+    stranded = [appointment_id for appointment_id, record in appointments.items()
+                if record['patient_id'] not in patients or record['doctor_id'] not in doctors]
+    for appointment_id in stranded:
+        del appointments[appointment_id]
+    report.repaired["appointments.json"] += len(stranded)
+    return cleaned
+
+
+def check_hospital(hospital, workers: Optional[int] = None) -> IntegrityReport:
+    """Check a Hospital's in-memory records"""
+    snapshot = hospital.export_data()
+    return scan({os.path.basename(path): records for path, records in snapshot.items()}, workers=workers)
+
+
+@_without_gc
+def check_files(data_dir: str = "", fix: bool = False, workers: Optional[int] = None) -> IntegrityReport:
+    """
+    Check the JSON data files in a directory
+
+    Args:
+        data_dir: Directory holding patients.json, doctors.json and appointments.json
+        fix: Rewrite the files without the broken records
+        workers: Worker processes (defaults to the CPU count)
+    """
+    data, duplicates = {}, {}
+    for file_name in DATA_FILES:
+        data[file_name], duplicates[file_name] = _load_records(os.path.join(data_dir, file_name))
+    report = scan(data, duplicates, workers)
+
+    if fix and not report.is_clean():
+        for file_name, records in repair(data, report).items():
+            path = os.path.join(data_dir, file_name)
+            with open(path + ".tmp", 'w') as f:
+                json.dump(records, f, indent=2)
+            os.replace(path + ".tmp", path)
+    return report
+
+
+def generate_dataset(data_dir: str, appointments: int = 2000000, broken_every: int = 1000) -> None:
+    """Write a large synthetic data set with a known share of broken records"""
+    import random
+
+    rng = random.Random(5)
+    patients = {f"p{i:07d}": {'name': f"Patient {i}", 'age': 20 + i % 60, 'gender': "Female",
+                              'contact': f"555-{i:07d}"} for i in range(appointments // 10)}
+    doctors = {f"d{i:04d}": {'name': f"Doctor {i}", 'specialization': "General",
+                             'contact': f"555-{i:04d}", 'department': "General Medicine"} for i in range(1000)}
+    patient_ids, doctor_ids = list(patients), list(doctors)
+    records = {}
+    for i in range(appointments):
+        # Each doctor gets consecutive 20-minute slots, 27 per day, so there is no double booking
+        slot = i // len(doctor_ids)
+        record = {'patient_id': rng.choice(patient_ids), 'doctor_id': doctor_ids[i % len(doctor_ids)],
+                  'date': format_date(parse_date("2030-01-01") + slot // 27),
+                  'time': format_time(8 * 60 + slot % 27 * 20), 'status': "COMPLETED"}
+        if i % broken_every == 0:
+            record[rng.choice(['patient_id', 'doctor_id', 'status', 'date'])] = "missing"
+        records[f"a{i:08d}"] = record
+
+    os.makedirs(data_dir, exist_ok=True)
+    for file_name, content in zip(DATA_FILES, (patients, doctors, records)):
+        with open(os.path.join(data_dir, file_name), 'w') as f:
+            json.dump(content, f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check hospital data files for integrity problems")
+    parser.add_argument("data_dir", nargs="?", default="", help="directory holding the JSON data files")
+    parser.add_argument("--repair", action="store_true", help="remove broken records and rewrite the files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="first write a synthetic data set with N appointments to data_dir")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        generate_dataset(args.data_dir, args.generate)
+    report = check_files(args.data_dir, args.repair, args.workers)
+    print(report.summary())
+    return 0 if report.is_clean() or args.repair else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,9 +10,20 @@ from hospital import Hospital
 from patient import Patient
 from doctor import Doctor
 from appointment import Appointment, AppointmentStatus
+from virtual_tree import VirtualTreeview
+from background import BackgroundWorker
+from scheduler import AppointmentScheduler
+from audit import install_default
+import getpass
 import json
 from datetime import datetime
 
+# How often worker results are picked up, and how long edits are batched before saving
+WORKER_POLL_MS = 100
+SAVE_DELAY_MS = 500
+SEARCH_LIMIT = 200
+SCHEDULER_TICK_MS = 60 * 1000
+
 class HospitalManagementGUI:
     def __init__(self, root):
         self.root = root
@@ -22,6 +33,20 @@ class HospitalManagementGUI:
         # Initialize hospital
         self.hospital = Hospital()
         self.hospital.load_data()
+        self.hospital.subscribe(self.on_hospital_change)
+        
+        # Every change made from here on is written to audit.log
+        self.audit = install_default("audit.log", actor=getpass.getuser())
+        self._overview_pending = False
+        self._search_active = {"patient": False, "doctor": False}
+        self.search_entries = {}
+        
+        # Disk writes and heavy queries run on a background worker
+        self.worker = BackgroundWorker(
+            error_callback=lambda e: messagebox.showerror("Error", f"Background task failed: {e}"))
+        self._save_after_id = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(WORKER_POLL_MS, self.poll_worker)
         
         # Create main notebook for tabs
         self.notebook = ttk.Notebook(root)
@@ -35,6 +60,11 @@ class HospitalManagementGUI:
         
         # Refresh data
         self.refresh_all_data()
+        
+        # Appointment reminders and automatic no-show marking
+        self._reminders = []  # Reminders fired since the last popup
+        self.scheduler = AppointmentScheduler(self.hospital, on_reminder=self.show_reminder)
+        self.run_scheduler()
     
     def create_overview_tab(self):
         """Create the overview/dashboard tab"""
@@ -111,24 +141,15 @@ class HospitalManagementGUI:
         add_btn = ttk.Button(input_frame, text="Add Patient", command=self.add_patient)
         add_btn.grid(row=2, column=0, columnspan=4, pady=10)
         
+        self.create_search_bar(patients_frame, "patient")
+        
         # Patients list
         list_frame = ttk.LabelFrame(patients_frame, text="Patient List", padding=10)
         list_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
-        # Treeview for patients
+        # Windowed view for patients, only visible rows are materialized
         columns = ("ID", "Name", "Age", "Gender", "Contact")
-        self.patient_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
-        
-        for col in columns:
-            self.patient_tree.heading(col, text=col)
-            self.patient_tree.column(col, width=100)
-        
-        # Scrollbar
-        patient_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.patient_tree.yview)
-        self.patient_tree.configure(yscrollcommand=patient_scrollbar.set)
-        
-        self.patient_tree.pack(side='left', fill='both', expand=True)
-        patient_scrollbar.pack(side='right', fill='y')
+        self.patient_view = VirtualTreeview(list_frame, columns)
         
         # Buttons frame
         btn_frame = ttk.Frame(patients_frame)
@@ -173,24 +194,15 @@ class HospitalManagementGUI:
         add_btn = ttk.Button(input_frame, text="Add Doctor", command=self.add_doctor)
         add_btn.grid(row=2, column=0, columnspan=4, pady=10)
         
+        self.create_search_bar(doctors_frame, "doctor")
+        
         # Doctors list
         list_frame = ttk.LabelFrame(doctors_frame, text="Doctor List", padding=10)
         list_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
-        # Treeview for doctors
+        # Windowed view for doctors, only visible rows are materialized
         columns = ("ID", "Name", "Specialization", "Contact", "Department")
-        self.doctor_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
-        
-        for col in columns:
-            self.doctor_tree.heading(col, text=col)
-            self.doctor_tree.column(col, width=100)
-        
-        # Scrollbar
-        doctor_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.doctor_tree.yview)
-        self.doctor_tree.configure(yscrollcommand=doctor_scrollbar.set)
-        
-        self.doctor_tree.pack(side='left', fill='both', expand=True)
-        doctor_scrollbar.pack(side='right', fill='y')
+        self.doctor_view = VirtualTreeview(list_frame, columns)
         
         # Buttons frame
         btn_frame = ttk.Frame(doctors_frame)
@@ -200,6 +212,19 @@ class HospitalManagementGUI:
         ttk.Button(btn_frame, text="Update", command=self.update_doctor).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Delete", command=self.delete_doctor).pack(side='left', padx=5)
     
+    def create_search_bar(self, parent, kind: str):
+        """Create a search box that filters the patient or doctor list"""
+        search_frame = ttk.LabelFrame(parent, text="Search", padding=10)
+        search_frame.pack(fill='x', padx=20, pady=5)
+        
+        entry = ttk.Entry(search_frame, width=40)
+        entry.pack(side='left', padx=5)
+        entry.bind('<Return>', lambda event: self.run_search(kind))
+        self.search_entries[kind] = entry
+        
+        ttk.Button(search_frame, text="Search", command=lambda: self.run_search(kind)).pack(side='left', padx=5)
+        ttk.Button(search_frame, text="Clear", command=lambda: self.clear_search(kind)).pack(side='left', padx=5)
+    
     def create_appointments_tab(self):
         """Create the appointments management tab"""
         appointments_frame = ttk.Frame(self.notebook)
@@ -241,20 +266,9 @@ class HospitalManagementGUI:
         list_frame = ttk.LabelFrame(appointments_frame, text="Appointment List", padding=10)
         list_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
-        # Treeview for appointments
+        # Windowed view for appointments, only visible rows are materialized
         columns = ("ID", "Patient ID", "Doctor ID", "Date", "Time", "Status")
-        self.appointment_tree = ttk.Treeview(list_frame, columns=columns, show='headings')
-        
-        for col in columns:
-            self.appointment_tree.heading(col, text=col)
-            self.appointment_tree.column(col, width=100)
-        
-        # Scrollbar
-        apt_scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.appointment_tree.yview)
-        self.appointment_tree.configure(yscrollcommand=apt_scrollbar.set)
-        
-        self.appointment_tree.pack(side='left', fill='both', expand=True)
-        apt_scrollbar.pack(side='right', fill='y')
+        self.appointment_view = VirtualTreeview(list_frame, columns)
         
         # Buttons frame
         btn_frame = ttk.Frame(appointments_frame)
@@ -288,8 +302,8 @@ class HospitalManagementGUI:
             self.patient_age_entry.delete(0, tk.END)
             self.patient_contact_entry.delete(0, tk.END)
             
-            # Refresh data
-            self.refresh_all_data()
+            # Views update through the change feed, only persist here
+            self.save_data()
             
         except ValueError:
             messagebox.showerror("Error", "Please enter valid data")
@@ -317,8 +331,8 @@ class HospitalManagementGUI:
             self.doctor_contact_entry.delete(0, tk.END)
             self.doctor_dept_entry.delete(0, tk.END)
             
-            # Refresh data
-            self.refresh_all_data()
+            # Views update through the change feed, only persist here
+            self.save_data()
             
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -344,21 +358,19 @@ class HospitalManagementGUI:
             self.apt_time_entry.delete(0, tk.END)
             self.apt_time_entry.insert(0, "10:00")
             
-            # Refresh data
-            self.refresh_all_data()
+            # Views update through the change feed, only persist here
+            self.save_data()
             
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
     def update_patient(self):
         """Update selected patient"""
-        selection = self.patient_tree.selection()
-        if not selection:
+        patient_id = self.patient_view.selected_key()
+        if not patient_id:
             messagebox.showwarning("Warning", "Please select a patient to update")
             return
         
-        # Get patient data and show update dialog
-        patient_id = self.patient_tree.item(selection[0])['values'][0]
         patient = self.hospital.get_patient(patient_id)
         
         if patient:
@@ -367,13 +379,11 @@ class HospitalManagementGUI:
     
     def update_doctor(self):
         """Update selected doctor"""
-        selection = self.doctor_tree.selection()
-        if not selection:
+        doctor_id = self.doctor_view.selected_key()
+        if not doctor_id:
             messagebox.showwarning("Warning", "Please select a doctor to update")
             return
         
-        # Get doctor data and show update dialog
-        doctor_id = self.doctor_tree.item(selection[0])['values'][0]
         doctor = self.hospital.get_doctor(doctor_id)
         
         if doctor:
@@ -382,13 +392,11 @@ class HospitalManagementGUI:
     
     def update_appointment_status(self):
         """Update appointment status"""
-        selection = self.appointment_tree.selection()
-        if not selection:
+        appointment_id = self.appointment_view.selected_key()
+        if not appointment_id:
             messagebox.showwarning("Warning", "Please select an appointment to update")
             return
         
-        appointment_id = self.appointment_tree.item(selection[0])['values'][0]
-        
         # Status selection dialog
         statuses = ["SCHEDULED", "CONFIRMED", "COMPLETED", "CANCELLED"]
         status = simpledialog.askstring("Update Status", 
@@ -400,121 +408,154 @@ class HospitalManagementGUI:
                 result = self.hospital.update_appointment_status(appointment_id, 
                                                               AppointmentStatus[status.upper()])
                 messagebox.showinfo("Success", result)
-                self.refresh_all_data()
+                self.save_data()
             except Exception as e:
                 messagebox.showerror("Error", str(e))
     
     def delete_patient(self):
         """Delete selected patient"""
-        selection = self.patient_tree.selection()
-        if not selection:
+        patient_id = self.patient_view.selected_key()
+        if not patient_id:
             messagebox.showwarning("Warning", "Please select a patient to delete")
             return
         
-        patient_id = self.patient_tree.item(selection[0])['values'][0]
-        
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete patient {patient_id}?"):
             try:
                 result = self.hospital.remove_patient(patient_id)
                 messagebox.showinfo("Success", result)
-                self.refresh_all_data()
+                self.save_data()
             except Exception as e:
                 messagebox.showerror("Error", str(e))
     
     def delete_doctor(self):
         """Delete selected doctor"""
-        selection = self.doctor_tree.selection()
-        if not selection:
+        doctor_id = self.doctor_view.selected_key()
+        if not doctor_id:
             messagebox.showwarning("Warning", "Please select a doctor to delete")
             return
         
-        doctor_id = self.doctor_tree.item(selection[0])['values'][0]
-        
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete doctor {doctor_id}?"):
             try:
                 result = self.hospital.remove_doctor(doctor_id)
                 messagebox.showinfo("Success", result)
-                self.refresh_all_data()
+                self.save_data()
             except Exception as e:
                 messagebox.showerror("Error", str(e))
     
     def delete_appointment(self):
         """Delete selected appointment"""
-        selection = self.appointment_tree.selection()
-        if not selection:
+        appointment_id = self.appointment_view.selected_key()
+        if not appointment_id:
             messagebox.showwarning("Warning", "Please select an appointment to delete")
             return
         
-        appointment_id = self.appointment_tree.item(selection[0])['values'][0]
-        
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete appointment {appointment_id}?"):
             try:
                 result = self.hospital.remove_appointment(appointment_id)
                 messagebox.showinfo("Success", result)
-                self.refresh_all_data()
+                self.save_data()
             except Exception as e:
                 messagebox.showerror("Error", str(e))
     
+    def patient_row(self, patient: Patient) -> tuple:
+        """Build the list row for a patient"""
+        return (patient.patient_id, patient.name, patient.age, patient.gender, patient.contact)
+    
+    def doctor_row(self, doctor: Doctor) -> tuple:
+        """Build the list row for a doctor"""
+        return (doctor.doctor_id, doctor.name, doctor.specialization, doctor.contact, doctor.department)
+    
+    def appointment_row(self, appointment: Appointment) -> tuple:
+        """Build the list row for an appointment"""
+        return (appointment.appointment_id, appointment.patient_id, appointment.doctor_id,
+                appointment.date, appointment.time, appointment.status.value)
+    
+    def on_hospital_change(self, entity: str, action: str, entity_id: str):
+        """Apply a single change from the hospital feed to the matching view"""
+        if entity == "patient":
+            view, lookup, row = self.patient_view, self.hospital.get_patient, self.patient_row
+        elif entity == "doctor":
+            view, lookup, row = self.doctor_view, self.hospital.get_doctor, self.doctor_row
+        elif entity == "appointment":
+            view, lookup, row = self.appointment_view, self.hospital.appointments.get, self.appointment_row
+        else:
+            return
+        
+        record = lookup(entity_id)
+        if action == "removed" or record is None:
+            view.remove(entity_id)
+        elif self._search_active.get(entity) and entity_id not in view:
+            pass  # Keep search results as they are until the search is cleared; only rows shown are updated
+        else:
+            view.upsert(entity_id, row(record))
+        
+        # Coalesce overview updates from a burst of changes into one refresh
+        if not self._overview_pending:
+            self._overview_pending = True
+            self.root.after_idle(self.refresh_overview)
+    
+    def run_search(self, kind: str):
+        """Search patients or doctors in the background and show the matches"""
+        query = self.search_entries[kind].get().strip()
+        if not query:
+            self.clear_search(kind)
+            return
+        
+        self.worker.submit(self.hospital.search, query, kind, SEARCH_LIMIT,
+                           callback=lambda results: self.show_search_results(kind, results),
+                           error_callback=lambda e: messagebox.showerror("Error", str(e)),
+                           key=f"search-{kind}")
+    
+    def show_search_results(self, kind: str, results: list):
+        """Fill the patient or doctor list with search results"""
+        self._search_active[kind] = True
+        if kind == "patient":
+            self.patient_view.set_rows((p.patient_id, self.patient_row(p)) for p in results)
+        else:
+            self.doctor_view.set_rows((d.doctor_id, self.doctor_row(d)) for d in results)
+    
+    def clear_search(self, kind: str):
+        """Show the full patient or doctor list again"""
+        self.search_entries[kind].delete(0, tk.END)
+        self._search_active[kind] = False
+        if kind == "patient":
+            self.refresh_patients()
+        else:
+            self.refresh_doctors()
+    
     def refresh_patients(self):
-        """Refresh the patients list"""
-        # Clear existing items
-        for item in self.patient_tree.get_children():
-            self.patient_tree.delete(item)
-        
-        # Add patients
-        for patient in self.hospital.get_all_patients():
-            self.patient_tree.insert('', 'end', values=(
-                patient.patient_id,
-                patient.name,
-                patient.age,
-                patient.gender,
-                patient.contact
-            ))
+        """Reload the patients list"""
+        self.patient_view.set_rows((patient.patient_id, self.patient_row(patient))
+                                   for patient in self.hospital.get_all_patients())
     
     def refresh_doctors(self):
-        """Refresh the doctors list"""
-        # Clear existing items
-        for item in self.doctor_tree.get_children():
-            self.doctor_tree.delete(item)
-        
-        # Add doctors
-        for doctor in self.hospital.get_all_doctors():
-            self.doctor_tree.insert('', 'end', values=(
-                doctor.doctor_id,
-                doctor.name,
-                doctor.specialization,
-                doctor.contact,
-                doctor.department
-            ))
+        """Reload the doctors list"""
+        self.doctor_view.set_rows((doctor.doctor_id, self.doctor_row(doctor))
+                                  for doctor in self.hospital.get_all_doctors())
     
     def refresh_appointments(self):
-        """Refresh the appointments list"""
-        # Clear existing items
-        for item in self.appointment_tree.get_children():
-            self.appointment_tree.delete(item)
-        
-        # Add appointments
-        for appointment in self.hospital.get_all_appointments():
-            self.appointment_tree.insert('', 'end', values=(
-                appointment.appointment_id,
-                appointment.patient_id,
-                appointment.doctor_id,
-                appointment.date,
-                appointment.time,
-                appointment.status.value
-            ))
+        """Reload the appointments list"""
+        self.appointment_view.set_rows((appointment.appointment_id, self.appointment_row(appointment))
+                                       for appointment in self.hospital.get_all_appointments())
     
     def refresh_overview(self):
-        """Refresh the overview tab"""
-        # Update statistics
-        stats = self.hospital.get_hospital_statistics()
+        """Refresh the overview tab, computing statistics in the background"""
+        self._overview_pending = False
+        self.worker.submit(self.collect_overview, callback=self.show_overview, key="overview")
+    
+    def collect_overview(self) -> tuple:
+        """Gather overview statistics (runs on the worker thread)"""
+        return self.hospital.get_hospital_statistics(), self.hospital.get_department_statistics()
+    
+    def show_overview(self, result: tuple):
+        """Display statistics produced by collect_overview"""
+        stats, dept_stats = result
         self.patient_count_label.config(text=f"Total Patients: {stats['total_patients']}")
         self.doctor_count_label.config(text=f"Total Doctors: {stats['total_doctors']}")
         self.appointment_count_label.config(text=f"Total Appointments: {stats['total_appointments']}")
         self.active_appointment_label.config(text=f"Active Appointments: {stats['active_appointments']}")
         
         # Update department overview
-        dept_stats = self.hospital.get_department_statistics()
         self.dept_text.delete(1.0, tk.END)
         for dept, count in dept_stats.items():
             self.dept_text.insert(tk.END, f"{dept}: {count} doctors\n")
@@ -525,12 +566,60 @@ class HospitalManagementGUI:
         self.refresh_doctors()
         self.refresh_appointments()
         self.refresh_overview()
-        
-        # Save data
+        self.save_data()
+    
+    def save_data(self):
+        """Schedule a save; a burst of edits within SAVE_DELAY_MS is written once"""
+        if self._save_after_id is not None:
+            self.root.after_cancel(self._save_after_id)
+        self._save_after_id = self.root.after(SAVE_DELAY_MS, self.flush_save)
+    
+    def flush_save(self):
+        """Snapshot the data on the UI thread and write it on the worker"""
+        self._save_after_id = None
         try:
-            self.hospital.save_data()
+            snapshot = self.hospital.export_data()
         except Exception as e:
-            print(f"Error saving data: {e}")
+            messagebox.showerror("Error", f"Error saving data: {e}")
+            return
+        self.worker.submit(Hospital.write_data, snapshot, key="save",
+                           error_callback=lambda e: messagebox.showerror("Error", f"Error saving data: {e}"))
+    
+    def poll_worker(self):
+        """Deliver background results on the Tk thread"""
+        self.worker.poll()
+        self.root.after(WORKER_POLL_MS, self.poll_worker)
+    
+    def run_scheduler(self):
+        """Fire due reminders and no-shows, then check again in a minute"""
+        if self.scheduler.run_pending():
+            self.save_data()
+        self.root.after(SCHEDULER_TICK_MS, self.run_scheduler)
+    
+    def show_reminder(self, appointment: Appointment):
+        """Queue an upcoming appointment for the reminder popup"""
+        patient = self.hospital.get_patient(appointment.patient_id)
+        patient_name = patient.name if patient else appointment.patient_id
+        # Coalesce the reminders fired in one scheduler tick into one popup
+        if not self._reminders:
+            self.root.after_idle(self.flush_reminders)
+        self._reminders.append(f"{patient_name} has an appointment on {appointment.date} at {appointment.time}")
+    
+    def flush_reminders(self):
+        """Show the queued reminders in one message box"""
+        reminders, self._reminders = self._reminders, []
+        if reminders:
+            messagebox.showinfo("Appointment Reminders", "\n".join(reminders))
+    
+    def on_close(self):
+        """Write any pending changes before closing the window"""
+        if self._save_after_id is not None:
+            self.root.after_cancel(self._save_after_id)
+            self.flush_save()
+        self.worker.stop()
+        self.worker.poll()  # Show a failed final save before the window goes away
+        self.audit.close()
+        self.root.destroy()
 
 def main():
     """Main function to run the GUI application"""
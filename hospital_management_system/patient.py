@@ -3,9 +3,10 @@ Patient Class for Hospital Management System
 Represents a patient with personal information, medical history, and appointments.
 """
 
-import uuid
 from datetime import datetime
 from typing import List, Optional, Dict
+from ids import new_id
+from timeline import CONDITION, PRESCRIPTION, PatientTimeline
 
 
 class Patient:
@@ -25,7 +26,7 @@ class Patient:
             blood_group: Patient's blood group
             medical_history: Previous medical conditions
         """
-        self.patient_id = str(uuid.uuid4())[:8]
+        self.patient_id = new_id()
         self.name = name
         self.age = age
         self.gender = gender
@@ -33,15 +34,37 @@ class Patient:
         self.address = address
         self.emergency_contact = emergency_contact
         self.blood_group = blood_group
+        self.timeline = PatientTimeline()  # Conditions and prescriptions as append-only events
         self.medical_history = medical_history
         self.admission_date = datetime.now()
         self.is_active = True
         self.appointments: List[str] = []  # List of appointment IDs
-        self.prescriptions: List[Dict] = []  # List of prescription dictionaries
         
         # Add contact property for GUI compatibility
         self.contact = phone
         
+    @property
+    def medical_history(self) -> str:
+        """Medical history text; condition events added since the last read are appended to the cached text"""
+        new_events = self.timeline.events(CONDITION, self._history_rendered)
+        if new_events:
+            new_text = "\n".join(f"{event.timestamp.strftime('%Y-%m-%d')}: {event.data['condition']}"
+                                 for event in new_events)
+            self._history_text = f"{self._history_text}\n{new_text}" if self._history_text else new_text
+            self._history_rendered += len(new_events)
+        return self._history_text
+    
+    @medical_history.setter
+    def medical_history(self, value: str):
+        # Replaces the text; earlier condition events stay in the timeline
+        self._history_rendered = self.timeline.count(CONDITION)  # Condition events already in the text
+        self._history_text = value
+    
+    @property
+    def prescriptions(self) -> List[Dict]:
+        """Prescription dictionaries in the order they were added"""
+        return [event.data for event in self.timeline.events(PRESCRIPTION)]
+    
     def add_appointment(self, appointment_id: str) -> str:
         """Add an appointment to patient's record"""
         if appointment_id not in self.appointments:
@@ -59,16 +82,17 @@ class Patient:
     def add_prescription(self, doctor_name: str, medicine: str, 
                         dosage: str, duration: str, notes: str = "") -> str:
         """Add a prescription to patient's medical record"""
+        now = datetime.now()
         prescription = {
-            'id': str(uuid.uuid4())[:8],
-            'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'id': new_id(),
+            'date': now.strftime("%Y-%m-%d %H:%M:%S"),
             'doctor': doctor_name,
             'medicine': medicine,
             'dosage': dosage,
             'duration': duration,
             'notes': notes
         }
-        self.prescriptions.append(prescription)
+        self.timeline.append(PRESCRIPTION, prescription, now)
         return f"Prescription added successfully (ID: {prescription['id']})"
     
     def get_prescription_history(self) -> List[Dict]:
@@ -77,10 +101,7 @@ class Patient:
     
     def update_medical_history(self, new_condition: str) -> str:
         """Update patient's medical history"""
-        if self.medical_history:
-            self.medical_history += f"\n{datetime.now().strftime('%Y-%m-%d')}: {new_condition}"
-        else:
-            self.medical_history = f"{datetime.now().strftime('%Y-%m-%d')}: {new_condition}"
+        self.timeline.append(CONDITION, {'condition': new_condition})
         return "Medical history updated successfully"
     
     def deactivate_patient(self) -> str:
@@ -104,7 +125,7 @@ class Patient:
                 f"Blood Group: {self.blood_group}\n"
                 f"Status: {status}\n"
                 f"Total Appointments: {len(self.appointments)}\n"
-                f"Total Prescriptions: {len(self.prescriptions)}")
+                f"Total Prescriptions: {self.timeline.count(PRESCRIPTION)}")
     
     def __str__(self) -> str:
         """String representation of patient"""
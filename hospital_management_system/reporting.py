@@ -0,0 +1,290 @@
+"""
+Reporting for Hospital Management System
+Daily rollup cube of appointment counts and revenue, kept up to date from the hospital's change feed.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from appointment import Appointment, AppointmentStatus
+from time_utils import format_date, parse_date
+
+# Dimensions a query can group by, in cell key order after the day
+DIMENSIONS = ("date", "department", "doctor_id", "status")
+
+# (department, doctor_id, status value) within one day
+CellKey = Tuple[str, str, str]
+
+
+class ReportingCube:
+    def __init__(self, hospital):
+        """
+        Build the cube from a hospital's appointments and follow its changes
+
+        Args:
+            hospital: Hospital whose appointments are reported on
+        """
+        self.hospital = hospital
+        self._lock = threading.Lock()
+        self._days: List[int] = []  # Sorted day numbers that have cells
+        self._cells: Dict[int, Dict[CellKey, List[float]]] = {}  # day -> cell -> [count, revenue]
+        self._rollup: Dict[int, Dict[CellKey, List[float]]] = {}  # Same, doctor_id rolled up to ""
+        self._contributions: Dict[str, Tuple[int, CellKey, float]] = {}  # appointment_id -> (day, cell, cost)
+        self.rebuild()
+        hospital.subscribe(self.on_hospital_change)
+
+    def rebuild(self) -> None:
+        """Recompute every cell from the hospital's appointments (e.g. after load_data)"""
+        with self._lock:
+            self._days = []
+            self._cells = {}
+            self._rollup = {}
+            self._contributions = {}
+            for appointment in list(self.hospital.appointments.values()):
+                self._add(appointment)
+
+    def close(self) -> None:
+        """Stop following the hospital's changes"""
+        self.hospital.unsubscribe(self.on_hospital_change)
+
+    def on_hospital_change(self, entity: str, action: str, entity_id: str) -> None:
+        """Move one appointment's contribution to the cell it belongs in now"""
+        if entity != "appointment":
+            return
+        with self._lock:
+            self._subtract(entity_id)
+            appointment = self.hospital.appointments.get(entity_id)
+            if action != "removed" and appointment is not None:
+                self._add(appointment)
+
+    def _add(self, appointment: Appointment) -> None:
+        doctor = self.hospital.doctors.get(appointment.doctor_id)
+        department = doctor.department if doctor is not None else ""
+        cell = (department, appointment.doctor_id, appointment.status.value)
+        day = appointment.day
+
+        if day not in self._cells:
+            self._cells[day] = {}
+            self._rollup[day] = {}
+            bisect.insort(self._days, day)
+        for cells, key in ((self._cells[day], cell), (self._rollup[day], (department, "", cell[2]))):
+            totals = cells.get(key)
+            if totals is None:
+                totals = cells[key] = [0, 0.0]
+            totals[0] += 1
+            totals[1] += appointment.cost
+        self._contributions[appointment.appointment_id] = (day, cell, appointment.cost)
+
+    def _subtract(self, appointment_id: str) -> None:
+        entry = self._contributions.pop(appointment_id, None)
+        if entry is None:
+            return
+        day, cell, cost = entry
+        for cells, key in ((self._cells[day], cell), (self._rollup[day], (cell[0], "", cell[2]))):
+            totals = cells[key]
+            totals[0] -= 1
+            totals[1] -= cost
+            if totals[0] == 0:
+                del cells[key]
+        if not self._cells[day]:
+            del self._cells[day]
+            del self._rollup[day]
+            del self._days[bisect.bisect_left(self._days, day)]
+
+    def _scan(self, start_date: Optional[str], end_date: Optional[str],
+              per_doctor: bool = True) -> Iterable[Tuple[int, CellKey, List[float]]]:
+        """Cells for days in [start_date, end_date], oldest first"""
+        first = bisect.bisect_left(self._days, parse_date(start_date)) if start_date else 0
+        last = bisect.bisect_right(self._days, parse_date(end_date)) if end_date else len(self._days)
+        level = self._cells if per_doctor else self._rollup
+        for day in self._days[first:last]:
+            for cell, totals in level[day].items():
+                yield day, cell, totals
+
+    def query(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+              group_by: Sequence[str] = (), department: Optional[str] = None,
+              doctor_id: Optional[str] = None,
+              statuses: Optional[Iterable[AppointmentStatus]] = None) -> Dict[Tuple, Dict[str, float]]:
+        """
+        Roll the cube up over a date window
+
+        Only the days inside the window are visited, so the cost depends on
+        the number of days and cells, not on the number of appointments.
+        Queries that neither group nor filter by doctor read the smaller
+        per-department rollup.
+
+        Args:
+            start_date: First date included (YYYY-MM-DD), None for no lower bound
+            end_date: Last date included (YYYY-MM-DD), None for no upper bound
+            group_by: Dimensions to keep, any of "date", "department", "doctor_id", "status"
+            department: Only count this department
+            doctor_id: Only count this doctor
+            statuses: Only count these statuses
+
+        Returns:
+            {group key tuple: {'count': n, 'revenue': total cost}}
+        """
+        for dimension in group_by:
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension: {dimension}")
+        status_values = {status.value for status in statuses} if statuses is not None else None
+        positions = [DIMENSIONS.index(dimension) for dimension in group_by]
+
+        per_doctor = doctor_id is not None or "doctor_id" in group_by
+
+        result: Dict[Tuple, Dict[str, float]] = {}
+        with self._lock:
+            for day, cell, totals in self._scan(start_date, end_date, per_doctor):
+                if department is not None and cell[0] != department:
+                    continue
+                if doctor_id is not None and cell[1] != doctor_id:
+                    continue
+                if status_values is not None and cell[2] not in status_values:
+                    continue
+                row = (day,) + cell
+                key = tuple(row[position] for position in positions)
+                entry = result.get(key)
+                if entry is None:
+                    entry = result[key] = {'count': 0, 'revenue': 0.0}
+                entry['count'] += totals[0]
+                entry['revenue'] += totals[1]
+
+        if "date" in group_by:
+            index = group_by.index("date")
+            result = {key[:index] + (format_date(key[index]),) + key[index + 1:]: value
+                      for key, value in result.items()}
+        return result
+
+    def appointments_per_day(self, start_date: str, end_date: str, **filters) -> Dict[str, int]:
+        """Appointment count for each date in the window that has any"""
+        rows = self.query(start_date, end_date, group_by=("date",), **filters)
+        return {key[0]: int(value['count']) for key, value in rows.items()}
+
+    def no_show_rate(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     group_by: Sequence[str] = (), **filters) -> Dict[Tuple, float]:
+        """
+        Share of completed or missed appointments that were no-shows
+
+        Returns:
+            {group key tuple: rate between 0 and 1}
+        """
+        rows = self.query(start_date, end_date, group_by=tuple(group_by) + ("status",),
+                          statuses=(AppointmentStatus.COMPLETED, AppointmentStatus.NO_SHOW), **filters)
+        attended: Dict[Tuple, List[int]] = {}
+        for key, value in rows.items():
+            totals = attended.setdefault(key[:-1], [0, 0])
+            totals[1] += value['count']
+            if key[-1] == AppointmentStatus.NO_SHOW.value:
+                totals[0] += value['count']
+        return {key: no_shows / total for key, (no_shows, total) in attended.items()}
+
+    def revenue(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                group_by: Sequence[str] = (),
+                statuses: Iterable[AppointmentStatus] = (AppointmentStatus.COMPLETED,),
+                **filters) -> Dict[Tuple, float]:
+        """Sum of Appointment.cost, by default for completed appointments only"""
+        rows = self.query(start_date, end_date, group_by=group_by, statuses=statuses, **filters)
+        return {key: value['revenue'] for key, value in rows.items()}
+
+    def to_columns(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, list]:
+        """
+        Every cell in the window as parallel column lists
+
+        Returns:
+            {'date', 'department', 'doctor_id', 'status', 'count', 'revenue'} -> list
+        """
+        columns: Dict[str, list] = {name: [] for name in DIMENSIONS + ('count', 'revenue')}
+        with self._lock:
+            for day, (department, doctor_id, status), (count, revenue) in self._scan(start_date, end_date):
+                columns['date'].append(day)
+                columns['department'].append(department)
+                columns['doctor_id'].append(doctor_id)
+                columns['status'].append(status)
+                columns['count'].append(count)
+                columns['revenue'].append(revenue)
+        columns['date'] = [format_date(day) for day in columns['date']]
+        return columns
+
+    def to_arrays(self, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        """Cells as NumPy arrays (requires numpy), for vectorized analysis"""
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("to_arrays requires numpy (pip install numpy)")
+
+        columns = self.to_columns(start_date, end_date)
+        arrays = {name: np.asarray(values, dtype=object) for name, values in columns.items()
+                  if name in DIMENSIONS}
+        arrays['date'] = np.asarray(columns['date'], dtype='datetime64[D]')
+        arrays['count'] = np.asarray(columns['count'], dtype=np.int64)
+        arrays['revenue'] = np.asarray(columns['revenue'], dtype=np.float64)
+        return arrays
+
+    def to_dataframe(self, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        """Cells as a pandas DataFrame (requires pandas), one row per cell"""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("to_dataframe requires pandas (pip install pandas)")
+
+        frame = pd.DataFrame(self.to_columns(start_date, end_date))
+        frame['date'] = pd.to_datetime(frame['date'])
+        return frame
+
+    def __len__(self) -> int:
+        """Number of non-empty cells"""
+        return sum(len(cells) for cells in self._cells.values())
+
+
+def benchmark(appointments: int = 200000, days: int = 365) -> None:
+    """Compare cube roll-ups against recomputing from Hospital.appointments"""
+    import random
+    import time
+    from hospital import Hospital
+
+    hospital = Hospital()
+    rng = random.Random(7)
+    doctor_ids = [hospital.add_doctor(f"Doctor {i}", "General", f"555-{i:04d}",
+                                      hospital.departments[i % len(hospital.departments)])
+                  for i in range(50)]
+    first = parse_date("2030-01-01")
+    statuses = list(AppointmentStatus)
+    for i in range(appointments):
+        appointment = Appointment(f"P{i % 5000}", rng.choice(doctor_ids),
+                                  format_date(first + rng.randrange(days)), "09:00-09:30",
+                                  status=rng.choice(statuses))
+        appointment.cost = float(rng.randrange(50, 300))
+        hospital.appointments[appointment.appointment_id] = appointment
+
+    started = time.perf_counter()
+    cube = ReportingCube(hospital)
+    print(f"Built {len(cube)} cells from {appointments} appointments: {time.perf_counter() - started:.3f}s")
+
+    window = ("2030-03-01", "2030-05-31")
+    started = time.perf_counter()
+    for _ in range(100):
+        cube.query(*window, group_by=("department",))
+    cube_time = (time.perf_counter() - started) / 100
+
+    started = time.perf_counter()
+    for _ in range(100):
+        cube.no_show_rate(*window, group_by=("doctor_id",))
+    doctor_time = (time.perf_counter() - started) / 100
+
+    started = time.perf_counter()
+    low, high = parse_date(window[0]), parse_date(window[1])
+    naive: Dict[str, int] = {}
+    for appointment in hospital.appointments.values():
+        if low <= appointment.day <= high:
+            department = hospital.doctors[appointment.doctor_id].department
+            naive[department] = naive.get(department, 0) + 1
+    scan_time = time.perf_counter() - started
+
+    rolled = {key[0]: value['count'] for key, value in cube.query(*window, group_by=("department",)).items()}
+    assert rolled == naive
+    print(f"Quarter by department: cube {cube_time * 1000:.2f}ms, full scan {scan_time * 1000:.2f}ms")
+    print(f"Quarter no-show rate by doctor: cube {doctor_time * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,122 @@
+"""
+Schedule Template for Hospital Management System
+Recurring weekly availability (e.g. "Mon-Fri 09:00-13:00, 20-minute slots") that expands into schedule slots on demand.
+"""
+
+from typing import Dict, Iterable, List, Optional, Union
+from ids import new_id
+from time_utils import format_date, format_time, parse_date, parse_time
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def parse_weekdays(value: str) -> List[int]:
+    """
+    Convert a weekday spec such as "Mon-Fri" or "Mon,Wed,Fri" to weekday numbers (Monday is 0)
+    """
+    days = []
+    for part in value.lower().replace(" ", "").split(","):
+        if "-" in part:
+            first, last = part.split("-", 1)
+            start, end = WEEKDAYS.index(first[:3]), WEEKDAYS.index(last[:3])
+            days.extend(range(start, end + 1) if start <= end else [*range(start, 7), *range(0, end + 1)])
+        elif part:
+            days.append(WEEKDAYS.index(part[:3]))
+    return sorted(set(days))
+
+
+class ScheduleTemplate:
+    def __init__(self, weekdays: Union[str, Iterable[int]], start_time: str, end_time: str,
+                 slot_minutes: int = 20, max_patients: int = 1,
+                 valid_from: Optional[str] = None, valid_until: Optional[str] = None):
+        """
+        Initialize a recurring schedule template
+
+        Args:
+            weekdays: "Mon-Fri" style spec or weekday numbers (Monday is 0)
+            start_time: Start of the working block in HH:MM format
+            end_time: End of the working block in HH:MM format
+            slot_minutes: Length of each slot
+            max_patients: Capacity of each slot
+            valid_from: First date the template applies to (YYYY-MM-DD)
+            valid_until: Last date the template applies to (YYYY-MM-DD)
+        """
+        self.template_id = new_id()
+        self.weekdays = frozenset(parse_weekdays(weekdays) if isinstance(weekdays, str) else weekdays)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.slot_minutes = slot_minutes
+        self.max_patients = max_patients
+        self.first_day = parse_date(valid_from) if valid_from else None
+        self.last_day = parse_date(valid_until) if valid_until else None
+
+        start_minute, end_minute = parse_time(start_time), parse_time(end_time)
+        if end_minute <= start_minute:
+            raise ValueError("End time must be after start time")
+        if slot_minutes <= 0:
+            raise ValueError("Slot length must be positive")
+
+        # One prototype per slot in a day, copied whenever a date is expanded
+        self._prototypes: List[Dict] = []
+        for index, minute in enumerate(range(start_minute, end_minute - slot_minutes + 1, slot_minutes)):
+            self._prototypes.append({
+                'id': f"{self.template_id}-{index}",
+                'start_time': format_time(minute),
+                'end_time': format_time(minute + slot_minutes),
+                'start_minute': minute,
+                'end_minute': minute + slot_minutes,
+                'max_patients': max_patients,
+                'current_patients': 0
+            })
+
+    def applies_to(self, day: int) -> bool:
+        """Check whether the template covers a day number"""
+        if self.first_day is not None and day < self.first_day:
+            return False
+        if self.last_day is not None and day > self.last_day:
+            return False
+        return (day - 1) % 7 in self.weekdays  # Day number 1 (0001-01-01) was a Monday
+
+    def expand(self, day: int) -> List[Dict]:
+        """Build fresh schedule slots for a day number, sorted by start time"""
+        if not self.applies_to(day):
+            return []
+        return [{**prototype, 'booked_patients': []} for prototype in self._prototypes]
+
+    def __str__(self) -> str:
+        days = ",".join(WEEKDAYS[day].title() for day in sorted(self.weekdays))
+        return (f"{days} {self.start_time}-{self.end_time}, "
+                f"{self.slot_minutes}-minute slots, capacity {self.max_patients}")
+
+    def __repr__(self) -> str:
+        return (f"ScheduleTemplate(weekdays={sorted(self.weekdays)}, start_time='{self.start_time}', "
+                f"end_time='{self.end_time}', slot_minutes={self.slot_minutes})")
+
+
+def benchmark(doctors: int = 500, days: int = 365) -> None:
+    """Time lazy and bulk expansion of a year of templates for many doctors"""
+    import time
+    from doctor import Doctor
+
+    staff = [Doctor(f"Doctor {i}", "General", f"555-{i:04d}") for i in range(doctors)]
+    first = parse_date("2030-01-01")
+    last_date = format_date(first + days - 1)
+
+    started = time.perf_counter()
+    for doctor in staff:
+        doctor.add_schedule_template(ScheduleTemplate("Mon-Fri", "09:00", "13:00", 20, 1,
+                                                      "2030-01-01", last_date))
+    print(f"Templates for {doctors} doctors: {time.perf_counter() - started:.3f}s")
+
+    started = time.perf_counter()
+    for doctor in staff:
+        doctor.get_available_slots("2030-06-12")
+    print(f"Lazy expansion of one date for {doctors} doctors: {time.perf_counter() - started:.3f}s")
+
+    started = time.perf_counter()
+    total = sum(doctor.materialize_templates("2030-01-01", last_date) for doctor in staff)
+    print(f"Bulk materialization of {total} slots over {days} days: {time.perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    benchmark()
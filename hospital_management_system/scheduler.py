@@ -0,0 +1,208 @@
+"""
+Appointment Scheduler for Hospital Management System
+Fires appointment reminders and marks missed appointments as no-shows using a hierarchical timer wheel.
+"""
+
+import itertools
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from appointment import Appointment, AppointmentStatus
+from time_utils import MINUTES_PER_DAY, minute_stamp
+
+WHEEL_BITS = 6  # 64 slots per level
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4  # 64 ** 4 ticks, about 32 years of minutes
+
+
+class TimerWheel:
+    def __init__(self, current_tick: int):
+        """
+        Initialize a hierarchical timer wheel
+
+        Level 0 holds timers due within 64 ticks, level 1 within 64**2 ticks
+        and so on. Timers cascade to a lower level as their time approaches,
+        so inserting and cancelling are O(1) and each tick only looks at one
+        bucket.
+
+        Args:
+            current_tick: Tick the wheel starts at (e.g. a minute stamp)
+        """
+        self.current_tick = current_tick
+        self._levels: List[List[Dict[int, list]]] = [
+            [{} for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)
+        ]
+        self._buckets: Dict[int, Dict[int, list]] = {}  # timer_id -> bucket holding it
+        self._ids = itertools.count(1)
+
+    def schedule(self, expiry_tick: int, callback: Callable, *args) -> int:
+        """
+        Schedule callback(*args) to run at expiry_tick
+
+        Returns:
+            Timer ID for cancel()
+        """
+        timer_id = next(self._ids)
+        self._place(timer_id, [expiry_tick, callback, args])
+        return timer_id
+
+    def cancel(self, timer_id: int) -> bool:
+        """Cancel a pending timer"""
+        bucket = self._buckets.pop(timer_id, None)
+        if bucket is None:
+            return False
+        del bucket[timer_id]
+        return True
+
+    def advance(self, tick: int) -> int:
+        """
+        Run every timer due up to and including tick
+
+        Returns:
+            Number of timers fired
+        """
+        fired = 0
+        while self.current_tick <= tick:
+            if not self._buckets:
+                self.current_tick = tick + 1
+                break
+
+            index = self.current_tick & WHEEL_MASK
+            if index == 0:
+                self._cascade()
+
+            bucket = self._levels[0][index]
+            while bucket:
+                timer_id, (expiry_tick, callback, args) = bucket.popitem()
+                del self._buckets[timer_id]
+                callback(*args)
+                fired += 1
+            self.current_tick += 1
+        return fired
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _place(self, timer_id: int, timer: list) -> None:
+        expiry_tick = max(timer[0], self.current_tick)
+        delta = expiry_tick - self.current_tick
+        level = 0
+        while level < WHEEL_LEVELS - 1 and delta >= 1 << (WHEEL_BITS * (level + 1)):
+            level += 1
+        if delta >= 1 << (WHEEL_BITS * WHEEL_LEVELS):
+            # Beyond the wheel's range; park in the furthest slot and re-place on cascade
+            expiry_tick = self.current_tick + (1 << (WHEEL_BITS * WHEEL_LEVELS)) - 1
+        bucket = self._levels[level][(expiry_tick >> (WHEEL_BITS * level)) & WHEEL_MASK]
+        bucket[timer_id] = timer
+        self._buckets[timer_id] = bucket
+
+    def _cascade(self) -> None:
+        """Move timers from higher levels down as the lower level wraps around"""
+        for level in range(1, WHEEL_LEVELS):
+            index = (self.current_tick >> (WHEEL_BITS * level)) & WHEEL_MASK
+            bucket = self._levels[level][index]
+            timers = list(bucket.items())
+            bucket.clear()
+            for timer_id, timer in timers:
+                self._place(timer_id, timer)
+            if index != 0:
+                break
+
+
+class AppointmentScheduler:
+    def __init__(self, hospital, reminder_hours: float = 24, no_show_grace_minutes: int = 30,
+                 on_reminder: Optional[Callable[[Appointment], None]] = None,
+                 now: Optional[datetime] = None):
+        """
+        Initialize the scheduler and arm timers for all active appointments
+
+        Args:
+            hospital: Hospital whose appointments are watched
+            reminder_hours: How long before an appointment the reminder fires
+            no_show_grace_minutes: How long after the slot ends an unattended
+                                   appointment is marked as a no-show
+            on_reminder: Called with the Appointment when its reminder is due
+            now: Starting time, defaults to the current time
+        """
+        self.hospital = hospital
+        self.reminder_minutes = int(reminder_hours * 60)
+        self.no_show_grace_minutes = no_show_grace_minutes
+        self.on_reminder = on_reminder
+        self.wheel = TimerWheel(minute_stamp(now or datetime.now()))
+        self._reminders: Dict[str, int] = {}  # appointment_id -> timer_id
+        self._no_shows: Dict[str, int] = {}  # appointment_id -> timer_id
+        self._armed: Dict[str, tuple] = {}  # appointment_id -> (date, time_slot, status) the timers were set for
+        self._reminded: Dict[str, tuple] = {}  # appointment_id -> (date, time_slot) whose reminder already fired
+
+        for appointment in list(hospital.appointments.values()):
+            self._arm(appointment)
+        hospital.subscribe(self._on_hospital_change)
+
+    def run_pending(self, now: Optional[datetime] = None) -> int:
+        """
+        Fire reminders and no-show updates that are due
+
+        Returns:
+            Number of timers fired
+        """
+        return self.wheel.advance(minute_stamp(now or datetime.now()))
+
+    def pending_count(self) -> int:
+        """Number of armed timers"""
+        return len(self.wheel)
+
+    def stop(self) -> None:
+        """Stop following hospital changes"""
+        self.hospital.unsubscribe(self._on_hospital_change)
+
+    def _on_hospital_change(self, entity: str, action: str, entity_id: str) -> None:
+        if entity != "appointment":
+            return
+        appointment = self.hospital.appointments.get(entity_id)
+        if action == "removed" or appointment is None:
+            self._disarm(entity_id)
+            self._armed.pop(entity_id, None)
+            self._reminded.pop(entity_id, None)
+        else:
+            self._arm(appointment)
+
+    def _arm(self, appointment: Appointment) -> None:
+        """(Re)schedule the timers for an appointment from its current date and status"""
+        appointment_id = appointment.appointment_id
+        key = (appointment.date, appointment.time_slot, appointment.status)
+        if self._armed.get(appointment_id) == key:
+            return  # A cost, note or other change that does not move the timers
+        self._armed[appointment_id] = key
+        self._disarm(appointment_id)
+        if appointment.status not in (AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED):
+            return
+
+        start = appointment.day * MINUTES_PER_DAY + appointment.start_minute
+        end = appointment.day * MINUTES_PER_DAY + appointment.end_minute
+        # A reminder that already went out is not sent again when, say, the appointment is confirmed
+        if start > self.wheel.current_tick and self._reminded.get(appointment_id) != key[:2]:
+            self._reminders[appointment_id] = self.wheel.schedule(
+                start - self.reminder_minutes, self._fire_reminder, appointment_id)
+        self._no_shows[appointment_id] = self.wheel.schedule(
+            end + self.no_show_grace_minutes, self._fire_no_show, appointment_id)
+
+    def _disarm(self, appointment_id: str) -> None:
+        for timers in (self._reminders, self._no_shows):
+            timer_id = timers.pop(appointment_id, None)
+            if timer_id is not None:
+                self.wheel.cancel(timer_id)
+
+    def _fire_reminder(self, appointment_id: str) -> None:
+        self._reminders.pop(appointment_id, None)
+        appointment = self.hospital.appointments.get(appointment_id)
+        if appointment is not None:
+            self._reminded[appointment_id] = (appointment.date, appointment.time_slot)
+        if appointment is not None and self.on_reminder is not None:
+            self.on_reminder(appointment)
+
+    def _fire_no_show(self, appointment_id: str) -> None:
+        self._no_shows.pop(appointment_id, None)
+        appointment = self.hospital.appointments.get(appointment_id)
+        if appointment is not None and appointment.status in (AppointmentStatus.SCHEDULED,
+                                                              AppointmentStatus.CONFIRMED):
+            appointment.update_status(AppointmentStatus.NO_SHOW, "Marked as no-show by scheduler")
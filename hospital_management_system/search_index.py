@@ -0,0 +1,238 @@
+"""
+Search Index for Hospital Management System
+In-memory inverted index with prefix and typo-tolerant matching over patient and doctor records.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+from typing import Dict, Iterable, List, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Score multipliers for the ways a query token can match an indexed token
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.5
+
+MAX_PREFIX_EXPANSIONS = 64  # Indexed tokens considered per prefix
+MIN_FUZZY_LENGTH = 4  # Shorter tokens are matched exactly or by prefix only
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def _deletions(token: str) -> Set[str]:
+    """All variants of a token with one character removed"""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Check whether two tokens differ by at most one insert, delete or substitution"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    def __init__(self):
+        """Initialize an empty search index"""
+        self._postings: Dict[str, Dict[str, float]] = {}  # token -> {key: field weight}
+        self._doc_tokens: Dict[str, List[str]] = {}  # key -> indexed tokens
+        self._sorted_tokens: List[str] = []  # For prefix lookups, may hold removed tokens
+        self._pending_tokens: List[str] = []  # New tokens not yet merged into _sorted_tokens
+        self._stale_tokens = 0
+        self._max_weight = 0.0
+        self._deletes: Dict[str, Set[str]] = {}  # one-deletion variant -> tokens, for typo matching
+        self._lock = threading.Lock()
+
+    def add(self, key: str, fields: Iterable[Tuple[str, float]]) -> None:
+        """
+        Index a record, replacing any previous version
+
+        Args:
+            key: Record ID
+            fields: (text, weight) pairs; name fields should weigh more than free text
+        """
+        weights: Dict[str, float] = {}
+        for text, weight in fields:
+            for token in tokenize(text):
+                if weight > weights.get(token, 0.0):
+                    weights[token] = weight
+
+        with self._lock:
+            self._remove(key)
+            self._add_weights(key, weights)
+
+    def extend(self, key: str, fields: Iterable[Tuple[str, float]]) -> None:
+        """Index additional text for a record without re-reading what is already indexed"""
+        weights: Dict[str, float] = {}
+        for text, weight in fields:
+            for token in tokenize(text):
+                if weight > weights.get(token, 0.0):
+                    weights[token] = weight
+
+        with self._lock:
+            tokens = self._doc_tokens.setdefault(key, [])
+            for token, weight in weights.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    self._add_token(token)
+                if key not in postings:
+                    tokens.append(token)
+                postings[key] = max(weight, postings.get(key, 0.0))
+            if weights:
+                self._max_weight = max(self._max_weight, max(weights.values()))
+
+    def remove(self, key: str) -> None:
+        """Remove a record from the index"""
+        with self._lock:
+            self._remove(key)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Find the best matching records
+
+        Every query token must match each result, either exactly, as a prefix
+        of an indexed token, or within one typo.
+
+        Returns:
+            Up to limit (key, score) pairs, best first
+        """
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+
+        with self._lock:
+            self._merge_pending()
+            expansions = [self._expand(token) for token in tokens]
+            if not all(expansions):
+                return []
+
+            # Start from the most selective token so later ones only probe survivors
+            expansions.sort(key=lambda matches: sum(len(self._postings[t]) for t, _ in matches))
+
+            # A single-token query can stop once limit records reach the best possible score
+            first = sorted(expansions[0], key=lambda match: -match[1])
+            ceiling = self._max_weight * first[0][1] if len(expansions) == 1 else float("inf")
+            top_hits = 0
+
+            scores: Dict[str, float] = {}
+            for token, factor in first:
+                for key, weight in self._postings[token].items():
+                    score = weight * factor
+                    if score > scores.get(key, 0.0):
+                        scores[key] = score
+                        if score >= ceiling:
+                            top_hits += 1
+                            if top_hits >= limit:
+                                break
+                if top_hits >= limit:
+                    break
+
+            for matches in expansions[1:]:
+                postings = [(self._postings[token], factor) for token, factor in matches]
+                survivors = {}
+                for key, score in scores.items():
+                    best = max((p[key] * factor for p, factor in postings if key in p), default=0.0)
+                    if best:
+                        survivors[key] = score + best
+                scores = survivors
+                if not scores:
+                    return []
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def _add_weights(self, key: str, weights: Dict[str, float]) -> None:
+        if weights:
+            self._max_weight = max(self._max_weight, max(weights.values()))
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._add_token(token)
+            postings[key] = weight
+        self._doc_tokens[key] = list(weights)
+
+    def _remove(self, key: str) -> None:
+        for token in self._doc_tokens.pop(key, ()):
+            postings = self._postings[token]
+            del postings[key]
+            if not postings:
+                del self._postings[token]
+                self._drop_token(token)
+
+    def _add_token(self, token: str) -> None:
+        self._pending_tokens.append(token)
+        if token.isalpha() and len(token) >= MIN_FUZZY_LENGTH:
+            for variant in _deletions(token):
+                self._deletes.setdefault(variant, set()).add(token)
+
+    def _drop_token(self, token: str) -> None:
+        self._stale_tokens += 1
+        if token.isalpha() and len(token) >= MIN_FUZZY_LENGTH:
+            for variant in _deletions(token):
+                tokens = self._deletes.get(variant)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._deletes[variant]
+
+    def _merge_pending(self) -> None:
+        """Fold new tokens into the sorted token list and purge removed ones"""
+        if self._stale_tokens > len(self._sorted_tokens) // 2:
+            live = [t for t in self._sorted_tokens if t in self._postings]
+            self._sorted_tokens = live
+            self._stale_tokens = 0
+        if not self._pending_tokens:
+            return
+        if len(self._pending_tokens) < 256:
+            for token in self._pending_tokens:
+                index = bisect.bisect_left(self._sorted_tokens, token)
+                if index == len(self._sorted_tokens) or self._sorted_tokens[index] != token:
+                    self._sorted_tokens.insert(index, token)
+        else:
+            self._sorted_tokens = sorted(set(self._sorted_tokens).union(self._pending_tokens))
+        self._pending_tokens = []
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Indexed tokens matching a query token, with their score multipliers"""
+        matches: Dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = EXACT_MATCH
+
+        start = bisect.bisect_left(self._sorted_tokens, token)
+        expanded = 0
+        for candidate in self._sorted_tokens[start:start + MAX_PREFIX_EXPANSIONS * 2]:
+            if not candidate.startswith(token) or expanded >= MAX_PREFIX_EXPANSIONS:
+                break
+            if candidate != token and candidate in self._postings:
+                matches[candidate] = PREFIX_MATCH
+                expanded += 1
+
+        if token.isalpha() and len(token) >= MIN_FUZZY_LENGTH:
+            variants = _deletions(token)
+            candidates = set(self._deletes.get(token, ()))
+            for variant in variants:
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._deletes.get(variant, ()))
+            for candidate in candidates:
+                if candidate not in matches and _within_one_edit(token, candidate):
+                    matches[candidate] = FUZZY_MATCH
+
+        return list(matches.items())
@@ -0,0 +1,74 @@
+"""
+Concurrency tests for the Booking Engine
+Many threads book, move, cancel and remove the same few times; nothing may be overbooked.
+"""
+
+import random
+import threading
+from typing import List
+
+import pytest
+
+from appointment import AppointmentStatus
+from booking import RELEASED_STATUSES
+from hospital import Hospital
+
+DATE = "2030-01-07"
+TIMES = ["09:00", "09:20", "09:40", "10:00", "10:20", "10:40", "11:00", "11:20", "13:00", "13:30", "15:00"]
+THREADS = 16
+ATTEMPTS = 2000
+
+
+@pytest.fixture
+def hospital() -> Hospital:
+    hospital = Hospital()
+    for i in range(4):
+        doctor_id = hospital.add_doctor(f"Doctor {i}", "General", f"555-02{i:02d}", "General Medicine")
+        hospital.doctors[doctor_id].add_schedule_slot(DATE, "09:00", "12:00", max_patients=5)
+        hospital.doctors[doctor_id].add_schedule_slot(DATE, "13:00", "14:00", max_patients=1)
+    for i in range(200):
+        hospital.add_patient(f"Patient {i}", 30, "Female", f"555-1{i:03d}")
+    return hospital
+
+
+def churn(hospital: Hospital, doctor_ids: List[str], patient_ids: List[str]) -> None:
+    """Random bookings, moves, cancellations, removals and reactivations; rejected ones are expected"""
+    rng = random.Random()
+    for _ in range(ATTEMPTS):
+        action = rng.random()
+        appointments = list(hospital.appointments.values())
+        try:
+            if action < 0.6 or not appointments:
+                hospital.book_appointment(rng.choice(patient_ids), rng.choice(doctor_ids), DATE, rng.choice(TIMES))
+            elif action < 0.85:
+                hospital.reschedule_appointment(rng.choice(appointments).appointment_id, DATE, rng.choice(TIMES))
+            elif action < 0.92:
+                hospital.cancel_appointment(rng.choice(appointments).appointment_id)
+            elif action < 0.95:
+                hospital.remove_appointment(rng.choice(appointments).appointment_id)
+            else:
+                rng.choice(appointments).update_status(AppointmentStatus.SCHEDULED)
+        except Exception:
+            pass
+
+
+def test_concurrent_changes_never_overbook(hospital: Hospital):
+    doctor_ids, patient_ids = list(hospital.doctors), list(hospital.patients)
+    workers = [threading.Thread(target=churn, args=(hospital, doctor_ids, patient_ids)) for _ in range(THREADS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    active = [a for a in hospital.appointments.values() if a.status not in RELEASED_STATUSES]
+    times = [(a.doctor_id, a.date, a.time_slot) for a in active]
+    assert len(times) == len(set(times)), "Two appointments hold the same doctor and time"
+
+    for doctor_id in doctor_ids:
+        for slot in hospital.doctors[doctor_id].schedule[DATE]:
+            booked = [a for a in active if a.doctor_id == doctor_id
+                      and slot['start_minute'] <= a.start_minute < slot['end_minute']]
+            assert slot['current_patients'] == len(booked) == len(slot['booked_patients']) <= slot['max_patients']
+
+    expected = sorted((a.day, a.start_minute, a.appointment_id) for a in hospital.appointments.values())
+    assert hospital._schedule_index == expected, "Schedule index out of step with the appointments"
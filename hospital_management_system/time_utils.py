@@ -0,0 +1,82 @@
+"""
+Date and Time Helpers for Hospital Management System
+Cached parsing of date and time strings into integers that compare and sort cheaply.
+"""
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+
+@lru_cache(maxsize=8192)
+def parse_date(value: str) -> int:
+    """
+    Convert a YYYY-MM-DD date to a day number
+
+    Day numbers are proleptic Gregorian ordinals, so consecutive days
+    differ by one and date.fromordinal() converts back.
+    """
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+@lru_cache(maxsize=4096)
+def parse_time(value: str) -> int:
+    """Convert an HH:MM time to minutes since midnight"""
+    try:
+        hours, minutes = value.strip().split(":")
+        result = int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid time '{value}', expected HH:MM")
+    if not 0 <= int(minutes) < 60 or not 0 <= result <= MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time '{value}', expected HH:MM")
+    return result
+
+
+@lru_cache(maxsize=4096)
+def parse_time_slot(value: str) -> Tuple[int, int]:
+    """
+    Convert an HH:MM-HH:MM slot (or a single HH:MM time) to (start, end) minutes
+
+    A single time gives a zero-length slot where start equals end.
+    """
+    if "-" in value:
+        start, end = value.split("-", 1)
+        start_minute, end_minute = parse_time(start), parse_time(end)
+        if end_minute < start_minute:
+            raise ValueError(f"Invalid time slot '{value}', end is before start")
+        return start_minute, end_minute
+    minute = parse_time(value)
+    return minute, minute
+
+
+@lru_cache(maxsize=8192)
+def format_date(day: int) -> str:
+    """Convert a day number back to YYYY-MM-DD"""
+    return date.fromordinal(day).isoformat()
+
+
+def format_time(minute: int) -> str:
+    """Convert minutes since midnight back to HH:MM"""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def today() -> int:
+    """Day number for the current date"""
+    return date.today().toordinal()
+
+
+def minute_stamp(moment: datetime) -> int:
+    """Minutes since the start of day number zero, comparable with day * MINUTES_PER_DAY + minute"""
+    return moment.toordinal() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def week_bounds(day: int) -> Tuple[int, int]:
+    """First (Monday) and last (Sunday) day numbers of the week containing day"""
+    start = day - date.fromordinal(day).weekday()
+    return start, start + 6
+
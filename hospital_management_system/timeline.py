@@ -0,0 +1,129 @@
+"""
+Patient Timeline for Hospital Management System
+Append-only, typed event log per patient with time-range queries and periodic snapshots.
+"""
+
+import bisect
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Event kinds recorded by Patient
+CONDITION = "condition"
+PRESCRIPTION = "prescription"
+
+
+class TimelineEvent:
+    __slots__ = ("timestamp", "kind", "data")
+
+    def __init__(self, timestamp: datetime, kind: str, data: Dict[str, Any]):
+        """
+        Initialize an immutable timeline event
+
+        Args:
+            timestamp: When the event happened
+            kind: Event type, e.g. "condition" or "prescription"
+            data: Event payload
+        """
+        self.timestamp = timestamp
+        self.kind = kind
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"TimelineEvent(timestamp='{self.timestamp:%Y-%m-%d %H:%M:%S}', kind='{self.kind}', data={self.data})"
+
+
+class PatientTimeline:
+    def __init__(self, snapshot_interval: int = 100):
+        """
+        Initialize an empty timeline
+
+        Args:
+            snapshot_interval: Number of events between materialized snapshots
+        """
+        self.snapshot_interval = snapshot_interval
+        self._events: List[TimelineEvent] = []
+        self._timestamps: List[datetime] = []  # Parallel to _events, for bisect
+        self._by_kind: Dict[str, List[TimelineEvent]] = {}
+        self._state: Dict[str, Dict[str, Any]] = {}  # Running per-kind state
+        self._snapshots: List[tuple] = []  # (event count, state copy)
+
+    def append(self, kind: str, data: Dict[str, Any], timestamp: Optional[datetime] = None) -> TimelineEvent:
+        """Record an event; O(1) unless it is older than the latest event"""
+        timestamp = timestamp or datetime.now()
+        event = TimelineEvent(timestamp, kind, data)
+
+        if not self._timestamps or timestamp >= self._timestamps[-1]:
+            self._events.append(event)
+            self._timestamps.append(timestamp)
+        else:
+            # Back-dated events keep the log ordered; snapshots after it are no longer valid
+            index = bisect.bisect_right(self._timestamps, timestamp)
+            self._events.insert(index, event)
+            self._timestamps.insert(index, timestamp)
+            self._snapshots = [s for s in self._snapshots if s[0] <= index]
+        self._by_kind.setdefault(kind, []).append(event)
+
+        state = self._state.setdefault(kind, {'count': 0, 'first': None, 'last': None})
+        state['count'] += 1
+        if state['first'] is None or timestamp < state['first']:
+            state['first'] = timestamp
+        if state['last'] is None or timestamp >= state['last']:
+            state['last'] = timestamp
+
+        if len(self._events) % self.snapshot_interval == 0:
+            self._snapshots.append((len(self._events), {k: dict(v) for k, v in self._state.items()}))
+        return event
+
+    def events(self, kind: Optional[str] = None, start: int = 0) -> List[TimelineEvent]:
+        """
+        Events in the order they were recorded
+
+        Args:
+            kind: Only return events of this kind
+            start: Skip this many events, so callers can fetch just what is new
+        """
+        events = self._events if kind is None else self._by_kind.get(kind, [])
+        return events[start:]
+
+    def between(self, start: datetime, end: datetime, kind: Optional[str] = None) -> List[TimelineEvent]:
+        """Events with start <= timestamp < end, oldest first"""
+        first = bisect.bisect_left(self._timestamps, start)
+        last = bisect.bisect_left(self._timestamps, end)
+        events = self._events[first:last]
+        if kind is not None:
+            events = [event for event in events if event.kind == kind]
+        return events
+
+    def count(self, kind: Optional[str] = None) -> int:
+        """Number of events, optionally of one kind"""
+        if kind is None:
+            return len(self._events)
+        return len(self._by_kind.get(kind, ()))
+
+    def snapshot(self, at: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-kind summary (count, first and last timestamp) as of a point in time
+
+        Starts from the nearest earlier snapshot and replays only the events after it.
+        """
+        if at is None:
+            return {kind: dict(state) for kind, state in self._state.items()}
+
+        limit = bisect.bisect_right(self._timestamps, at)
+        base_count, state = 0, {}
+        for count, saved in reversed(self._snapshots):
+            if count <= limit:
+                base_count, state = count, {k: dict(v) for k, v in saved.items()}
+                break
+
+        for event in self._events[base_count:limit]:
+            entry = state.setdefault(event.kind, {'count': 0, 'first': None, 'last': None})
+            entry['count'] += 1
+            if entry['first'] is None or event.timestamp < entry['first']:
+                entry['first'] = event.timestamp
+            if entry['last'] is None or event.timestamp >= entry['last']:
+                entry['last'] = event.timestamp
+        return state
+
+    def __len__(self) -> int:
+        return len(self._events)
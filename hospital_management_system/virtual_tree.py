@@ -0,0 +1,188 @@
+"""
+Virtual Treeview for Hospital Management System
+Windowed Treeview that keeps every row in memory but only materializes the visible ones.
+"""
+
+from tkinter import ttk
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class VirtualTreeview:
+    def __init__(self, parent, columns: Sequence[str], visible_rows: int = 20,
+                 row_height: int = 20):
+        """
+        Initialize a new virtual treeview
+
+        Args:
+            parent: Parent widget the treeview and scrollbar are packed into
+            columns: Column headings
+            visible_rows: Initial number of rows to materialize
+            row_height: Pixel height of a row, used to size the window on resize
+        """
+        self.tree = ttk.Treeview(parent, columns=tuple(columns), show='headings',
+                                 height=visible_rows, selectmode='browse')
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=100)
+
+        self.scrollbar = ttk.Scrollbar(parent, orient='vertical', command=self._on_scrollbar)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.row_height = row_height
+        self.visible_rows = visible_rows
+        self._order: List[str] = []  # Row keys in display order
+        self._rows: Dict[str, Tuple] = {}  # Row values by key
+        self._offset = 0
+        self._items: List[str] = []  # Materialized Treeview item IDs, reused on scroll
+        self._item_keys: List[str] = []  # Row key shown by each materialized item
+        self._selected_key: Optional[str] = None
+
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(3))
+        self.tree.bind('<Up>', lambda event: self._on_arrow(-1))
+        self.tree.bind('<Down>', lambda event: self._on_arrow(1))
+
+    def set_rows(self, rows: Iterable[Tuple[str, Tuple]]) -> None:
+        """Replace all rows with (key, values) pairs"""
+        self._order = []
+        self._rows = {}
+        for key, values in rows:
+            if key not in self._rows:
+                self._order.append(key)
+            self._rows[key] = tuple(values)
+        self._offset = min(self._offset, self._max_offset())
+        self._render()
+
+    def upsert(self, key: str, values: Tuple) -> None:
+        """Add a row or update it in place, touching only its materialized item"""
+        if key in self._rows:
+            self._rows[key] = tuple(values)
+            if key in self._item_keys:
+                index = self._item_keys.index(key)
+                self.tree.item(self._items[index], values=self._rows[key])
+            return
+
+        self._order.append(key)
+        self._rows[key] = tuple(values)
+        if len(self._order) - 1 < self._offset + self.visible_rows:
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def remove(self, key: str) -> None:
+        """Remove a row if present"""
+        if key not in self._rows:
+            return
+
+        position = self._order.index(key)
+        del self._order[position]
+        del self._rows[key]
+        if self._selected_key == key:
+            self._selected_key = None
+
+        if position < self._offset:
+            self._offset -= 1
+        self._offset = min(self._offset, self._max_offset())
+        if position < self._offset + self.visible_rows:
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def selected_key(self) -> Optional[str]:
+        """Get the key of the selected row"""
+        return self._selected_key
+
+    def scroll(self, rows: int) -> None:
+        """Scroll the window by a number of rows"""
+        self._scroll_to(self._offset + rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _max_offset(self) -> int:
+        return max(0, len(self._order) - self.visible_rows)
+
+    def _scroll_to(self, offset: int) -> None:
+        offset = max(0, min(offset, self._max_offset()))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _render(self) -> None:
+        """Materialize the rows inside the current window"""
+        keys = self._order[self._offset:self._offset + self.visible_rows]
+
+        # Grow or shrink the pool of Treeview items to the window size
+        while len(self._items) < len(keys):
+            self._items.append(self.tree.insert('', 'end'))
+        while len(self._items) > len(keys):
+            self.tree.delete(self._items.pop())
+
+        for item, key in zip(self._items, keys):
+            self.tree.item(item, values=self._rows[key])
+        self._item_keys = keys
+
+        if self._selected_key in keys:
+            item = self._items[keys.index(self._selected_key)]
+            if self.tree.selection() != (item,):
+                self.tree.selection_set(item)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        self._update_scrollbar()
+
+    def _update_scrollbar(self) -> None:
+        total = len(self._order)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self._offset / total
+        last = min(1.0, (self._offset + self.visible_rows) / total)
+        self.scrollbar.set(first, last)
+
+    def _on_scrollbar(self, *args) -> None:
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * len(self._order)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows
+            self.scroll(amount)
+
+    def _on_mousewheel(self, event) -> None:
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_arrow(self, step: int) -> str:
+        """Move the selection, scrolling past the window edge when needed"""
+        if self._selected_key in self._rows:
+            position = self._order.index(self._selected_key) + step
+        else:
+            position = self._offset
+        if 0 <= position < len(self._order):
+            self._selected_key = self._order[position]
+            if position < self._offset:
+                self._scroll_to(position)
+            elif position >= self._offset + self.visible_rows:
+                self._scroll_to(position - self.visible_rows + 1)
+            else:
+                self._render()
+        return 'break'
+
+    def _on_select(self, event) -> None:
+        selection = self.tree.selection()
+        if selection and selection[0] in self._items:
+            self._selected_key = self._item_keys[self._items.index(selection[0])]
+
+    def _on_resize(self, event) -> None:
+        rows = max(1, event.height // self.row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self._offset = min(self._offset, self._max_offset())
+            self._render()
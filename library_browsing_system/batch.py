@@ -0,0 +1,223 @@
+"""
+Batch mode for the Library System
+Runs a file (or stdin) of commands in one pass instead of the interactive menus,
+e.g. to load 100k books at once or to replay a recorded workload.
+
+One command per line, fields separated by "|" (quote a field that contains "|").
+ISBNs may be ISBN-10 or ISBN-13, with or without hyphens:
+    add | title | author | isbn | copies
+    remove | isbn
+    view | isbn
+    search | words
+    borrow | member name | isbn
+    return | member name | isbn
+    loans | member name
+    hold | member name | isbn
+    cancel_hold | member name | isbn
+    holds | member name
+    popular | how many
+    recommend | member name
+    borrowers | isbn
+    overdue
+Blank lines and lines starting with # are skipped.
+
+Usage:
+    python batch.py commands.txt
+    python batch.py - < commands.txt
+    python batch.py --generate 100000 > commands.txt
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import random
+import sys
+import time
+
+from isbn import canonical_isbn, make_isbn
+from main import LibrarySystem
+from user import Admin
+
+OUTPUT_CHUNK = 10000  # result lines collected before one write to the output
+
+
+def printed(function, *args):
+    """Run a menu method that prints its result, and return the printed text instead"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        function(*args)
+    return buffer.getvalue().rstrip("\n")
+
+
+class BatchRunner:
+    def __init__(self, system, output=None):
+        self.system = system
+        self.admin = Admin("batch", "Admin")
+        self.output = output
+        self.pending = []
+        self.commands = 0
+        self.errors = 0
+        self.handlers = {
+            "add": (4, self.add),
+            "remove": (1, self.remove),
+            "view": (1, self.view),
+            "search": (1, self.search),
+            "borrow": (2, self.borrow),
+            "return": (2, self.give_back),
+            "loans": (1, self.loans),
+            "hold": (2, self.hold),
+            "cancel_hold": (2, self.cancel_hold),
+            "holds": (1, self.holds),
+            "popular": (1, self.popular),
+            "recommend": (1, self.recommend),
+            "borrowers": (1, self.borrowers),
+            "overdue": (0, self.overdue),
+        }
+
+    def run(self, lines):
+        for line_number, fields in enumerate(csv.reader(lines, delimiter="|", skipinitialspace=True), 1):
+            fields = [field.strip() for field in fields]
+            if not fields or not fields[0] or fields[0].startswith("#"):
+                continue
+            self.commands += 1
+            try:
+                result = self.execute(fields)
+            except (ValueError, KeyError) as e:
+                self.errors += 1
+                result = f"line {line_number}: error: {e}"
+            self.write(result)
+        self.flush()
+
+    def execute(self, fields):
+        command = fields[0].lower()
+        if command not in self.handlers:
+            raise ValueError(f"unknown command '{fields[0]}'")
+        count, handler = self.handlers[command]
+        if len(fields) - 1 != count:
+            raise ValueError(f"'{command}' takes {count} field(s), got {len(fields) - 1}")
+        return handler(*fields[1:])
+
+    def write(self, text):
+        if self.output is None:
+            return
+        self.pending.append(text)
+        if len(self.pending) >= OUTPUT_CHUNK:
+            self.flush()
+
+    def flush(self):
+        if self.output is not None and self.pending:
+            self.output.write("\n".join(self.pending) + "\n")
+            self.pending = []
+
+    # ---- commands ----
+
+    def add(self, title, author, isbn, copies):
+        return self.admin.add_book(title, author, canonical_isbn(isbn), int(copies), self.system.book_inventory)
+
+    def remove(self, isbn):
+        return self.admin.remove_book(canonical_isbn(isbn), self.system.book_inventory)
+
+    def view(self, isbn):
+        return self.admin.view_books(canonical_isbn(isbn), self.system.book_inventory)
+
+    def search(self, words):
+        return printed(self.admin.search_books, words, self.system.book_inventory)
+
+    def borrow(self, name, isbn):
+        member = self.system.get_member(name)
+        return member.borrow_book(canonical_isbn(isbn), self.system.book_inventory, self.system.loans)
+
+    def give_back(self, name, isbn):
+        member = self.system.get_member(name)
+        return member.return_book(canonical_isbn(isbn), self.system.book_inventory, self.system.loans,
+                                  self.system.holds)
+
+    def hold(self, name, isbn):
+        return self.system.get_member(name).place_hold(canonical_isbn(isbn), self.system.book_inventory,
+                                                       self.system.holds)
+
+    def cancel_hold(self, name, isbn):
+        return self.system.get_member(name).cancel_hold(canonical_isbn(isbn), self.system.holds)
+
+    def holds(self, name):
+        return printed(self.system.get_member(name).view_my_holds, self.system.holds)
+
+    def popular(self, k):
+        return printed(self.admin.view_popular_books, self.system.popular, self.system.book_inventory, int(k))
+
+    def recommend(self, name):
+        return printed(self.system.get_member(name).view_recommendations, self.system.loans,
+                       self.system.recommendations, self.system.book_inventory)
+
+    def loans(self, name):
+        return printed(self.system.get_member(name).view_my_loans, self.system.loans)
+
+    def borrowers(self, isbn):
+        return printed(self.admin.view_borrowers, canonical_isbn(isbn), self.system.loans)
+
+    def overdue(self):
+        return printed(self.admin.view_overdue_loans, self.system.loans)
+
+
+def generate_commands(count, output, seed=1):
+    """Write a sample workload: count books, then a mix of borrows, returns, views and searches"""
+    rng = random.Random(seed)
+    words = ["river", "night", "garden", "empire", "code", "stone", "winter", "light", "city", "dream"]
+    lines = []
+    for i in range(count):
+        title = " ".join(rng.choice(words).title() for _ in range(rng.randint(1, 3)))
+        lines.append(f"add | {title} | Author {i % 997} | {make_isbn(i)} | {rng.randint(1, 5)}")
+    members = [f"Member {i}" for i in range(max(1, count // 100))]
+    borrowed = []
+    for _ in range(count):
+        action = rng.random()
+        if action < 0.5 or not borrowed:
+            member, isbn = rng.choice(members), make_isbn(rng.randrange(count))
+            borrowed.append((member, isbn))
+            lines.append(f"borrow | {member} | {isbn}")
+        elif action < 0.8:
+            member, isbn = borrowed.pop(rng.randrange(len(borrowed)))
+            lines.append(f"return | {member} | {isbn}")
+        elif action < 0.99:
+            lines.append(f"view | {make_isbn(rng.randrange(count))}")
+        else:
+            lines.append(f"search | {rng.choice(words)} {rng.choice(words)[:3]}")
+        if len(lines) >= OUTPUT_CHUNK:
+            output.write("\n".join(lines) + "\n")
+            lines = []
+    output.write("\n".join(lines) + "\n" if lines else "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Library System commands from a file or stdin")
+    parser.add_argument("commands", nargs="?", default="-", help="command file, or - for stdin (default)")
+    parser.add_argument("--data-dir", default="library_data", help="where books and loans are stored")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    parser.add_argument("--generate", type=int, metavar="N", help="print a sample workload of N books instead")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        generate_commands(args.generate, sys.stdout)
+        return 0
+
+    system = LibrarySystem(args.data_dir)
+    runner = BatchRunner(system, None if args.quiet else sys.stdout)
+    started = time.perf_counter()
+    try:
+        if args.commands == "-":
+            runner.run(sys.stdin)
+        else:
+            with open(args.commands, encoding="utf-8", newline="") as file:
+                runner.run(file)
+    finally:
+        system.close()
+    elapsed = time.perf_counter() - started
+    print(f"Ran {runner.commands} commands in {elapsed:.2f}s "
+          f"({runner.commands / elapsed if elapsed else 0:,.0f} commands/sec), {runner.errors} errors",
+          file=sys.stderr)
+    return 1 if runner.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
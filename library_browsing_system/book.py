@@ -9,14 +9,28 @@ Methods:
 Getters for each detail (e.g. get_title())
 borrow_copy()
 return_copy()
+attach_store(store) - copy count changes are then saved to the BookStore right away
+watch_stock(listener) - listener(book, in_stock) is called when the last copy is taken or the first comes back
+
+borrow_copy() and return_copy() are safe to call from many threads at once:
+each ISBN maps to one of COPY_LOCKS, so checking and changing the copies is one step.
 """
 
+import threading
+
+# Lock striping: books share a fixed pool of locks instead of one lock each,
+# which keeps memory flat for large catalogs while different ISBNs rarely wait on each other
+COPY_LOCKS = [threading.Lock() for _ in range(1024)]
+
 class Book:
     def __init__(self, title, author, isbn, available_copies):
         self.__title = title
         self.__author = author
         self.__isbn = isbn
         self.__available_copies = available_copies
+        self.__store = None
+        self.__stock_listener = None
+        self.__lock = COPY_LOCKS[hash(isbn) % len(COPY_LOCKS)]
 
     def get_title(self):
         return self.__title
@@ -31,15 +45,67 @@ class Book:
         return self.__available_copies
 
     def borrow_copy(self):
-        if self.__available_copies > 0:
-            self.__available_copies -= 1
+        if self.reserve_copy():
             return "Book issued successfully!"
         else:
             return "Book is currently out of stock."
 
+    def reserve_copy(self):
+        """Take one copy if any is left; returns True if a copy was taken"""
+        with self.__lock:
+            if self.__available_copies <= 0:
+                return False
+            self.__available_copies -= 1
+            self.__save_copies()
+            if self.__available_copies == 0 and self.__stock_listener is not None:
+                self.__stock_listener(self, False)
+            return True
+
     def return_copy(self):
-        self.__available_copies += 1
+        with self.__lock:
+            self.__available_copies += 1
+            self.__save_copies()
+            if self.__available_copies == 1 and self.__stock_listener is not None:
+                self.__stock_listener(self, True)
         return "Book returned successfully!"
 
+    def attach_store(self, store):
+        self.__store = store
+
+    def watch_stock(self, listener):
+        self.__stock_listener = listener
+
+    def __save_copies(self):
+        if self.__store is not None:
+            self.__store.update_copies(self.__isbn, self.__available_copies)
+
     def __str__(self):
         return f"{self.__title} by {self.__author} (ISBN: {self.__isbn}) - Copies: {self.__available_copies}"
+
+
+def benchmark(threads=8, attempts=200000):
+    """Borrow+return throughput when every thread works on its own books (the thread-safety checks are in test_book.py)"""
+    import time
+
+    for count in (1, threads):
+        books = [[Book(f"Book {n}-{i}", "Author", n * 1000000 + i, 1) for i in range(1000)] for n in range(count)]
+
+        def borrow_and_return(own_books):
+            for _ in range(attempts // count // 1000):
+                for own in own_books:
+                    own.reserve_copy()
+                    own.return_copy()
+
+        workers = [threading.Thread(target=borrow_and_return, args=(books[n],)) for n in range(count)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        done = count * (attempts // count // 1000) * 1000
+        print(f"Distinct ISBNs, {count} thread(s): {done / elapsed:,.0f} borrow+return pairs/sec")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,382 @@
+"""
+BookStore class
+Keeps the library's books on disk so they are still there after the program exits.
+
+Files (inside one directory):
+- books.dat: a small header followed by one fixed-width record per book
+- books.idx: a hash table from ISBN to record number (the sidecar index)
+
+Both files are memory-mapped. Opening the store only reads the two headers,
+a book is found through the index without reading any other record, and
+borrowing or returning a copy overwrites just that record's copy count.
+Removed books are only marked as removed, their record is not reused.
+
+Books of different ISBNs save their copy counts from different threads at
+once, while add() may remap the files underneath them, so every access to
+the maps goes through the store's lock.
+
+Methods:
+add(book), add_many(books), remove(isbn), get(isbn), update_copies(isbn, copies)
+books(), isbns(), flush(), close()
+"""
+
+import mmap
+import os
+import struct
+import threading
+
+from book import Book
+
+DATA_MAGIC = b"LIBBOOK1"
+INDEX_MAGIC = b"LIBIDX01"
+
+# Data file header: magic, records used (including removed ones), books stored
+DATA_HEADER = struct.Struct("<8sQQ")
+# Index file header: magic, number of slots, slots used, records used in the data file when last updated
+INDEX_HEADER = struct.Struct("<8sQQQ")
+HEADER_SIZE = 64
+
+# One book: stored flag, available copies, ISBN, title, author (272 bytes)
+RECORD = struct.Struct("<BxxxiQ160s96s")
+TITLE_SIZE = 160
+AUTHOR_SIZE = 96
+COPIES = struct.Struct("<i")
+COPIES_OFFSET = 4
+
+# One index slot: ISBN, record number + 1 (0 = empty slot, REMOVED = book was removed)
+ENTRY = struct.Struct("<QQ")
+REMOVED = 0xFFFFFFFFFFFFFFFF
+
+INITIAL_RECORDS = 1024
+INITIAL_SLOTS = 2048
+MAX_LOAD = 0.6          # grow the index when more than this share of slots is used
+READ_CHUNK = 10000      # records unpacked at a time by books()
+
+
+def fit(text, size):
+    """Encode text as UTF-8 and cut it to size bytes without splitting a character"""
+    data = str(text).encode("utf-8")
+    if len(data) > size:
+        data = data[:size].decode("utf-8", "ignore").encode("utf-8")
+    return data
+
+
+def unfit(data):
+    return data.rstrip(b"\x00").decode("utf-8")
+
+
+class BookStore:
+    def __init__(self, directory="library_data"):
+        os.makedirs(directory, exist_ok=True)
+        self.__data_path = os.path.join(directory, "books.dat")
+        self.__index_path = os.path.join(directory, "books.idx")
+        self.__data = None
+        self.__index = None
+        self.__lock = threading.RLock()
+        self.__open_data()
+        self.__open_index()
+
+    # ---- opening files ----
+
+    def __open_data(self):
+        if not os.path.exists(self.__data_path) or os.path.getsize(self.__data_path) == 0:
+            with open(self.__data_path, "wb") as file:
+                file.write(DATA_HEADER.pack(DATA_MAGIC, 0, 0).ljust(HEADER_SIZE, b"\x00"))
+                file.truncate(HEADER_SIZE + INITIAL_RECORDS * RECORD.size)
+        self.__data_file = open(self.__data_path, "r+b")
+        self.__data = mmap.mmap(self.__data_file.fileno(), 0)
+        magic, self.__used, self.__live = DATA_HEADER.unpack_from(self.__data, 0)
+        if magic != DATA_MAGIC:
+            self.close()
+            raise ValueError(f"{self.__data_path} is not a book store file")
+        self.__capacity = (len(self.__data) - HEADER_SIZE) // RECORD.size
+
+    def __open_index(self):
+        """Map the index, rebuilding it from the data file if it is missing or out of date"""
+        if os.path.exists(self.__index_path) and os.path.getsize(self.__index_path) >= HEADER_SIZE:
+            self.__map_index()
+            magic, slots, self.__slots_used, synced = INDEX_HEADER.unpack_from(self.__index, 0)
+            if magic == INDEX_MAGIC and synced == self.__used and slots == self.__slots:
+                return
+        # A crash between writing the data file and the index leaves them out of step
+        self.__rebuild_index(self.__stored_entries(), self.__live)
+
+    def __map_index(self):
+        if self.__index is not None:
+            self.__index.close()
+            self.__index_file.close()
+        self.__index_file = open(self.__index_path, "r+b")
+        self.__index = mmap.mmap(self.__index_file.fileno(), 0)
+        self.__slots = (len(self.__index) - HEADER_SIZE) // ENTRY.size
+        self.__shift = 64 - (self.__slots.bit_length() - 1)
+
+    def __rebuild_index(self, entries, count):
+        """Write a new index holding the given (isbn, record) pairs and swap it in"""
+        slots = INITIAL_SLOTS
+        while count >= slots * MAX_LOAD / 2:
+            slots *= 2
+        shift = 64 - (slots.bit_length() - 1)
+        mask = slots - 1
+        table = bytearray(HEADER_SIZE + slots * ENTRY.size)
+        for isbn, record in entries:
+            slot = ((isbn * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> shift
+            while ENTRY.unpack_from(table, HEADER_SIZE + slot * ENTRY.size)[1]:
+                slot = (slot + 1) & mask
+            ENTRY.pack_into(table, HEADER_SIZE + slot * ENTRY.size, isbn, record + 1)
+        INDEX_HEADER.pack_into(table, 0, INDEX_MAGIC, slots, count, self.__used)
+
+        temporary = self.__index_path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(table)
+        os.replace(temporary, self.__index_path)
+        self.__map_index()
+        self.__slots_used = count
+
+    def __stored_entries(self):
+        record = 0
+        for flag, copies, isbn, title, author in self.__records():
+            if flag:
+                yield isbn, record
+            record += 1
+
+    def __records(self):
+        start = 0
+        while True:
+            # Take the lock per chunk, not across the yields, so readers don't hold up borrowing
+            with self.__lock:
+                end = min(start + READ_CHUNK, self.__used)
+                chunk = self.__data[HEADER_SIZE + start * RECORD.size:HEADER_SIZE + end * RECORD.size]
+            if start >= end:
+                return
+            yield from RECORD.iter_unpack(chunk)
+            start = end
+
+    # ---- index lookups ----
+
+    def __find(self, isbn):
+        """Record number of isbn (-1 if not stored) and the index slot where the search stopped"""
+        slot = ((isbn * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self.__shift
+        mask = self.__slots - 1
+        while True:
+            key, value = ENTRY.unpack_from(self.__index, HEADER_SIZE + slot * ENTRY.size)
+            if value == 0:
+                return -1, slot
+            if key == isbn and value != REMOVED:
+                return value - 1, slot
+            slot = (slot + 1) & mask
+
+    def __offset(self, record):
+        return HEADER_SIZE + record * RECORD.size
+
+    def __write_headers(self):
+        DATA_HEADER.pack_into(self.__data, 0, DATA_MAGIC, self.__used, self.__live)
+        INDEX_HEADER.pack_into(self.__index, 0, INDEX_MAGIC, self.__slots, self.__slots_used, self.__used)
+
+    # ---- adding, removing and updating ----
+
+    def add(self, book):
+        """Store a new book; returns False if its ISBN is already stored"""
+        isbn = book.get_isbn()
+        if not isinstance(isbn, int) or not 0 <= isbn < REMOVED:
+            raise ValueError(f"ISBN must be a non-negative integer, got {isbn!r}")
+        with self.__lock:
+            record, slot = self.__find(isbn)
+            if record >= 0:
+                return False
+
+            if self.__used == self.__capacity:
+                self.__grow_data()
+            record = self.__used
+            RECORD.pack_into(self.__data, self.__offset(record), 1, book.get_available_copies(), isbn,
+                             fit(book.get_title(), TITLE_SIZE), fit(book.get_author(), AUTHOR_SIZE))
+            self.__used += 1
+            self.__live += 1
+
+            ENTRY.pack_into(self.__index, HEADER_SIZE + slot * ENTRY.size, isbn, record + 1)
+            self.__slots_used += 1
+            self.__write_headers()
+            if self.__slots_used > self.__slots * MAX_LOAD:
+                self.__rebuild_index(self.__stored_entries(), self.__live)
+        book.attach_store(self)
+        return True
+
+    def add_many(self, books):
+        """
+        Store many new books whose ISBNs are not stored yet (e.g. from the importer).
+        The data file grows once, and if the index would need to grow it is
+        rebuilt once at the end instead of being resized along the way.
+        """
+        books = list(books)
+        if not books:
+            return 0
+        for book in books:
+            isbn = book.get_isbn()
+            if not isinstance(isbn, int) or not 0 <= isbn < REMOVED:
+                raise ValueError(f"ISBN must be a non-negative integer, got {isbn!r}")
+        with self.__lock:
+            while self.__used + len(books) > self.__capacity:
+                self.__grow_data()
+
+            first = self.__used
+            offset = self.__offset(first)
+            for book in books:
+                RECORD.pack_into(self.__data, offset, 1, book.get_available_copies(), book.get_isbn(),
+                                 fit(book.get_title(), TITLE_SIZE), fit(book.get_author(), AUTHOR_SIZE))
+                offset += RECORD.size
+            self.__used += len(books)
+            self.__live += len(books)
+
+            if self.__slots_used + len(books) > self.__slots * MAX_LOAD:
+                self.__rebuild_index(self.__stored_entries(), self.__live)
+            else:
+                for record, book in enumerate(books, first):
+                    slot = self.__find(book.get_isbn())[1]
+                    ENTRY.pack_into(self.__index, HEADER_SIZE + slot * ENTRY.size, book.get_isbn(), record + 1)
+                self.__slots_used += len(books)
+            self.__write_headers()
+        for book in books:
+            book.attach_store(self)
+        return len(books)
+
+    def remove(self, isbn):
+        """Mark a book as removed; returns False if it is not stored"""
+        with self.__lock:
+            record, slot = self.__find(isbn)
+            if record < 0:
+                return False
+            self.__data[self.__offset(record)] = 0
+            ENTRY.pack_into(self.__index, HEADER_SIZE + slot * ENTRY.size, isbn, REMOVED)
+            self.__live -= 1
+            self.__write_headers()
+            return True
+
+    def update_copies(self, isbn, copies):
+        """Overwrite the available copies of one book in place"""
+        with self.__lock:
+            record = self.__find(isbn)[0]
+            if record < 0:
+                return False
+            COPIES.pack_into(self.__data, self.__offset(record) + COPIES_OFFSET, copies)
+            return True
+
+    def __grow_data(self):
+        """Double the data file and map it again"""
+        self.__capacity *= 2
+        self.__data.close()
+        self.__data_file.truncate(HEADER_SIZE + self.__capacity * RECORD.size)
+        self.__data = mmap.mmap(self.__data_file.fileno(), 0)
+
+    # ---- reading ----
+
+    def get(self, isbn):
+        """The stored book with this ISBN as a Book, or None"""
+        with self.__lock:
+            record = self.__find(isbn)[0]
+            if record < 0:
+                return None
+            flag, copies, isbn, title, author = RECORD.unpack_from(self.__data, self.__offset(record))
+        book = Book(unfit(title), unfit(author), isbn, copies)
+        book.attach_store(self)
+        return book
+
+    def books(self):
+        """Every stored book, in the order they were added"""
+        for flag, copies, isbn, title, author in self.__records():
+            if flag:
+                book = Book(unfit(title), unfit(author), isbn, copies)
+                book.attach_store(self)
+                yield book
+
+    def isbns(self):
+        """Every stored ISBN, read from the index without touching the book records"""
+        size = READ_CHUNK * ENTRY.size
+        start = HEADER_SIZE
+        while True:
+            with self.__lock:
+                chunk = self.__index[start:start + size]
+            if not chunk:
+                return
+            for isbn, value in ENTRY.iter_unpack(chunk):
+                if value and value != REMOVED:
+                    yield isbn
+            start += size
+
+    def __contains__(self, isbn):
+        if not isinstance(isbn, int) or not 0 <= isbn < REMOVED:
+            return False
+        with self.__lock:
+            return self.__find(isbn)[0] >= 0
+
+    def __len__(self):
+        return self.__live
+
+    # ---- saving ----
+
+    def flush(self):
+        """Force changes to disk (the OS writes them back on its own otherwise)"""
+        with self.__lock:
+            self.__data.flush()
+            self.__index.flush()
+
+    def close(self):
+        with self.__lock:
+            self.__close()
+
+    def __close(self):
+        if self.__data is not None and not self.__data.closed:
+            self.__data.flush()
+            self.__data.close()
+            self.__data_file.close()
+        if self.__index is not None and not self.__index.closed:
+            self.__index.flush()
+            self.__index.close()
+            self.__index_file.close()
+
+    def __str__(self):
+        return f"Book store with {self.__live} books in {self.__data_path}"
+
+
+def benchmark(count=1000000):
+    import random
+    import shutil
+    import tempfile
+    import time
+
+    directory = tempfile.mkdtemp(prefix="book_store_")
+    store = BookStore(directory)
+    started = time.perf_counter()
+    for isbn in range(9780000000000, 9780000000000 + count):
+        store.add(Book(f"Title {isbn}", f"Author {isbn % 5000}", isbn, 3))
+    store.close()
+    print(f"Stored {count} books in {time.perf_counter() - started:.1f}s "
+          f"({os.path.getsize(os.path.join(directory, 'books.dat')) // 1024 // 1024}MB)")
+
+    started = time.perf_counter()
+    store = BookStore(directory)
+    print(f"Opened store: {(time.perf_counter() - started) * 1000:.2f}ms")
+
+    rng = random.Random(1)
+    isbns = [rng.randrange(9780000000000, 9780000000000 + count) for _ in range(100000)]
+    started = time.perf_counter()
+    for isbn in isbns:
+        store.get(isbn).borrow_copy()
+    elapsed = time.perf_counter() - started
+    print(f"Lookup + borrow in place: {elapsed / len(isbns) * 1e6:.1f}us per book")
+    store.close()
+
+    store = BookStore(directory)
+    borrowed = sum(3 - store.get(isbn).get_available_copies() for isbn in set(isbns))
+    expected = sum(min(isbns.count(isbn), 3) for isbn in set(isbns))
+    print(f"After reopening, {borrowed} copies are still borrowed (expected {expected})")
+
+    os.remove(os.path.join(directory, "books.idx"))
+    store.close()
+    started = time.perf_counter()
+    store = BookStore(directory)
+    print(f"Rebuilt missing index for {len(store)} books: {time.perf_counter() - started:.1f}s")
+    store.close()
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    benchmark()
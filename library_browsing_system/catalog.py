@@ -0,0 +1,606 @@
+"""
+Catalog class
+Holds all books of the library, keyed by ISBN, together with search indexes.
+
+It can be used wherever a book_inventory dict was used before
+(isbn in catalog, catalog[isbn], catalog[isbn] = book, del catalog[isbn], items()),
+and the indexes are updated on every add and remove.
+
+With a BookStore the catalog is persistent: added and removed books are
+written to the store, single books are read from it on demand, and the
+whole store is only read (and indexed) the first time a search, listing
+or sorted view needs every book.
+
+Indexes:
+- inverted index: title/author word -> set of ISBNs
+- sorted word list for prefix search (re-sorted only after new words were added)
+- sorted views by title and by author (new books are merged in when a view is read)
+- available: ISBNs with at least one copy on the shelf; each book reports when
+  its last copy is taken or the first one comes back, so the set is never rebuilt
+- sorted views by title and by author of just the available books, updated on
+  the same reports, so an "available only" page never walks past books that are out
+
+Listings are generators that walk a sorted view from a cursor, so showing one
+page of a large catalog only touches that page's books (plus any skipped by
+the filters), instead of sorting and printing the whole inventory.
+
+Methods:
+add_book(book), remove_book(isbn), get_book(isbn)
+search(query), search_prefix(prefix)
+sorted_by_title(), sorted_by_author(), sorted_by_availability()
+iter_books(order, available_only, author, title_from, title_to), books_page(page_size, cursor, ...)
+"""
+
+import bisect
+import heapq
+import itertools
+import re
+import threading
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# A short prefix such as "a" matches a huge number of words; stop expanding after this many
+MAX_PREFIX_WORDS = 2000
+
+
+# Up to this many new books are inserted into the sorted views one by one; more trigger a full re-sort
+MAX_PENDING_INSERTS = 64
+
+PAGE_SIZE = 20
+LAST_CHARACTER = chr(0x10FFFF)  # sorts after any character, so "c" + LAST_CHARACTER comes after every title starting with "c"
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def title_key(book):
+    return book.get_title().lower()
+
+
+def author_key(book):
+    return book.get_author().lower() + "\x00" + book.get_title().lower()
+
+
+def in_title_range(book, low, high):
+    key = title_key(book)
+    return key >= low and (high is None or key < high)
+
+
+class SortedView:
+    """
+    ISBNs kept in order of a string key, as two parallel lists so bisect works on plain strings.
+    The ISBN is added to the end of each key, so every key is unique and can be used as a cursor.
+    Changes and each step of walk() hold the lock, since books change stock from many threads.
+    """
+
+    def __init__(self, key_of, lock=None):
+        self.key_of = key_of
+        self.lock = lock or threading.RLock()
+        self.keys = []
+        self.isbns = []
+
+    def full_key(self, isbn, book):
+        return f"{self.key_of(book)}\x00{isbn!s:>13}"
+
+    def rebuild(self, books):
+        keys = [self.full_key(isbn, book) for isbn, book in books.items()]
+        isbns = list(books)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        with self.lock:
+            self.keys = [keys[i] for i in order]
+            self.isbns = [isbns[i] for i in order]
+
+    def insert(self, isbn, book):
+        key = self.full_key(isbn, book)
+        with self.lock:
+            position = bisect.bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                return
+            self.keys.insert(position, key)
+            self.isbns.insert(position, isbn)
+
+    def remove(self, isbn, book):
+        key = self.full_key(isbn, book)
+        with self.lock:
+            position = bisect.bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                del self.keys[position]
+                del self.isbns[position]
+
+    def books(self, books, start=""):
+        position = bisect.bisect_left(self.keys, start.lower())
+        while position < len(self.keys):
+            yield books[self.isbns[position]]
+            position += 1
+
+    def walk(self, start="", stop=None, after=None):
+        """(key, isbn) pairs with start <= key < stop in order, continuing after the key `after` if given"""
+        with self.lock:
+            if after is not None and after >= start:
+                position = bisect.bisect_right(self.keys, after)
+            else:
+                position = bisect.bisect_left(self.keys, start)
+        while True:
+            with self.lock:
+                if position >= len(self.keys):
+                    return
+                key, isbn = self.keys[position], self.isbns[position]
+            if stop is not None and key >= stop:
+                return
+            yield key, isbn
+            # Books may have been added or removed while the caller had this one; find the place again
+            with self.lock:
+                if position < len(self.keys) and self.keys[position] == key:
+                    position += 1
+                else:
+                    position = bisect.bisect_right(self.keys, key)
+
+
+class Catalog:
+    def __init__(self, store=None):
+        self.__store = store
+        self.__loaded = store is None  # True once every stored book is in self.__books
+        self.__store_lock = threading.Lock()  # two users must not read the same stored book into two Book objects
+        self.__books = {}            # isbn -> Book
+        self.__title_index = {}      # word -> set of ISBNs
+        self.__author_index = {}     # word -> set of ISBNs
+        self.__words = []            # sorted words of both indexes, for prefix search
+        self.__new_words = False
+        self.__views_lock = threading.RLock()  # stock changes arrive from borrowing threads
+        self.__by_title = SortedView(title_key, self.__views_lock)
+        self.__by_author = SortedView(author_key, self.__views_lock)
+        self.__available_by_title = SortedView(title_key, self.__views_lock)    # only books on the shelf
+        self.__available_by_author = SortedView(author_key, self.__views_lock)
+        self.__pending = {}          # ISBNs added since the sorted views were last read
+        self.__available = set()     # ISBNs with at least one copy on the shelf
+
+    # ---- dict-style access, so existing code using book_inventory keeps working ----
+
+    def __contains__(self, isbn):
+        if isbn in self.__books:
+            return True
+        return not self.__loaded and isbn in self.__store
+
+    def __getitem__(self, isbn):
+        book = self.get_book(isbn)
+        if book is None:
+            raise KeyError(isbn)
+        return book
+
+    def __setitem__(self, isbn, book):
+        if isbn in self:  # also a stored book that was not read into memory yet
+            self.remove_book(isbn)
+        self.add_book(book, isbn)
+
+    def __delitem__(self, isbn):
+        if self.remove_book(isbn) is None:
+            raise KeyError(isbn)
+
+    def __len__(self):
+        return len(self.__books) if self.__loaded else len(self.__store)
+
+    def __iter__(self):
+        self.__load()
+        return iter(self.__books)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def items(self):
+        self.__load()
+        return self.__books.items()
+
+    def values(self):
+        self.__load()
+        return self.__books.values()
+
+    def get(self, isbn, default=None):
+        book = self.get_book(isbn)
+        return default if book is None else book
+
+    # ---- adding and removing ----
+
+    def add_book(self, book, isbn=None):
+        if isbn is None:
+            isbn = book.get_isbn()
+        if isbn in self:
+            return False
+        self.__remember(isbn, book)
+        if self.__store is not None:
+            self.__store.add(book)
+        return True
+
+    def add_books(self, books):
+        """Add many books at once; returns how many were new. The store writes them all in one go."""
+        new_books = []
+        for book in books:
+            isbn = book.get_isbn()
+            if isbn not in self:
+                self.__remember(isbn, book)
+                new_books.append(book)
+        if self.__store is not None:
+            self.__store.add_many(new_books)
+        return len(new_books)
+
+    def isbns(self):
+        """Every ISBN in the catalog, without reading the books from the store"""
+        if self.__loaded:
+            return iter(list(self.__books))
+        return self.__store.isbns()
+
+    def remove_book(self, isbn):
+        if self.get_book(isbn) is None:
+            return None
+        book = self.__books.pop(isbn)
+        if self.__store is not None:
+            self.__store.remove(isbn)
+        self.__unindex_words(self.__title_index, book.get_title(), isbn)
+        self.__unindex_words(self.__author_index, book.get_author(), isbn)
+        book.watch_stock(None)
+        with self.__views_lock:
+            self.__available.discard(isbn)
+            if self.__pending.pop(isbn, None) is None:
+                for view in self.__views():
+                    view.remove(isbn, book)
+        return book
+
+    def get_book(self, isbn):
+        book = self.__books.get(isbn)
+        if book is None and not self.__loaded:
+            with self.__store_lock:
+                book = self.__books.get(isbn)
+                if book is None:
+                    book = self.__store.get(isbn)
+                    if book is not None:
+                        self.__remember(isbn, book)
+        return book
+
+    def __remember(self, isbn, book):
+        self.__books[isbn] = book
+        self.__index_words(self.__title_index, book.get_title(), isbn)
+        self.__index_words(self.__author_index, book.get_author(), isbn)
+        with self.__views_lock:
+            self.__pending[isbn] = True
+            book.watch_stock(self.__stock_changed)
+            if book.get_available_copies() > 0:
+                self.__available.add(isbn)
+
+    def __stock_changed(self, book, in_stock):
+        isbn = book.get_isbn()
+        with self.__views_lock:
+            if self.__books.get(isbn) is not book:
+                return
+            if in_stock:
+                self.__available.add(isbn)
+            else:
+                self.__available.discard(isbn)
+            if isbn in self.__pending:
+                return  # Goes into the views, available or not, when they are next read
+            for view in (self.__available_by_title, self.__available_by_author):
+                if in_stock:
+                    view.insert(isbn, book)
+                else:
+                    view.remove(isbn, book)
+
+    def __views(self):
+        return self.__by_title, self.__by_author, self.__available_by_title, self.__available_by_author
+
+    def __load(self):
+        """Read every stored book into memory the first time the whole catalog is needed"""
+        if self.__loaded:
+            return
+        with self.__store_lock:
+            if self.__loaded:
+                return
+            for book in self.__store.books():
+                if book.get_isbn() not in self.__books:
+                    self.__remember(book.get_isbn(), book)
+            self.__loaded = True
+
+    def __index_words(self, index, text, isbn):
+        for word in tokenize(text):
+            isbns = index.get(word)
+            if isbns is None:
+                index[word] = isbns = set()
+                self.__new_words = True
+            isbns.add(isbn)
+
+    def __unindex_words(self, index, text, isbn):
+        for word in tokenize(text):
+            isbns = index.get(word)
+            if isbns is not None:
+                isbns.discard(isbn)
+                if not isbns:
+                    del index[word]
+
+    # ---- searching ----
+
+    def search(self, query, field=None, limit=None):
+        """
+        Books whose title or author contain every word of the query.
+        The last word may be the start of a word ("harry pot").
+        field can be "title" or "author" to search only one of them.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        self.__load()
+        indexes = self.__indexes(field)
+        last = words[-1]
+
+        if len(words) == 1:
+            matches = self.__prefix_matches(indexes, last, limit)
+        else:
+            # Rarest whole words first, so the intersection stays small
+            groups = sorted((self.__word_matches(indexes, word) for word in words[:-1]), key=len)
+            matches = set(groups[0])
+            for isbns in groups[1:]:
+                matches &= isbns
+            matches = self.__with_prefix(matches, indexes, field, last)
+
+        books = [self.__books[isbn] for isbn in matches]
+        if limit is not None:
+            return heapq.nsmallest(limit, books, key=title_key)
+        books.sort(key=title_key)
+        return books
+
+    def search_prefix(self, prefix, field=None, limit=None):
+        """Books with a title or author word starting with prefix"""
+        return self.search(prefix, field, limit)
+
+    def words_with_prefix(self, prefix, limit=MAX_PREFIX_WORDS):
+        """Indexed words starting with prefix, in alphabetical order"""
+        self.__load()
+        if self.__new_words:
+            self.__words = sorted(set(self.__title_index) | set(self.__author_index))
+            self.__new_words = False
+        prefix = prefix.lower()
+        found = []
+        position = bisect.bisect_left(self.__words, prefix)
+        while position < len(self.__words) and len(found) < limit:
+            word = self.__words[position]
+            if not word.startswith(prefix):
+                break
+            if word in self.__title_index or word in self.__author_index:  # skip removed words
+                found.append(word)
+            position += 1
+        return found
+
+    def __indexes(self, field):
+        if field == "title":
+            return [self.__title_index]
+        if field == "author":
+            return [self.__author_index]
+        return [self.__title_index, self.__author_index]
+
+    def __word_matches(self, indexes, word):
+        if len(indexes) == 1:
+            return indexes[0].get(word, set())
+        return indexes[0].get(word, set()) | indexes[1].get(word, set())
+
+    def __prefix_matches(self, indexes, prefix, limit):
+        """
+        ISBNs with a word starting with prefix. Words are taken in alphabetical
+        order (an exact match comes first), and with a limit the expansion
+        stops once enough books were found.
+        """
+        isbns = set()
+        for word in self.words_with_prefix(prefix):
+            for index in indexes:
+                isbns |= index.get(word, set())
+            if limit is not None and len(isbns) >= limit:
+                break
+        return isbns
+
+    def __with_prefix(self, matches, indexes, field, prefix):
+        """
+        The ISBNs in matches that also have a word starting with prefix.
+        Each word with the prefix is intersected with matches (a set
+        intersection only walks the smaller side); a very short prefix with
+        too many words falls back to checking the matched books one by one.
+        """
+        words = self.words_with_prefix(prefix)
+        if len(words) >= MAX_PREFIX_WORDS:
+            return [isbn for isbn in matches if self.__has_prefix(self.__books[isbn], field, prefix)]
+        found = set()
+        for word in words:
+            for index in indexes:
+                isbns = index.get(word)
+                if isbns:
+                    found |= matches & isbns
+        return found
+
+    def __has_prefix(self, book, field, prefix):
+        text = book.get_title() if field == "title" else book.get_author() if field == "author" \
+            else book.get_title() + " " + book.get_author()
+        return any(word.startswith(prefix) for word in tokenize(text))
+
+    # ---- sorted views ----
+
+    def __refresh_views(self):
+        """Bring the sorted views up to date with the books added and removed since the last read"""
+        self.__load()
+        with self.__views_lock:
+            if len(self.__pending) > MAX_PENDING_INSERTS:
+                available = {isbn: self.__books[isbn] for isbn in self.__available}
+                self.__by_title.rebuild(self.__books)
+                self.__by_author.rebuild(self.__books)
+                self.__available_by_title.rebuild(available)
+                self.__available_by_author.rebuild(available)
+            else:
+                for isbn in self.__pending:
+                    book = self.__books[isbn]
+                    self.__by_title.insert(isbn, book)
+                    self.__by_author.insert(isbn, book)
+                    if isbn in self.__available:
+                        self.__available_by_title.insert(isbn, book)
+                        self.__available_by_author.insert(isbn, book)
+            self.__pending = {}
+
+    def sorted_by_title(self, start=""):
+        """Books in title order, starting from the first title >= start"""
+        self.__refresh_views()
+        return self.__by_title.books(self.__books, start)
+
+    def sorted_by_author(self, start=""):
+        """Books in author order (then title), starting from the first author >= start"""
+        self.__refresh_views()
+        return self.__by_author.books(self.__books, start)
+
+    def sorted_by_availability(self, limit=None):
+        """Books with the most available copies first"""
+        self.__load()
+        if limit is not None:
+            return heapq.nlargest(limit, self.__books.values(), key=lambda book: book.get_available_copies())
+        return sorted(self.__books.values(), key=lambda book: book.get_available_copies(), reverse=True)
+
+    # ---- paginated listings ----
+
+    def iter_books(self, order="title", available_only=False, author=None, title_from="", title_to=None, after=None):
+        """
+        Generator of books in title order (order="author": by author, then title;
+        order="availability": most copies on the shelf first).
+        Filters: available_only skips books with no copy on the shelf, author keeps
+        one author's books (any case), and title_from / title_to keep titles from
+        title_from through title_to (titles starting with title_to are included).
+        after is a cursor from books_page() with the same order and filters.
+        """
+        for cursor, book in self.__listing(order, available_only, author, title_from, title_to, after):
+            yield book
+
+    def books_page(self, page_size=PAGE_SIZE, cursor=None, order="title", available_only=False, author=None,
+                   title_from="", title_to=None):
+        """
+        One page of iter_books() and the cursor for the next page (None after the last page).
+        The cursor names the last book shown, so books added or removed in the
+        meantime never make the next page skip or repeat a book.
+        """
+        listing = self.__listing(order, available_only, author, title_from, title_to, cursor)
+        page = list(itertools.islice(listing, page_size + 1))
+        next_cursor = page[page_size - 1][0] if len(page) > page_size else None
+        return [book for key, book in page[:page_size]], next_cursor
+
+    def available_count(self):
+        self.__load()
+        return len(self.__available)
+
+    def __listing(self, order, available_only, author, title_from, title_to, after):
+        """(cursor, book) pairs for iter_books() and books_page()"""
+        self.__refresh_views()
+        low = (title_from or "").lower()
+        high = title_to.lower() + LAST_CHARACTER if title_to else None
+        if order == "availability":
+            return self.__by_copies(available_only, author, low, high, after)
+        # Available-only listings walk views that hold nothing but books on the shelf
+        by_title = self.__available_by_title if available_only else self.__by_title
+        by_author = self.__available_by_author if available_only else self.__by_author
+        title_range = None
+        if author:
+            # One author's books are next to each other in the author view, already in title order
+            prefix = author.lower() + "\x00"
+            view, start = by_author, prefix + low
+            stop = prefix + high if high else author.lower() + "\x01"
+        elif order == "author":
+            view, start, stop = by_author, "", None
+            if low or high:
+                title_range = (low, high)
+        else:
+            view, start, stop = by_title, low, high
+        return self.__walk(view, start, stop, after, title_range)
+
+    def __walk(self, view, start, stop, after, title_range):
+        for key, isbn in view.walk(start, stop, after):
+            book = self.__books.get(isbn)
+            if book is None or (title_range is not None and not in_title_range(book, *title_range)):
+                continue
+            yield key, book
+
+    def __by_copies(self, available_only, author, low, high, after):
+        """
+        Most copies first, ties in ISBN order; the cursor is (-copies, isbn) of the last book.
+        Copy counts change on every loan, so this order is not kept sorted: each page
+        scans the catalog once, and only the books of the page are taken off the heap.
+        """
+        heap = [((-book.get_available_copies(), isbn), book) for isbn, book in list(self.__books.items())]
+        if available_only:
+            heap = [entry for entry in heap if entry[0][0] < 0]
+        if author:
+            author = author.lower()
+            heap = [entry for entry in heap if entry[1].get_author().lower() == author]
+        if low or high:
+            heap = [entry for entry in heap if in_title_range(entry[1], low, high)]
+        if after is not None:
+            after = tuple(after)
+            heap = [entry for entry in heap if entry[0] > after]
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)
+
+    def __str__(self):
+        return f"Catalog with {len(self)} books"
+
+
+def benchmark(count=5000000):
+    import random
+    import time
+    from book import Book
+
+    rng = random.Random(3)
+    syllables = ["ka", "lo", "mi", "ra", "shi", "to", "ven", "dor", "el", "an", "qu", "zor", "bel", "fin"]
+
+    def word():
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+
+    authors = [f"{word().title()} {word().title()}" for _ in range(count // 20)]
+
+    catalog = Catalog()
+    started = time.perf_counter()
+    for isbn in range(9780000000000, 9780000000000 + count):
+        title = " ".join(word() for _ in range(rng.randint(1, 4))).title()
+        catalog.add_book(Book(title, rng.choice(authors), isbn, rng.randint(0, 5)))
+    print(f"Added {count} books in {time.perf_counter() - started:.1f}s")
+
+    sample = catalog[9780000000000 + count // 2]
+    queries = [sample.get_title(), sample.get_author(), sample.get_title().split()[0][:3],
+               f"{sample.get_author().split()[0]} {sample.get_title().split()[0][:4]}"]
+    for query in queries:
+        catalog.search(query, limit=20)  # First prefix query sorts the word list once
+        started = time.perf_counter()
+        results = catalog.search(query, limit=20)
+        print(f"search({query!r}): {len(results)} results in {(time.perf_counter() - started) * 1000:.2f}ms")
+
+    started = time.perf_counter()
+    next(catalog.sorted_by_title())
+    print(f"First title view (sorts {count} titles): {time.perf_counter() - started:.1f}s")
+    catalog.add_book(Book("Aardvark Adventures", "Ann Example", 1, 1))
+    started = time.perf_counter()
+    page = [book for _, book in zip(range(20), catalog.sorted_by_title("m"))]
+    print(f"Title view after one add, 20 books from 'm': {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    started = time.perf_counter()
+    page, cursor = catalog.books_page(20, available_only=True)
+    for _ in range(99):
+        page, cursor = catalog.books_page(20, cursor, available_only=True)
+    print(f"100 pages of available books: {(time.perf_counter() - started) * 1000 / 100:.2f}ms per page "
+          f"({catalog.available_count()} of {len(catalog)} books on the shelf)")
+    sparse = Catalog()
+    shelf = [Book(f"Title {i}", "Author", i, 0) for i in range(500000)]
+    sparse.add_books(shelf)
+    for book in shelf[::200000]:
+        book.return_copy()
+    next(sparse.sorted_by_title())
+    started = time.perf_counter()
+    page, cursor = sparse.books_page(20, available_only=True)
+    print(f"Page of available books with {sparse.available_count()} of {len(sparse)} on the shelf: "
+          f"{(time.perf_counter() - started) * 1000:.2f}ms")
+    started = time.perf_counter()
+    page, cursor = catalog.books_page(20, author=sample.get_author(), title_from="m", available_only=True)
+    print(f"Page of one author's available books from 'm': {(time.perf_counter() - started) * 1000:.2f}ms")
+    started = time.perf_counter()
+    page, cursor = catalog.books_page(20, order="availability", available_only=True)
+    print(f"Page by availability (scans the catalog): {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    benchmark()
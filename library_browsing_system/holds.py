@@ -0,0 +1,348 @@
+"""
+Hold and HoldManager classes, Notifier class
+Waitlists for books that are out of stock.
+
+- Each ISBN has a first-come-first-served queue (a deque) of holds.
+- When a copy is returned and someone is waiting, the copy goes straight to
+  the first member in the queue as a new loan, instead of back on the shelf.
+- A member can have at most MAX_HOLDS_PER_MEMBER holds, so the memory used
+  per waiting member is bounded.
+- Cancelled holds are only marked; they are skipped when they reach the
+  front of the queue (and the queue is compacted if they pile up).
+- Members are told about their book by the Notifier, which runs on its own
+  thread, so returning a book never waits for a notification to be sent.
+
+Holds are appended to a log file and read back on start, like loans.
+
+Methods:
+place_hold(member_id, isbn), cancel_hold(member_id, isbn), holds_of(member_id)
+return_copy(book, loans) - hand a returned copy to the next waiting member
+"""
+
+import collections
+import os
+import queue
+import threading
+import time
+from datetime import date
+from loans import clean
+
+MAX_HOLDS_PER_MEMBER = 5
+INBOX_SIZE = 20  # notifications kept per member until they log in
+
+
+class Hold:
+    __slots__ = ("hold_id", "member_id", "isbn", "placed_on", "active")
+
+    def __init__(self, hold_id, member_id, isbn, placed_on):
+        self.hold_id = hold_id
+        self.member_id = member_id
+        self.isbn = isbn
+        self.placed_on = placed_on
+        self.active = True
+
+    def __str__(self):
+        return f"Hold {self.hold_id}: ISBN {self.isbn} for member {self.member_id}, placed {self.placed_on}"
+
+
+class Notifier:
+    """Delivers messages to members on a background thread"""
+
+    def __init__(self, path=None, inbox_size=INBOX_SIZE):
+        self.__queue = queue.Queue()
+        self.__inboxes = {}  # member ID -> deque of messages not read yet
+        self.__inbox_size = inbox_size
+        self.__lock = threading.Lock()
+        self.__file = open(path, "a", encoding="utf-8") if path else None
+        self.sent = 0
+        self.__thread = threading.Thread(target=self.__run, name="notifier", daemon=True)
+        self.__thread.start()
+
+    def send(self, member_id, message):
+        """Queue a message and return at once"""
+        self.__queue.put((member_id, message))
+
+    def inbox(self, member_id):
+        """Messages delivered to a member since they last looked (emptied by reading)"""
+        with self.__lock:
+            messages = self.__inboxes.pop(member_id, None)
+        return list(messages) if messages else []
+
+    def __run(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Deliver whatever else is already waiting in the same pass
+            while len(batch) < 1000:
+                try:
+                    item = self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.__deliver(batch)
+                    return
+                batch.append(item)
+            self.__deliver(batch)
+
+    def __deliver(self, batch):
+        with self.__lock:
+            for member_id, message in batch:
+                inbox = self.__inboxes.get(member_id)
+                if inbox is None:
+                    inbox = self.__inboxes[member_id] = collections.deque(maxlen=self.__inbox_size)
+                inbox.append(message)
+        if self.__file is not None:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+            self.__file.write("".join(f"{stamp}\t{member_id}\t{message}\n" for member_id, message in batch))
+            self.__file.flush()
+        self.sent += len(batch)
+
+    def close(self):
+        """Deliver the messages still queued and stop the thread"""
+        self.__queue.put(None)
+        self.__thread.join()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class HoldManager:
+    def __init__(self, path=None, notifier=None, max_holds_per_member=MAX_HOLDS_PER_MEMBER):
+        self.__queues = {}          # isbn -> deque of Hold, first come first served
+        self.__cancelled = {}       # isbn -> cancelled holds still inside that queue
+        self.__by_member = {}       # member ID -> {isbn: Hold} of active holds
+        self.__active = 0
+        self.__member_names = {}    # member name (lower case) -> member ID
+        self.__next_id = 1
+        self.__lock = threading.Lock()
+        self.max_holds_per_member = max_holds_per_member
+        self.notifier = notifier
+        self.__log = None
+        if path:
+            if os.path.exists(path):
+                self.__replay(path)
+            self.__log = open(path, "a", encoding="utf-8")
+
+    # ---- placing and cancelling ----
+
+    def place_hold(self, member_id, isbn, member_name="", today=None):
+        """Add the member to the end of the book's queue; raises ValueError if they cannot"""
+        with self.__lock:
+            holds = self.__by_member.get(member_id, {})
+            if isbn in holds:
+                raise ValueError(f"You already have a hold on ISBN {isbn}.")
+            if len(holds) >= self.max_holds_per_member:
+                raise ValueError(f"You already have {self.max_holds_per_member} holds, the most allowed.")
+            hold = Hold(self.__next_id, member_id, isbn, today or date.today())
+            self.__add(hold, member_name)
+            self.__write(f"H\t{hold.hold_id}\t{member_id}\t{clean(member_name)}\t{isbn}\t{hold.placed_on}")
+            return hold
+
+    def cancel_hold(self, member_id, isbn):
+        with self.__lock:
+            hold = self.__by_member.get(member_id, {}).get(isbn)
+            if hold is None:
+                return False
+            self.__end(hold)
+            self.__cancelled[isbn] = self.__cancelled.get(isbn, 0) + 1
+            self.__compact(isbn)
+            self.__write(f"C\t{hold.hold_id}")
+            return True
+
+    def __add(self, hold, member_name=""):
+        self.__next_id = max(self.__next_id, hold.hold_id + 1)
+        waiting = self.__queues.get(hold.isbn)
+        if waiting is None:
+            waiting = self.__queues[hold.isbn] = collections.deque()
+        waiting.append(hold)
+        self.__by_member.setdefault(hold.member_id, {})[hold.isbn] = hold
+        self.__active += 1
+        if member_name:
+            self.__member_names[member_name.lower()] = hold.member_id
+
+    def __end(self, hold):
+        hold.active = False
+        self.__active -= 1
+        holds = self.__by_member[hold.member_id]
+        del holds[hold.isbn]
+        if not holds:
+            del self.__by_member[hold.member_id]
+
+    def __compact(self, isbn):
+        """Drop cancelled holds from a queue once they are most of it"""
+        waiting = self.__queues.get(isbn)
+        if waiting is not None and self.__cancelled.get(isbn, 0) * 2 > len(waiting):
+            waiting = collections.deque(hold for hold in waiting if hold.active)
+            self.__cancelled.pop(isbn, None)
+            if waiting:
+                self.__queues[isbn] = waiting
+            else:
+                del self.__queues[isbn]
+
+    # ---- handing over returned copies ----
+
+    def __next_hold(self, isbn):
+        """Take the first active hold off the queue (cancelled ones in front are dropped)"""
+        waiting = self.__queues.get(isbn)
+        while waiting:
+            hold = waiting.popleft()
+            if hold.active:
+                if not waiting:
+                    del self.__queues[isbn]
+                return hold
+            self.__cancelled[isbn] -= 1
+        self.__queues.pop(isbn, None)
+        self.__cancelled.pop(isbn, None)
+        return None
+
+    def return_copy(self, book, loans=None, today=None):
+        """
+        A copy of book came back: give it to the next waiting member as a new loan,
+        or put it back on the shelf if nobody is waiting.
+        """
+        isbn = book.get_isbn()
+        with self.__lock:
+            hold = self.__next_hold(isbn)
+            if hold is None:
+                return book.return_copy()
+            self.__end(hold)
+            self.__write(f"F\t{hold.hold_id}")
+            if loans is not None:
+                loan = loans.borrow(hold.member_id, isbn, today)
+                due = f", due back on {loan.due_on}"
+            else:
+                due = ""
+        if self.notifier is not None:
+            self.notifier.send(hold.member_id, f"Your hold on '{book.get_title()}' (ISBN {isbn}) is ready: "
+                                              f"the copy has been issued to you{due}.")
+        return "Book returned successfully! The copy went to the next member on the waitlist."
+
+    # ---- queries ----
+
+    def holds_of(self, member_id):
+        with self.__lock:
+            return sorted(self.__by_member.get(member_id, {}).values(), key=lambda hold: hold.hold_id)
+
+    def position(self, member_id, isbn):
+        """Place of the member in the book's queue (1 = next), or None"""
+        with self.__lock:
+            hold = self.__by_member.get(member_id, {}).get(isbn)
+            if hold is None:
+                return None
+            position = 0
+            for waiting in self.__queues[isbn]:
+                if waiting.active:
+                    position += 1
+                if waiting is hold:
+                    return position
+
+    def waiting_count(self, isbn):
+        with self.__lock:
+            return len(self.__queues.get(isbn, ())) - self.__cancelled.get(isbn, 0)
+
+    def member_id(self, name):
+        """ID used for this member name in earlier holds, or None"""
+        return self.__member_names.get(name.lower())
+
+    def __len__(self):
+        return self.__active
+
+    # ---- log file ----
+
+    def __write(self, line):
+        if self.__log is not None:
+            self.__log.write(line + "\n")
+            self.__log.flush()
+
+    def __replay(self, path):
+        active = {}  # hold ID -> Hold, only needed while reading the log
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                parts = line.rstrip("\n").split("\t")
+                # Anything that does not parse is a line cut short by a crash; skip it
+                try:
+                    if parts[0] == "H" and len(parts) == 6:
+                        hold = Hold(int(parts[1]), parts[2], int(parts[4]), date.fromisoformat(parts[5]))
+                    elif parts[0] in ("C", "F") and len(parts) == 2:
+                        hold_id = int(parts[1])
+                    else:
+                        continue
+                except ValueError:
+                    continue
+                if parts[0] == "H":
+                    self.__add(hold, parts[3])
+                    active[hold.hold_id] = hold
+                else:
+                    hold = active.pop(hold_id, None)
+                    if hold is not None:
+                        self.__end(hold)
+                        if parts[0] == "C":
+                            self.__cancelled[hold.isbn] = self.__cancelled.get(hold.isbn, 0) + 1
+                        else:
+                            self.__queues[hold.isbn].remove(hold)
+                            if not self.__queues[hold.isbn]:
+                                del self.__queues[hold.isbn]
+        for isbn in list(self.__cancelled):
+            self.__compact(isbn)
+
+    def close(self):
+        if self.__log is not None:
+            self.__log.close()
+            self.__log = None
+
+    def __str__(self):
+        return f"Hold manager with {self.__active} active holds on {len(self.__queues)} books"
+
+
+def benchmark(holds=1000000):
+    import random
+    import tracemalloc
+    from book import Book
+
+    rng = random.Random(3)
+    notifier = Notifier()
+    manager = HoldManager(notifier=notifier)
+    books = [Book(f"Book {i}", "Author", 9780000000000 + i, 0) for i in range(holds // 10)]
+    members = [f"M{i}" for i in range(holds // 2)]
+    requests = [(rng.choice(members), rng.choice(books).get_isbn()) for _ in range(holds)]
+
+    started = time.perf_counter()
+    for member, isbn in requests:
+        try:
+            manager.place_hold(member, isbn)
+        except ValueError:
+            pass  # member at the limit or already holding that book
+    elapsed = time.perf_counter() - started
+    print(f"Placed {len(manager)} holds in {elapsed:.1f}s ({holds / elapsed:,.0f} requests/sec)")
+
+    sample = HoldManager()
+    tracemalloc.start()
+    for member, isbn in requests[:100000]:
+        try:
+            sample.place_hold(member, isbn)
+        except ValueError:
+            pass
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"Memory: about {memory / len(sample):.0f} bytes per hold, "
+          f"at most {sample.max_holds_per_member} holds per member")
+    del sample
+
+    for member in members[:holds // 10]:
+        for hold in manager.holds_of(member)[:1]:
+            manager.cancel_hold(member, hold.isbn)
+    started = time.perf_counter()
+    returns = 200000
+    for _ in range(returns):
+        manager.return_copy(rng.choice(books))
+    elapsed = time.perf_counter() - started
+    print(f"Returns with handover: {elapsed / returns * 1e6:.1f}us each; {len(manager)} holds left")
+    started = time.perf_counter()
+    notifier.close()
+    print(f"Notifier delivered {notifier.sent} messages, {time.perf_counter() - started:.2f}s left to drain at close")
+
+
+if __name__ == "__main__":
+    benchmark()
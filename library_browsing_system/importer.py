@@ -0,0 +1,300 @@
+"""
+Catalog importer
+Loads a whole branch catalog from a file instead of adding books one by one.
+
+Supported files:
+- CSV with a header row (title, author, isbn and optionally copies / available_copies)
+- JSON Lines, one book per line with the same keys
+- simplified MARC in the text ("mnemonic") form, one record per block:
+      =020  \\$a9780261103344
+      =100  1\\$aTolkien, J. R. R.
+      =245  14$aThe hobbit /$cJ.R.R. Tolkien.
+      =852  \\$aMain Branch
+  (020 = ISBN, 100/110/700 = author, 245 = title, every 852 holding = one copy)
+
+The file is read as a stream and added in chunks, so memory use does not grow
+with the size of the file. ISBNs already in the catalog or seen earlier in the
+file are skipped (ISBN-10 and ISBN-13 forms of one book count as the same
+ISBN, see isbn.py); a set (exact) or a Bloom filter (about 10 bits per ISBN)
+answers "seen before?" so the catalog itself is only asked about likely duplicates.
+
+Usage:
+    python importer.py branch.csv
+    python importer.py branch.mrk --dedupe bloom
+    python importer.py --generate 1000000 books.jsonl
+"""
+
+import argparse
+import csv
+import gc
+import itertools
+import json
+import math
+import os
+import time
+
+from book import Book
+from isbn import canonical_isbns, make_isbn, to_isbn10
+
+CHUNK_SIZE = 10000
+MAX_ERRORS_KEPT = 20
+TITLE_PUNCTUATION = " /:;,."
+
+
+class BloomFilter:
+    """Set-like filter that may answer "maybe" for ISBNs it never saw, but never misses one it did"""
+
+    def __init__(self, expected, error_rate=0.01):
+        expected = max(expected, 1000)
+        self.size = int(-expected * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / expected * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+
+    def __positions(self, isbn):
+        first = (isbn * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        second = ((isbn ^ (isbn >> 29)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, isbn):
+        for position in self.__positions(isbn):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, isbn):
+        for position in self.__positions(isbn):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class ImportReport:
+    def __init__(self, path):
+        self.path = path
+        self.read = 0
+        self.added = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def error(self, where, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS_KEPT:
+            self.errors.append(f"{where}: {message}")
+
+    def __str__(self):
+        rate = self.read / self.seconds if self.seconds else 0
+        text = (f"Imported {self.added} of {self.read} records from {self.path} in {self.seconds:.1f}s "
+                f"({rate:,.0f} records/sec): {self.duplicates} duplicates, {self.invalid} invalid")
+        return "\n".join([text] + [f"  {error}" for error in self.errors])
+
+
+# ---- readers: each yields (position, dict with title/author/isbn/copies) ----
+
+def read_csv(file):
+    reader = csv.DictReader(file)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield f"line {reader.line_num}", row
+
+
+def read_jsonl(file):
+    for line_number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = {"error": f"bad JSON ({e})"}
+            if not isinstance(record, dict):
+                record = {"error": "not a JSON object"}
+            yield f"line {line_number}", record
+
+
+def read_marc(file):
+    """Simplified MARC mnemonic records, separated by blank lines or a new =LDR line"""
+    fields = []
+    number = 0
+    for line in file:
+        line = line.rstrip("\r\n")
+        if (not line.strip() or line.startswith("=LDR")) and fields:
+            number += 1
+            yield f"record {number}", marc_record(fields)
+            fields = []
+        if line.startswith("=") and len(line) > 6:
+            fields.append((line[1:4], line[6:]))
+    if fields:
+        yield f"record {number + 1}", marc_record(fields)
+
+
+def marc_record(fields):
+    def subfields(data):
+        parts = data.split("$")[1:]  # text before the first $ holds the two indicators
+        return {part[0]: part[1:].strip() for part in reversed(parts) if part}
+
+    record = {"copies": 0}
+    for tag, data in fields:
+        if tag == "020" and "isbn" not in record:
+            value = subfields(data).get("a", "")
+            if value:
+                record["isbn"] = value.split()[0]
+        elif tag == "245":
+            codes = subfields(data)
+            title = codes.get("a", "").rstrip(TITLE_PUNCTUATION)
+            if codes.get("b"):
+                title += ": " + codes["b"].rstrip(TITLE_PUNCTUATION)
+            record["title"] = title
+        elif tag in ("100", "110", "700") and "author" not in record:
+            record["author"] = subfields(data).get("a", "").rstrip(TITLE_PUNCTUATION)
+        elif tag == "852":
+            record["copies"] += 1
+    record["copies"] = record["copies"] or 1
+    return record
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "marc": read_marc}
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".mrk": "marc", ".marc": "marc"}
+
+
+def to_book(record, isbn):
+    """Book from a parsed record; isbn is the canonical key (None if the record's ISBN is invalid)"""
+    if "error" in record:
+        raise ValueError(record["error"])
+    title = str(record.get("title") or "").strip()
+    if not title:
+        raise ValueError("missing title")
+    copies = record.get("copies", record.get("available_copies"))
+    copies = int(copies) if copies not in (None, "") else 1
+    if copies < 0:
+        raise ValueError(f"negative copies {copies}")
+    if isbn is None:
+        raise ValueError(f"invalid ISBN '{record.get('isbn', '')}'")
+    return Book(title, str(record.get("author") or "").strip(), isbn, copies)
+
+
+# ---- importing ----
+
+def import_catalog(path, catalog, file_format=None, chunk_size=CHUNK_SIZE, dedupe="set"):
+    """
+    Stream a catalog file into catalog (a Catalog or plain dict) and return an ImportReport.
+    dedupe is "set" (exact, more memory) or "bloom" (compact; likely duplicates are
+    double-checked against the catalog).
+    """
+    file_format = file_format or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if file_format not in READERS:
+        raise ValueError(f"Unknown catalog format for {path}; use one of {', '.join(READERS)}")
+
+    if dedupe == "bloom":
+        # Rough guess of the records in the file; a low guess only raises the false alarm rate
+        seen = BloomFilter(len(catalog) + os.path.getsize(path) // 60)
+    else:
+        seen = set()
+    for isbn in catalog.isbns() if hasattr(catalog, "isbns") else list(catalog):
+        seen.add(isbn)
+
+    report = ImportReport(path)
+    started = time.perf_counter()
+    # Bulk loading creates millions of objects and no reference cycles; the cycle collector would only slow it down
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, encoding="utf-8", newline="") as file:
+            records = READERS[file_format](file)
+            while True:
+                batch = list(itertools.islice(records, chunk_size))
+                if not batch:
+                    break
+                report.read += len(batch)
+                # Validate and canonicalize the whole chunk's ISBNs in one call
+                keys = canonical_isbns([record.get("isbn", "") for where, record in batch])
+                chunk = {}
+                for (where, record), isbn in zip(batch, keys):
+                    try:
+                        book = to_book(record, isbn)
+                    except (ValueError, TypeError) as e:
+                        report.error(where, e)
+                        continue
+                    # With a Bloom filter "seen" can be a false alarm, so confirm before skipping
+                    if isbn in chunk or (isbn in seen and (dedupe != "bloom" or isbn in catalog)):
+                        report.duplicates += 1
+                        continue
+                    seen.add(isbn)
+                    chunk[isbn] = book
+                report.added += add_chunk(catalog, chunk)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def add_chunk(catalog, chunk):
+    if hasattr(catalog, "add_books"):
+        return catalog.add_books(chunk.values())
+    catalog.update(chunk)
+    return len(chunk)
+
+
+def generate_catalog(path, count, duplicate_rate=0.02, seed=5):
+    """Write a sample catalog of count records (format from the file extension) for benchmarking"""
+    import random
+
+    rng = random.Random(seed)
+    words = ["river", "night", "garden", "empire", "code", "stone", "winter", "light", "city", "dream",
+             "shadow", "ocean", "glass", "fire", "north", "silent", "paper", "crown", "wolf", "orchard"]
+    file_format = EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file) if file_format == "csv" else None
+        if writer:
+            writer.writerow(["title", "author", "isbn", "copies"])
+        for i in range(count):
+            number = rng.randrange(i) if i and rng.random() < duplicate_rate else i
+            # Mostly plain ISBN-13, some hyphenated and some ISBN-10, as in real catalogs
+            isbn = str(make_isbn(number))
+            form = rng.random()
+            if form < 0.1:
+                isbn = f"{isbn[:3]}-{isbn[3]}-{isbn[4:7]}-{isbn[7:12]}-{isbn[12]}"
+            elif form < 0.2:
+                isbn = to_isbn10(int(isbn))
+            title = " ".join(rng.choice(words).title() for _ in range(rng.randint(1, 4)))
+            author = f"{rng.choice(words).title()} {rng.choice(words).title()}"
+            copies = rng.randint(1, 5)
+            if writer:
+                writer.writerow([title, author, isbn, copies])
+            elif file_format == "jsonl":
+                file.write(json.dumps({"title": title, "author": author, "isbn": isbn, "copies": copies}) + "\n")
+            else:
+                file.write(f"=LDR  00000nam  2200000   4500\n=020  \\\\$a{isbn}\n=100  1\\$a{author}\n"
+                           f"=245  10$a{title} /$c{author}.\n" + "=852  \\\\$aMain\n" * copies + "\n")
+
+
+def main(argv=None):
+    from catalog import Catalog
+    from book_store import BookStore
+
+    parser = argparse.ArgumentParser(description="Import a CSV, JSON Lines or MARC catalog into the library")
+    parser.add_argument("path", help="catalog file (or output file with --generate)")
+    parser.add_argument("--format", choices=sorted(READERS), help="file format (default: from the extension)")
+    parser.add_argument("--data-dir", default="library_data", help="where books are stored")
+    parser.add_argument("--dedupe", choices=["set", "bloom"], default="set")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--generate", type=int, metavar="N", help="write a sample catalog of N records to path")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        generate_catalog(args.path, args.generate)
+        print(f"Wrote {args.generate} records to {args.path}")
+        return 0
+
+    store = BookStore(args.data_dir)
+    try:
+        catalog = Catalog(store)
+        report = import_catalog(args.path, catalog, args.format, args.chunk_size, args.dedupe)
+    finally:
+        store.close()
+    print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
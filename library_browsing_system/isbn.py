@@ -0,0 +1,216 @@
+"""
+ISBN helpers
+Turns whatever the user or a catalog file gives as an ISBN into one canonical key.
+
+canonical_isbn() accepts ISBN-10 and ISBN-13, as text or int, with or without
+hyphens, spaces or an "ISBN", "ISBN:", "ISBN-10:" or "ISBN-13:" label. It checks
+the check digit and returns the ISBN-13 as an int, so:
+    "0-306-40615-2", "ISBN-10: 0306406152", "ISBN-13: 978-0-306-40615-7" and 9780306406157
+all become 9780306406157. ISBN-13s always start with 978 or 979, so no leading
+zeros are lost, and an ISBN-10 ending in "X" works too.
+
+canonical_isbns() does the same for a whole list at once (e.g. one import
+chunk) and is several times faster than calling canonical_isbn() per ISBN.
+
+Functions:
+canonical_isbn(value), canonical_isbns(values), is_valid_isbn(value), to_isbn10(key), make_isbn(number)
+"""
+
+import re
+from itertools import accumulate
+
+_REMOVE = str.maketrans("", "", "- ")
+# Taken off before the separators, or the "10"/"13" of the label would be read as digits
+_LABEL = re.compile(r"\s*ISBN(?:-?1[03])?:?")
+
+# Digits are summed as bytes ("0" is 48), so these take the "0"s back out of the weighted sums
+_ISBN13_OFFSET = 48 * (7 * 1 + 6 * 3)
+_ISBN12_OFFSET = 48 * (6 * 1 + 6 * 3)
+_ISBN10_OFFSET = 48 * sum(range(2, 11))
+
+_DIGIT_VALUES = bytes.maketrans(b"0123456789", bytes(range(10)))
+_ISBN13_WEIGHTS = (1, 3) * 6 + (1,)
+# 1 for every weighted sum that is not a multiple of 10 (sums never exceed 9 * 25 = 225)
+_BAD_SUM = bytes(0 if value % 10 == 0 else 1 for value in range(256))
+_BAD_THIRD_DIGIT = bytes(0 if value in (8, 9) else 1 for value in range(256))
+
+
+def canonical_isbn(value):
+    """ISBN-10 or ISBN-13 (text or int) -> ISBN-13 as an int; raises ValueError if it is not a valid ISBN"""
+    if type(value) is int:
+        text = str(value) if value >= 10 ** 12 else f"{value:010d}"
+    else:
+        text = str(value).upper()
+        if "ISBN" in text:
+            label = _LABEL.match(text)
+            if label:
+                text = text[label.end():]
+        text = text.translate(_REMOVE)
+
+    if len(text) == 13:
+        if not (text.isdigit() and text.isascii()):
+            raise ValueError(f"Invalid ISBN '{value}': ISBN-13 must be 13 digits")
+        data = text.encode()
+        if (sum(data[0::2]) + 3 * sum(data[1::2]) - _ISBN13_OFFSET) % 10:
+            raise ValueError(f"Invalid ISBN '{value}': wrong check digit")
+        if data[:3] != b"978" and data[:3] != b"979":
+            raise ValueError(f"Invalid ISBN '{value}': ISBN-13 must start with 978 or 979")
+        return int(text)
+
+    if len(text) == 10:
+        body = text[:9]
+        check = text[9]
+        if not (body.isdigit() and body.isascii()) or not (check == "X" or "0" <= check <= "9"):
+            raise ValueError(f"Invalid ISBN '{value}': ISBN-10 must be 9 digits and a digit or X")
+        data = body.encode()
+        # accumulate() turns the 9 digits into weights 9..1; adding the digits once more gives 10..2
+        total = sum(accumulate(data)) + sum(data) - _ISBN10_OFFSET + (10 if check == "X" else ord(check) - 48)
+        if total % 11:
+            raise ValueError(f"Invalid ISBN '{value}': wrong check digit")
+        data = b"978" + data
+        check13 = -(sum(data[0::2]) + 3 * sum(data[1::2]) - _ISBN12_OFFSET) % 10
+        return 9780000000000 + int(body) * 10 + check13
+
+    raise ValueError(f"Invalid ISBN '{value}': must have 10 or 13 digits")
+
+
+def canonical_isbns(values):
+    """
+    canonical_isbn() for many ISBNs at once; invalid ones come back as None.
+
+    When every value is a plain ISBN-13 (the usual case for a catalog file),
+    the check digits are verified column by column: digit position p of all
+    ISBNs is one bytes slice, read as one big integer with a byte per ISBN,
+    so adding the weighted columns computes every ISBN's checksum in a few
+    big-integer operations instead of a Python loop per ISBN.
+    """
+    values = list(values)
+    cleaned = "\n".join(map(str, values)).translate(_REMOVE).upper().split("\n")
+    if len(cleaned) != len(values):  # a value contained a line break
+        cleaned = [""] * len(values)
+    if set(map(len, cleaned)) == {13}:
+        joined = "".join(cleaned)
+        if joined.isdigit() and joined.isascii():
+            return _check_isbn13s(cleaned, joined.encode())
+
+    # Mixed input: plain ISBN-13s still go through the fast path, the rest one by one
+    keys = [None] * len(values)
+    plain = [index for index, text in enumerate(cleaned) if len(text) == 13 and text.isdigit() and text.isascii()]
+    if plain:
+        texts = [cleaned[index] for index in plain]
+        for index, key in zip(plain, _check_isbn13s(texts, "".join(texts).encode())):
+            keys[index] = key
+    for index, key in enumerate(keys):
+        if key is None and (len(cleaned[index]) != 13 or not cleaned[index].isdigit()):
+            try:
+                keys[index] = canonical_isbn(values[index])
+            except ValueError:
+                pass
+    return keys
+
+
+def _check_isbn13s(texts, data):
+    count = len(texts)
+    digits = data.translate(_DIGIT_VALUES)
+    total = 0
+    for position, weight in enumerate(_ISBN13_WEIGHTS):
+        total += weight * int.from_bytes(digits[position::13], "big")
+    bad = bytearray(total.to_bytes(count, "big").translate(_BAD_SUM))
+    # Prefix 978 or 979
+    for position, expected in ((0, 9), (1, 7)):
+        column = digits[position::13]
+        if column.count(expected) != count:
+            for index, digit in enumerate(column):
+                if digit != expected:
+                    bad[index] = 1
+    third = digits[2::13].translate(_BAD_THIRD_DIGIT)
+    keys = list(map(int, texts))
+    if bad.count(0) == count and third.count(0) == count:
+        return keys
+    for index in range(count):
+        if bad[index] or third[index]:
+            keys[index] = None
+    return keys
+
+
+def is_valid_isbn(value):
+    try:
+        canonical_isbn(value)
+        return True
+    except ValueError:
+        return False
+
+
+def to_isbn10(key):
+    """The ISBN-10 text of a 978 key, or None (979 ISBNs have no ISBN-10)"""
+    if not 9780000000000 <= key < 9790000000000:
+        return None
+    body = f"{key // 10 % 10 ** 9:09d}"
+    check = -sum((10 - i) * int(digit) for i, digit in enumerate(body)) % 11
+    return body + ("X" if check == 10 else str(check))
+
+
+def make_isbn(number, prefix=978):
+    """A valid ISBN-13 key for a 9-digit number, e.g. for generating sample data"""
+    data = f"{prefix}{number:09d}".encode()
+    return int(data) * 10 + -(sum(data[0::2]) + 3 * sum(data[1::2]) - _ISBN12_OFFSET) % 10
+
+
+def benchmark(count=1000000):
+    import random
+    import time
+
+    rng = random.Random(11)
+    samples = []
+    for _ in range(count):
+        key = make_isbn(rng.randrange(10 ** 9))
+        kind = rng.randrange(4)
+        if kind == 0:
+            samples.append(str(key))
+        elif kind == 1:
+            text = str(key)
+            samples.append(f"{text[:3]}-{text[3]}-{text[4:7]}-{text[7:12]}-{text[12]}")
+        elif kind == 2:
+            samples.append(to_isbn10(key))
+        else:
+            samples.append(key)
+    xs = sum(1 for sample in samples if isinstance(sample, str) and sample.endswith("X"))
+
+    started = time.perf_counter()
+    keys = [canonical_isbn(sample) for sample in samples]
+    elapsed = time.perf_counter() - started
+    print(f"canonical_isbn: {count / elapsed:,.0f} ISBNs/sec over mixed ISBN-13 / hyphenated / "
+          f"ISBN-10 ({xs} ending in X) / int input")
+
+    started = time.perf_counter()
+    bulk = canonical_isbns(samples)
+    elapsed = time.perf_counter() - started
+    print(f"canonical_isbns, same mixed list: {count / elapsed:,.0f} ISBNs/sec")
+
+    plain_samples = [str(key) for key in keys]
+    started = time.perf_counter()
+    for start in range(0, count, 10000):
+        canonical_isbns(plain_samples[start:start + 10000])
+    elapsed = time.perf_counter() - started
+    print(f"canonical_isbns, ISBN-13 text in chunks of 10000: {count / elapsed:,.0f} ISBNs/sec")
+    assert bulk == keys
+
+    started = time.perf_counter()
+    plain = [int(str(sample).replace("-", "")) for sample in samples if not str(sample).endswith("X")]
+    elapsed = time.perf_counter() - started
+    print(f"old int(input) parsing for comparison (no validation, ISBN-10 with X fails): "
+          f"{len(plain) / elapsed:,.0f} ISBNs/sec")
+
+    assert keys == [canonical_isbn(to_isbn10(key) or key) for key in keys]
+    print("ISBN-10 and ISBN-13 forms of every sample map to the same key")
+
+    labelled = ["ISBN 978-0-306-40615-7", "ISBN: 0306406152", "ISBN-13: 978-0-306-40615-7",
+                "ISBN-10: 0-306-40615-2", "isbn-13 9780306406157", "ISBN13:9780306406157"]
+    assert [canonical_isbn(text) for text in labelled] == [9780306406157] * len(labelled)
+    assert canonical_isbns(labelled) == [9780306406157] * len(labelled)
+    assert not is_valid_isbn("ISBN-13: 978-0-306-40615-8")
+    print("Labelled forms such as 'ISBN-13: 978-0-306-40615-7' are accepted")
+
+
+if __name__ == "__main__":
+    benchmark()
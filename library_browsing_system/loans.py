@@ -0,0 +1,272 @@
+"""
+Loan and LoanLedger classes
+Records who borrowed which book, when it is due and when it came back.
+
+Indexes kept by the ledger:
+- by member ID: the member's open loans, plus every loan they ever had
+- by ISBN: who has the book right now, plus every loan of the book
+- by due date: a heap of open loans, so "overdue today" only visits overdue loans
+
+Every borrow and return is appended to a log file, which is read back
+when the ledger is opened again, so loans survive a restart.
+
+Methods:
+borrow(member_id, isbn), return_book(member_id, isbn)
+loans_of(member_id), holders_of(isbn), overdue(today)
+"""
+
+import heapq
+import os
+import threading
+from datetime import date, timedelta
+
+LOAN_DAYS = 14
+
+
+def clean(text):
+    """Keep tabs and newlines out of a log field"""
+    return str(text).replace("\t", " ").replace("\n", " ")
+
+
+class Loan:
+    __slots__ = ("loan_id", "member_id", "isbn", "borrowed_on", "due_on", "returned_on")
+
+    def __init__(self, loan_id, member_id, isbn, borrowed_on, due_on, returned_on=None):
+        self.loan_id = loan_id
+        self.member_id = member_id
+        self.isbn = isbn
+        self.borrowed_on = borrowed_on
+        self.due_on = due_on
+        self.returned_on = returned_on
+
+    def is_open(self):
+        return self.returned_on is None
+
+    def is_overdue(self, today=None):
+        return self.returned_on is None and self.due_on < (today or date.today())
+
+    def __str__(self):
+        status = f"returned {self.returned_on}" if self.returned_on else f"due {self.due_on}"
+        return f"Loan {self.loan_id}: ISBN {self.isbn} to member {self.member_id}, borrowed {self.borrowed_on}, {status}"
+
+
+class LoanLedger:
+    def __init__(self, path=None):
+        self.__loans = {}              # loan ID -> Loan
+        self.__open_by_member = {}     # member ID -> {loan ID: Loan} of open loans
+        self.__open_by_isbn = {}       # isbn -> {loan ID: Loan} of open loans
+        self.__history_by_member = {}  # member ID -> list of every Loan, oldest first
+        self.__history_by_isbn = {}    # isbn -> list of every Loan, oldest first
+        self.__due = []                # heap of (due date, loan ID, Loan); returned loans are removed lazily
+        self.__returned_in_heap = 0
+        self.__member_names = {}       # member name (lower case) -> member ID
+        self.__next_id = 1
+        self.__lock = threading.Lock()  # members borrowing at the same time must not share a loan ID
+        self.__listeners = []          # functions called with every new loan (e.g. popularity ranking)
+        self.__path = path
+        self.__log = None
+        if path:
+            if os.path.exists(path):
+                self.__replay(path)
+            self.__log = open(path, "a", encoding="utf-8")
+
+    # ---- borrowing and returning ----
+
+    def borrow(self, member_id, isbn, today=None, days=LOAN_DAYS, member_name=""):
+        """Record a new loan and return it"""
+        today = today or date.today()
+        with self.__lock:
+            loan = Loan(self.__next_id, member_id, isbn, today, today + timedelta(days=days))
+            self.__add(loan, member_name)
+            self.__write(f"B\t{loan.loan_id}\t{member_id}\t{clean(member_name)}\t{isbn}\t{loan.borrowed_on}\t{loan.due_on}")
+        for listener in self.__listeners:
+            listener(loan)
+        return loan
+
+    def add_listener(self, listener):
+        """Call listener(loan) for every loan borrowed from now on"""
+        self.__listeners.append(listener)
+
+    def all_loans(self):
+        """Every loan ever recorded, oldest first"""
+        with self.__lock:
+            return list(self.__loans.values())
+
+    def member_ids(self):
+        with self.__lock:
+            return list(self.__history_by_member)
+
+    def return_book(self, member_id, isbn, today=None):
+        """
+        Close the member's oldest open loan of this ISBN.
+        Returns the Loan, or None if the member has no open loan of the book
+        (so a copy that was never borrowed cannot be returned).
+        """
+        with self.__lock:
+            loan = self.__oldest_open(member_id, isbn)
+            if loan is None:
+                return None
+            self.__close(loan, today or date.today())
+            self.__write(f"R\t{loan.loan_id}\t{loan.returned_on}")
+        return loan
+
+    def has_loan(self, member_id, isbn):
+        with self.__lock:
+            return self.__oldest_open(member_id, isbn) is not None
+
+    def __oldest_open(self, member_id, isbn):
+        oldest = None
+        for loan in self.__open_by_member.get(member_id, {}).values():
+            if loan.isbn == isbn and (oldest is None or loan.loan_id < oldest.loan_id):
+                oldest = loan
+        return oldest
+
+    def __add(self, loan, member_name=""):
+        self.__loans[loan.loan_id] = loan
+        self.__next_id = max(self.__next_id, loan.loan_id + 1)
+        self.__history_by_member.setdefault(loan.member_id, []).append(loan)
+        self.__history_by_isbn.setdefault(loan.isbn, []).append(loan)
+        if member_name:
+            self.__member_names[member_name.lower()] = loan.member_id
+        if loan.returned_on is None:
+            self.__open_by_member.setdefault(loan.member_id, {})[loan.loan_id] = loan
+            self.__open_by_isbn.setdefault(loan.isbn, {})[loan.loan_id] = loan
+            heapq.heappush(self.__due, (loan.due_on, loan.loan_id, loan))
+
+    def __close(self, loan, returned_on):
+        loan.returned_on = returned_on
+        for index, key in ((self.__open_by_member, loan.member_id), (self.__open_by_isbn, loan.isbn)):
+            open_loans = index[key]
+            del open_loans[loan.loan_id]
+            if not open_loans:
+                del index[key]
+        self.__returned_in_heap += 1
+        # Rebuild the heap once most of it is returned loans, so the overdue scan stays short
+        if self.__returned_in_heap > len(self.__due) // 2 + 1000:
+            self.__due = [entry for entry in self.__due if entry[2].returned_on is None]
+            heapq.heapify(self.__due)
+            self.__returned_in_heap = 0
+
+    # ---- queries ----
+
+    def loans_of(self, member_id, include_returned=False):
+        """A member's open loans by due date, or every loan they ever had with include_returned"""
+        with self.__lock:
+            if include_returned:
+                return list(self.__history_by_member.get(member_id, []))
+            open_loans = list(self.__open_by_member.get(member_id, {}).values())
+        return sorted(open_loans, key=lambda loan: (loan.due_on, loan.loan_id))
+
+    def holders_of(self, isbn):
+        """Open loans of a book, oldest first"""
+        with self.__lock:
+            open_loans = list(self.__open_by_isbn.get(isbn, {}).values())
+        return sorted(open_loans, key=lambda loan: loan.loan_id)
+
+    def history_of(self, isbn):
+        """Every loan of a book, oldest first"""
+        with self.__lock:
+            return list(self.__history_by_isbn.get(isbn, []))
+
+    def overdue(self, today=None):
+        """
+        Open loans due before today, earliest due first.
+        Walks the heap from the top and stops going down a branch as soon as
+        it reaches a loan that is not overdue, so only overdue entries are visited.
+        """
+        today = today or date.today()
+        found = []
+        stack = [0]
+        with self.__lock:
+            heap = self.__due
+            while stack:
+                position = stack.pop()
+                if position < len(heap) and heap[position][0] < today:
+                    loan = heap[position][2]
+                    if loan.returned_on is None:
+                        found.append(loan)
+                    stack.append(2 * position + 1)
+                    stack.append(2 * position + 2)
+        found.sort(key=lambda loan: (loan.due_on, loan.loan_id))
+        return found
+
+    def member_id(self, name):
+        """ID used for this member name in earlier loans, or None"""
+        return self.__member_names.get(name.lower())
+
+    def get_loan(self, loan_id):
+        return self.__loans.get(loan_id)
+
+    def open_count(self):
+        return len(self.__due) - self.__returned_in_heap
+
+    def __len__(self):
+        return len(self.__loans)
+
+    # ---- log file ----
+
+    def __write(self, line):
+        if self.__log is not None:
+            self.__log.write(line + "\n")
+            self.__log.flush()
+
+    def __replay(self, path):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                parts = line.rstrip("\n").split("\t")
+                # Anything that does not parse is a line cut short by a crash; skip it
+                try:
+                    if parts[0] == "B" and len(parts) == 7:
+                        loan = Loan(int(parts[1]), parts[2], int(parts[4]),
+                                    date.fromisoformat(parts[5]), date.fromisoformat(parts[6]))
+                        self.__add(loan, parts[3])
+                    elif parts[0] == "R" and len(parts) == 3:
+                        loan = self.__loans.get(int(parts[1]))
+                        returned_on = date.fromisoformat(parts[2])
+                        if loan is not None and loan.returned_on is None:
+                            self.__close(loan, returned_on)
+                except ValueError:
+                    continue
+
+    def close(self):
+        if self.__log is not None:
+            self.__log.close()
+            self.__log = None
+
+    def __str__(self):
+        return f"Loan ledger with {len(self.__loans)} loans ({self.open_count()} open)"
+
+
+def benchmark(count=5000000):
+    import random
+    import time
+
+    rng = random.Random(7)
+    ledger = LoanLedger()
+    members = [f"M{i}" for i in range(count // 50)]
+    start = date(2015, 1, 1)
+    started = time.perf_counter()
+    for i in range(count):
+        today = start + timedelta(days=i * 3650 // count)
+        member = rng.choice(members)
+        isbn = 9780000000000 + rng.randrange(count // 10)
+        ledger.borrow(member, isbn, today)
+        # Most loans come back within a few weeks; one in a thousand never does
+        if rng.random() > 0.001:
+            ledger.return_book(member, isbn, today + timedelta(days=rng.randint(1, 30)))
+    print(f"Recorded {len(ledger)} loans ({ledger.open_count()} open) in {time.perf_counter() - started:.1f}s")
+
+    today = start + timedelta(days=3650)
+    queries = [("my loans", lambda: ledger.loans_of(rng.choice(members))),
+               ("my loan history", lambda: ledger.loans_of(rng.choice(members), include_returned=True)),
+               ("who has this book", lambda: ledger.holders_of(9780000000000 + rng.randrange(count // 10))),
+               ("overdue today", lambda: ledger.overdue(today))]
+    for name, query in queries:
+        started = time.perf_counter()
+        for _ in range(100):
+            results = query()
+        print(f"{name}: {(time.perf_counter() - started) * 10:.3f}ms ({len(results)} results)")
+
+
+if __name__ == "__main__":
+    benchmark()
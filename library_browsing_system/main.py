@@ -1,8 +1,36 @@
+import os
 from user import LibraryMember, Admin
+from isbn import canonical_isbn
+from catalog import Catalog
+from book_store import BookStore
+from loans import LoanLedger
+from holds import HoldManager, Notifier
+from recommendations import PopularityRanking, Recommendations
 
 class LibrarySystem:
-    def __init__(self):
-        self.book_inventory = {}
+    def __init__(self, data_dir="library_data"):
+        self.store = BookStore(data_dir)
+        self.book_inventory = Catalog(self.store)
+        self.loans = LoanLedger(os.path.join(data_dir, "loans.log"))
+        self.notifier = Notifier(os.path.join(data_dir, "notifications.log"))
+        self.holds = HoldManager(os.path.join(data_dir, "holds.log"), self.notifier)
+        self.popular = PopularityRanking()
+        for loan in self.loans.all_loans():
+            self.popular.record_loan(loan)
+        self.loans.add_listener(self.popular.record_loan)
+        # Rebuilt by running recommendations.py (e.g. nightly), not while members wait
+        self.recommendations = Recommendations(os.path.join(data_dir, "recommendations.json"))
+        self.members = {}  # name (lower case) -> LibraryMember, so a member keeps their ID between logins
+
+    def get_member(self, name):
+        member = self.members.get(name.lower())
+        if member is None:
+            member = LibraryMember(name, "Member")
+            known_id = self.loans.member_id(name) or self.holds.member_id(name)
+            if known_id is not None:
+                member.id = known_id
+            self.members[name.lower()] = member
+        return member
 
     def run(self):
         while True:
@@ -15,7 +43,9 @@ class LibrarySystem:
                 self.admin_menu(admin)
 
             elif role == "member":
-                member = LibraryMember(name, "Member")
+                member = self.get_member(name)
+                for message in self.notifier.inbox(member.id):
+                    print(f"* {message}")
                 self.member_menu(member)
 
             else:
@@ -26,6 +56,37 @@ class LibrarySystem:
                 print("Exiting system... Goodbye!")
                 break
 
+        self.close()
+
+    def ask_isbn(self, prompt):
+        """Read an ISBN-10 or ISBN-13 and return its canonical key, or None if it is not valid"""
+        try:
+            return canonical_isbn(input(prompt))
+        except ValueError as e:
+            print(e)
+            return None
+
+    def ask_listing(self):
+        sort_by = input("Sort by (title/author/availability, Enter for title): ").strip().lower()
+        author = input("Only books by author (Enter for all): ").strip()
+        title_from = input("Titles from (Enter for the first): ").strip()
+        title_to = input("Titles up to (Enter for the last): ").strip()
+        return sort_by, author or None, title_from, title_to or None
+
+    def page_through(self, show_page):
+        """Show pages until the last one, or until the user has seen enough"""
+        cursor = show_page(None)
+        while cursor is not None:
+            if input("Show more? (yes/no): ").strip().lower() != "yes":
+                break
+            cursor = show_page(cursor)
+
+    def close(self):
+        self.notifier.close()
+        self.holds.close()
+        self.loans.close()
+        self.store.close()
+
     def admin_menu(self, admin):
         while True:
             print(f"\nWelcome, {admin.name} (Admin)")
@@ -33,29 +94,58 @@ class LibrarySystem:
             print("2. Remove Book")
             print("3. View All Books")
             print("4. View Book by ISBN")
-            print("5. Logout")
+            print("5. Search Books")
+            print("6. View Borrowers of a Book")
+            print("7. View Overdue Loans")
+            print("8. Import Catalog File")
+            print("9. Logout")
 
             choice = input("Enter your choice: ")
 
             if choice == "1":
                 title = input("Enter book title: ")
                 author = input("Enter author name: ")
-                isbn = int(input("Enter ISBN: "))
+                isbn = self.ask_isbn("Enter ISBN: ")
+                if isbn is None:
+                    continue
                 copies = int(input("Enter available copies: "))
                 print(admin.add_book(title, author, isbn, copies, self.book_inventory))
 
             elif choice == "2":
-                isbn = int(input("Enter ISBN of book to remove: "))
+                isbn = self.ask_isbn("Enter ISBN of book to remove: ")
+                if isbn is None:
+                    continue
                 print(admin.remove_book(isbn, self.book_inventory))
 
             elif choice == "3":
-                admin.view_all_books(self.book_inventory)
+                sort_by, author, title_from, title_to = self.ask_listing()
+                self.page_through(lambda cursor: admin.view_all_books(self.book_inventory, sort_by, cursor, author,
+                                                                      title_from, title_to))
 
             elif choice == "4":
-                isbn = int(input("Enter ISBN: "))
+                isbn = self.ask_isbn("Enter ISBN: ")
+                if isbn is None:
+                    continue
                 print(admin.view_books(isbn, self.book_inventory))
 
             elif choice == "5":
+                query = input("Enter title or author words: ")
+                admin.search_books(query, self.book_inventory)
+
+            elif choice == "6":
+                isbn = self.ask_isbn("Enter ISBN: ")
+                if isbn is None:
+                    continue
+                admin.view_borrowers(isbn, self.loans)
+
+            elif choice == "7":
+                admin.view_overdue_loans(self.loans)
+
+            elif choice == "8":
+                path = input("Enter catalog file (.csv, .jsonl or .mrk): ").strip()
+                print(admin.import_books(path, self.book_inventory))
+
+            elif choice == "9":
                 print("Logging out...\n")
                 break
 
@@ -68,22 +158,60 @@ class LibrarySystem:
             print("1. View Available Books")
             print("2. Borrow Book")
             print("3. Return Book")
-            print("4. Logout")
+            print("4. Search Books")
+            print("5. My Loans")
+            print("6. My Holds")
+            print("7. Cancel Hold")
+            print("8. Most Borrowed Books")
+            print("9. Recommended for Me")
+            print("10. Logout")
 
             choice = input("Enter your choice: ")
 
             if choice == "1":
-                member.view_all_available_books(self.book_inventory)
+                sort_by, author, title_from, title_to = self.ask_listing()
+                self.page_through(lambda cursor: member.view_all_available_books(self.book_inventory, sort_by, cursor,
+                                                                                 author, title_from, title_to))
 
             elif choice == "2":
-                isbn = int(input("Enter ISBN to borrow: "))
-                print(member.borrow_book(isbn, self.book_inventory))
+                isbn = self.ask_isbn("Enter ISBN to borrow: ")
+                if isbn is None:
+                    continue
+                result = member.borrow_book(isbn, self.book_inventory, self.loans)
+                print(result)
+                if "out of stock" in result:
+                    if input("Join the waitlist for this book? (yes/no): ").strip().lower() == "yes":
+                        print(member.place_hold(isbn, self.book_inventory, self.holds))
 
             elif choice == "3":
-                isbn = int(input("Enter ISBN to return: "))
-                print(member.return_book(isbn, self.book_inventory))
+                isbn = self.ask_isbn("Enter ISBN to return: ")
+                if isbn is None:
+                    continue
+                print(member.return_book(isbn, self.book_inventory, self.loans, self.holds))
 
             elif choice == "4":
+                query = input("Enter title or author words: ")
+                member.search_books(query, self.book_inventory)
+
+            elif choice == "5":
+                member.view_my_loans(self.loans)
+
+            elif choice == "6":
+                member.view_my_holds(self.holds)
+
+            elif choice == "7":
+                isbn = self.ask_isbn("Enter ISBN of the hold to cancel: ")
+                if isbn is None:
+                    continue
+                print(member.cancel_hold(isbn, self.holds))
+
+            elif choice == "8":
+                member.view_popular_books(self.popular, self.book_inventory)
+
+            elif choice == "9":
+                member.view_recommendations(self.loans, self.recommendations, self.book_inventory)
+
+            elif choice == "10":
                 print("Logging out...\n")
                 break
 
@@ -0,0 +1,267 @@
+"""
+PopularityRanking and Recommendations classes
+"Most borrowed" books with time decay, and "members who borrowed this also borrowed" lists.
+
+PopularityRanking is updated on every loan. A loan counts half as much
+after HALF_LIFE_DAYS, so recent favourites rise above old classics. Instead
+of decaying every score each day, newer loans are given a bigger weight
+(2 ** (day / half life)), which gives the same order with only one score
+changing per loan. The top k books are kept in a min-heap while loans come
+in, so asking for the ranking just returns the ready-made list.
+
+Recommendations are computed by a batch job (build_recommendations, or
+`python recommendations.py`), not while members wait: it counts how often
+two books were borrowed by the same member (a sparse co-occurrence matrix
+kept as a dict of dicts), scores each pair with cosine similarity and
+saves the best RECOMMENDATIONS_PER_BOOK for every book to a JSON file.
+Serving one book's list is then a dictionary lookup and a slice.
+
+Methods:
+PopularityRanking: record(isbn, day), top(k)
+Recommendations: similar(isbn, k), for_history(isbns, k)
+build_recommendations(loans), save_recommendations(path, table)
+"""
+
+import heapq
+import json
+import math
+import os
+import threading
+from datetime import date
+
+HALF_LIFE_DAYS = 30
+TOP_SIZE = 100                 # books kept in the ranking
+RECOMMENDATIONS_PER_BOOK = 10
+MAX_BOOKS_PER_MEMBER = 200     # only a member's most recent loans count, so heavy readers don't dominate
+MIN_TOGETHER = 2               # pairs borrowed together fewer times than this are noise
+
+
+def day_number(day):
+    return day.toordinal() if isinstance(day, date) else day
+
+
+class PopularityRanking:
+    def __init__(self, half_life_days=HALF_LIFE_DAYS, size=TOP_SIZE):
+        self.half_life_days = half_life_days
+        self.size = size
+        self.__scores = {}      # isbn -> decayed loan count (in units of the base day)
+        self.__base_day = None  # day whose loans have weight 1
+        self.__top = {}         # isbn -> score for the books in the top `size`
+        self.__heap = []        # (score, isbn) of the top books, smallest first; outdated entries skipped
+        self.__ranked = None    # cached top list, rebuilt after the top changes
+        self.__lock = threading.Lock()
+
+    def record(self, isbn, day=None):
+        """Count one loan of isbn on day (a date or day number; default today)"""
+        day = day_number(date.today() if day is None else day)
+        with self.__lock:
+            if self.__base_day is None:
+                self.__base_day = day
+            exponent = (day - self.__base_day) / self.half_life_days
+            if exponent > 500:  # keep the weights within float range
+                self.__rebase(day)
+                exponent = 0.0
+            score = self.__scores.get(isbn, 0.0) + 2.0 ** exponent
+            self.__scores[isbn] = score
+            self.__update_top(isbn, score)
+
+    def record_loan(self, loan):
+        """Listener for LoanLedger.add_listener"""
+        self.record(loan.isbn, loan.borrowed_on)
+
+    def __update_top(self, isbn, score):
+        # Scores only ever grow, so a book can only enter the top when its own score changes
+        if isbn in self.__top or len(self.__top) < self.size:
+            self.__top[isbn] = score
+        else:
+            lowest_score, lowest = self.__lowest()
+            if score <= lowest_score:
+                return
+            del self.__top[lowest]
+            heapq.heappop(self.__heap)
+            self.__top[isbn] = score
+        heapq.heappush(self.__heap, (score, isbn))
+        self.__ranked = None
+        if len(self.__heap) > 4 * self.size:
+            self.__heap = [(score, isbn) for isbn, score in self.__top.items()]
+            heapq.heapify(self.__heap)
+
+    def __lowest(self):
+        """Smallest current entry of the heap, dropping entries whose score has since grown"""
+        while True:
+            score, isbn = self.__heap[0]
+            if self.__top.get(isbn) == score:
+                return score, isbn
+            heapq.heappop(self.__heap)
+
+    def __rebase(self, day):
+        factor = 2.0 ** (-(day - self.__base_day) / self.half_life_days)
+        self.__scores = {isbn: score * factor for isbn, score in self.__scores.items()}
+        self.__top = {isbn: score * factor for isbn, score in self.__top.items()}
+        self.__heap = [(score, isbn) for isbn, score in self.__top.items()]
+        heapq.heapify(self.__heap)
+        self.__base_day = day
+        self.__ranked = None
+
+    def top(self, k=10, today=None):
+        """The k most borrowed books as (isbn, decayed loan count as of today), most borrowed first"""
+        with self.__lock:
+            if self.__ranked is None:
+                self.__ranked = sorted(self.__top.items(), key=lambda item: -item[1])
+            ranked = self.__ranked[:k]
+            base_day = self.__base_day
+        if not ranked:
+            return []
+        factor = self.__decay(today, base_day)
+        return [(isbn, score * factor) for isbn, score in ranked]
+
+    def score(self, isbn, today=None):
+        with self.__lock:
+            if isbn not in self.__scores:
+                return 0.0
+            return self.__scores[isbn] * self.__decay(today, self.__base_day)
+
+    def __decay(self, today, base_day):
+        """How much a loan on base_day still counts today"""
+        exponent = (day_number(date.today() if today is None else today) - base_day) / self.half_life_days
+        return 2.0 ** -min(max(exponent, -1000), 1000)
+
+    def __len__(self):
+        return len(self.__scores)
+
+
+# ---- "borrowed together" recommendations ----
+
+def build_recommendations(loans, per_book=RECOMMENDATIONS_PER_BOOK, max_books_per_member=MAX_BOOKS_PER_MEMBER,
+                          min_together=MIN_TOGETHER):
+    """
+    Batch job: isbn -> [(other isbn, similarity), ...] best first, from every member's loan history.
+    similarity = times borrowed by the same member / sqrt(borrowers of one * borrowers of the other)
+    """
+    borrowers = {}  # isbn -> number of members who borrowed it
+    together = {}   # isbn -> {other isbn: members who borrowed both}; a sparse, symmetric matrix
+    for member_id in loans.member_ids():
+        history = loans.loans_of(member_id, include_returned=True)
+        books = sorted(set(loan.isbn for loan in history[-max_books_per_member:]))
+        for isbn in books:
+            borrowers[isbn] = borrowers.get(isbn, 0) + 1
+        for i, first in enumerate(books):
+            row = together.get(first)
+            if row is None:
+                row = together[first] = {}
+            for second in books[i + 1:]:
+                row[second] = row.get(second, 0) + 1
+
+    # Only the upper triangle was counted; score each pair once and add it to both books
+    candidates = {}
+    for first, row in together.items():
+        for second, count in row.items():
+            if count < min_together:
+                continue
+            similarity = count / math.sqrt(borrowers[first] * borrowers[second])
+            candidates.setdefault(first, []).append((similarity, second))
+            candidates.setdefault(second, []).append((similarity, first))
+    return {isbn: [(other, round(similarity, 4)) for similarity, other in heapq.nlargest(per_book, scored)]
+            for isbn, scored in candidates.items()}
+
+
+def save_recommendations(path, table):
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({str(isbn): similar for isbn, similar in table.items()}, file, separators=(",", ":"))
+    os.replace(temporary, path)
+
+
+class Recommendations:
+    """Serves the lists computed by build_recommendations"""
+
+    def __init__(self, path=None, table=None):
+        self.__table = table or {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.__table = {int(isbn): [tuple(pair) for pair in similar]
+                                for isbn, similar in json.load(file).items()}
+
+    def similar(self, isbn, k=RECOMMENDATIONS_PER_BOOK):
+        """Books most often borrowed together with isbn, as (isbn, similarity)"""
+        return self.__table.get(isbn, [])[:k]
+
+    def for_history(self, isbns, k=RECOMMENDATIONS_PER_BOOK):
+        """Books to suggest to someone who borrowed isbns, leaving out the ones they already had"""
+        already = set(isbns)
+        scores = {}
+        for isbn in already:
+            for other, similarity in self.__table.get(isbn, []):
+                if other not in already:
+                    scores[other] = scores.get(other, 0.0) + similarity
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def __len__(self):
+        return len(self.__table)
+
+
+def main(argv=None):
+    import argparse
+    from loans import LoanLedger
+
+    parser = argparse.ArgumentParser(description="Rebuild the 'borrowed together' recommendations")
+    parser.add_argument("--data-dir", default="library_data")
+    args = parser.parse_args(argv)
+
+    import time
+    started = time.perf_counter()
+    loans = LoanLedger(os.path.join(args.data_dir, "loans.log"))
+    table = build_recommendations(loans)
+    loans.close()
+    save_recommendations(os.path.join(args.data_dir, "recommendations.json"), table)
+    print(f"Recommendations for {len(table)} books from {len(loans)} loans in {time.perf_counter() - started:.1f}s")
+
+
+def benchmark(loan_count=1000000, books=50000, members=50000):
+    import random
+    import time
+    from datetime import timedelta
+    from loans import LoanLedger
+
+    rng = random.Random(9)
+    ledger = LoanLedger()
+    ranking = PopularityRanking()
+    ledger.add_listener(ranking.record_loan)
+    # A few books are far more popular than the rest, and each member mostly reads within one "genre"
+    genre_size = books // 100
+    start = date(2024, 1, 1)
+    started = time.perf_counter()
+    for i in range(loan_count):
+        member = rng.randrange(members)
+        if rng.random() < 0.7:
+            genre = (member % 100) * genre_size
+            isbn = 9780000000000 + genre + int(rng.random() ** 2 * genre_size)
+        else:
+            isbn = 9780000000000 + int(rng.random() ** 3 * books)
+        ledger.borrow(member, isbn, start + timedelta(days=i * 365 // loan_count))
+    print(f"Recorded {loan_count} loans with live ranking in {time.perf_counter() - started:.1f}s")
+
+    today = start + timedelta(days=365)
+    started = time.perf_counter()
+    for _ in range(10000):
+        top = ranking.top(10, today)
+    print(f"Top 10 query: {(time.perf_counter() - started) / 10000 * 1e6:.1f}us "
+          f"(most borrowed: ISBN {top[0][0]}, {top[0][1]:.1f} decayed loans)")
+
+    started = time.perf_counter()
+    table = build_recommendations(ledger)
+    print(f"Batch job: recommendations for {len(table)} books in {time.perf_counter() - started:.1f}s")
+    recommendations = Recommendations(table=table)
+    sample = [9780000000000 + rng.randrange(books) for _ in range(10000)]
+    started = time.perf_counter()
+    for isbn in sample:
+        recommendations.similar(isbn, 10)
+    print(f"Recommendations query: {(time.perf_counter() - started) / len(sample) * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    import sys
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        main()
@@ -0,0 +1,106 @@
+"""
+Thread-safety tests for borrowing and returning copies.
+Every test switches threads as often as possible, so any gap between checking
+and changing the copies would show up.
+"""
+
+import sys
+import threading
+
+import pytest
+
+from book import Book
+from book_store import BookStore
+from catalog import Catalog
+from loans import LoanLedger
+from user import LibraryMember
+
+THREADS = 8
+
+
+@pytest.fixture(autouse=True)
+def fast_switching():
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(old_interval)
+
+
+def run_threads(target, args_list, extra=()):
+    workers = [threading.Thread(target=target, args=args) for args in args_list]
+    workers.extend(threading.Thread(target=function) for function in extra)
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def test_copies_never_go_negative():
+    # Many threads fighting over the last copies of one book
+    book = Book("Contended", "Author", 1, 50)
+    taken = [0] * THREADS
+    lowest = [book.get_available_copies()]
+
+    def take_and_give_back(worker):
+        for i in range(5000):
+            if book.reserve_copy():
+                taken[worker] += 1
+                if i % 3:
+                    book.return_copy()
+                    taken[worker] -= 1
+            lowest[0] = min(lowest[0], book.get_available_copies())
+
+    run_threads(take_and_give_back, [(n,) for n in range(THREADS)])
+    assert lowest[0] >= 0
+    assert book.get_available_copies() == 50 - sum(taken) >= 0
+
+
+def test_last_copy_is_lent_once():
+    inventory = Catalog()
+    inventory[2] = Book("Last copy", "Author", 2, 1)
+    ledger = LoanLedger()
+    members = [LibraryMember(f"Member {n}", "member") for n in range(THREADS)]
+    results = []
+
+    def borrow(member):
+        results.append(member.borrow_book(2, inventory, ledger))
+
+    run_threads(borrow, [(member,) for member in members])
+    assert ledger.open_count() == 1
+    assert inventory[2].get_available_copies() == 0
+    assert sum(result.startswith("Book issued successfully!") for result in results) == 1
+
+
+def test_stored_copies_survive_concurrent_adds(tmp_path):
+    # Borrowing saves copy counts while adding books grows and remaps the store's files
+    store = BookStore(str(tmp_path))
+    books = [Book(f"Title {i}", "Author", 9780000000000 + i, 5) for i in range(100)]
+    for book in books:
+        store.add(book)
+    errors = []
+    adding = threading.Event()
+    adding.set()
+
+    def borrow_and_return(own_books):
+        try:
+            while adding.is_set():
+                for book in own_books:
+                    if book.reserve_copy():
+                        book.return_copy()
+        except Exception as e:
+            errors.append(e)
+
+    def add_books():
+        try:
+            for i in range(100, 20000):
+                store.add(Book(f"Title {i}", "Author", 9780000000000 + i, 5))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            adding.clear()
+
+    run_threads(borrow_and_return, [(books[n::4],) for n in range(4)], extra=[add_books])
+    assert errors == []
+    assert len(store) == 20000
+    assert all(store.get(book.get_isbn()).get_available_copies() == 5 for book in books)
+    store.close()
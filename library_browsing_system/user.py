@@ -7,10 +7,19 @@ Functionalities:
 5. Member can borrow a book
 6. Member can return a book
 7. Basic input menu for role-based access
+8. Admins and members can search by title/author and list books sorted by title, author or availability
+9. Loans are recorded: members see their loans, admins see who has a book and what is overdue
+10. Commands can also be run from a file or stdin with batch.py (no menus)
+11. Admin can import a whole catalog from a CSV, JSON Lines or MARC file
+12. Members can join the waitlist of an out-of-stock book; a returned copy goes to the first in line
+13. Most borrowed books (recent loans count more) and "members who borrowed this also borrowed" suggestions
+14. Book lists are shown a page at a time and can be limited to one author or a range of titles;
+    members only see books with copies on the shelf
 """
 
 import uuid
 from book import Book
+from importer import import_catalog
 
 class User:
     def __init__(self, name, role):
@@ -21,6 +30,35 @@ class User:
     def __str__(self):
         return f'User name: {self.name}, ID: {self.id}, Role: {self.role}'
 
+    def search_books(self, query, book_inventory, limit=20):
+        results = book_inventory.search(query, limit=limit)
+        if not results:
+            print("No matching books found.")
+        else:
+            for book in results:
+                print(f"{book.get_isbn()}: {book}")
+
+    def view_popular_books(self, ranking, book_inventory, k=10):
+        top = ranking.top(k)
+        if not top:
+            print("No books have been borrowed yet.")
+        else:
+            for place, (isbn, score) in enumerate(top, 1):
+                book = book_inventory.get(isbn)
+                print(f"{place}. {isbn}: {book if book is not None else 'no longer in the catalog'} ({score:.1f} recent loans)")
+
+    def view_books_page(self, book_inventory, sort_by=None, cursor=None, available_only=False, author=None,
+                        title_from="", title_to=None):
+        """Print one page of books; returns the cursor of the next page, or None after the last page"""
+        order = sort_by if sort_by in ("author", "availability") else "title"
+        books, next_cursor = book_inventory.books_page(cursor=cursor, order=order, available_only=available_only,
+                                                       author=author, title_from=title_from, title_to=title_to)
+        if not books and cursor is None:
+            print("No matching books found.")
+        for book in books:
+            print(f"{book.get_isbn()}: {book}")
+        return next_cursor
+
 class Admin(User):
     def __init__(self, name, role):
         super().__init__(name, role)
@@ -38,40 +76,114 @@ class Admin(User):
         del book_inventory[isbn]
         return f"Book with ISBN {isbn} removed successfully."
 
+    def import_books(self, path, book_inventory):
+        try:
+            return str(import_catalog(path, book_inventory))
+        except (OSError, ValueError) as e:
+            return f"Could not import {path}: {e}"
+
     def view_books(self, isbn, book_inventory):
         if isbn in book_inventory:
             return str(book_inventory[isbn])
         else:
             return f"Book with ISBN {isbn} not found."
 
-    def view_all_books(self, book_inventory):
+    def view_all_books(self, book_inventory, sort_by=None, cursor=None, author=None, title_from="", title_to=None):
         if not book_inventory:
             print("No books available in inventory.")
+            return None
+        return self.view_books_page(book_inventory, sort_by, cursor, False, author, title_from, title_to)
+
+    def view_borrowers(self, isbn, loans):
+        holders = loans.holders_of(isbn)
+        if not holders:
+            print(f"Nobody has borrowed ISBN {isbn}.")
+        else:
+            for loan in holders:
+                print(loan)
+
+    def view_overdue_loans(self, loans):
+        overdue = loans.overdue()
+        if not overdue:
+            print("No overdue loans.")
         else:
-            for isbn, book in book_inventory.items():
-                print(f"{isbn}: {book}")
+            for loan in overdue:
+                print(loan)
 
 class LibraryMember(User):
     def __init__(self, name, role):
         super().__init__(name, role)
 
-    def view_all_available_books(self, book_inventory):
-        if not book_inventory:
-            print("No books available in inventory.")
-        else:
-            for isbn, book in book_inventory.items():
-                print(f"{isbn}: {book}")
+    def view_all_available_books(self, book_inventory, sort_by=None, cursor=None, author=None, title_from="",
+                                 title_to=None):
+        if not book_inventory.available_count():
+            print("No books are on the shelf right now.")
+            return None
+        return self.view_books_page(book_inventory, sort_by, cursor, True, author, title_from, title_to)
 
-    def borrow_book(self, isbn, book_inventory):
+    def borrow_book(self, isbn, book_inventory, loans=None):
         if isbn in book_inventory:
             book = book_inventory[isbn]
-            return book.borrow_copy()
+            if loans is None:
+                return book.borrow_copy()
+            if not book.reserve_copy():
+                return "Book is currently out of stock."
+            # Only a member who actually got the copy is given a loan
+            loan = loans.borrow(self.id, isbn, member_name=self.name)
+            return f"Book issued successfully! Due back on {loan.due_on}."
         else:
             return f"Book with ISBN {isbn} not found."
 
-    def return_book(self, isbn, book_inventory):
+    def return_book(self, isbn, book_inventory, loans=None, holds=None):
         if isbn in book_inventory:
             book = book_inventory[isbn]
+            # Without a loan to close, returning would push the copies past the library's stock
+            if loans is not None and loans.return_book(self.id, isbn) is None:
+                return f"You have not borrowed the book with ISBN {isbn}."
+            if holds is not None:
+                return holds.return_copy(book, loans)
             return book.return_copy()
         else:
             return f"Book with ISBN {isbn} not found."
+
+    def place_hold(self, isbn, book_inventory, holds):
+        if isbn not in book_inventory:
+            return f"Book with ISBN {isbn} not found."
+        if book_inventory[isbn].get_available_copies() > 0:
+            return "Copies are available, you can borrow the book now."
+        try:
+            holds.place_hold(self.id, isbn, member_name=self.name)
+        except ValueError as e:
+            return str(e)
+        return f"Hold placed. You are number {holds.position(self.id, isbn)} in line."
+
+    def cancel_hold(self, isbn, holds):
+        if holds.cancel_hold(self.id, isbn):
+            return f"Hold on ISBN {isbn} cancelled."
+        return f"You have no hold on ISBN {isbn}."
+
+    def view_my_holds(self, holds):
+        my_holds = holds.holds_of(self.id)
+        if not my_holds:
+            print("You have no holds.")
+        else:
+            for hold in my_holds:
+                print(f"{hold} - number {holds.position(self.id, hold.isbn)} in line")
+
+    def view_recommendations(self, loans, recommendations, book_inventory, k=10):
+        history = [loan.isbn for loan in loans.loans_of(self.id, include_returned=True)]
+        suggestions = [(isbn, score) for isbn, score in recommendations.for_history(history, k * 2)
+                       if isbn in book_inventory][:k]
+        if not suggestions:
+            print("No recommendations yet. Borrow a few books first!")
+        else:
+            for isbn, _ in suggestions:
+                print(f"{isbn}: {book_inventory[isbn]}")
+
+    def view_my_loans(self, loans):
+        my_loans = loans.loans_of(self.id)
+        if not my_loans:
+            print("You have no borrowed books.")
+        else:
+            for loan in my_loans:
+                print(loan)